@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+峰值内存基准测试与内存预算检查
+
+按不同的数据规模生成测试工作簿（synthetic.py），对每种规模和引擎组合分别测量：
+- single: ExcelProcessor处理单个文件，按读取引擎和transient合并引擎组合
+- batch-parallel: BatchExcelProcessor多进程处理一批文件，测量单个工作进程的峰值
+
+每次测量都在新的子进程中运行，记录：
+- peak_rss_mb: 处理过程中进程常驻内存峰值相对处理前的增量
+- traced_peak_mb: tracemalloc统计的Python内存分配峰值（numpy/pandas的数组也会被统计）
+- worker_peak_rss_mb: 多进程场景中单个工作进程的常驻内存峰值相对空闲工作进程的增量
+- mb_per_input_mb: 峰值增量 / 输入文件大小
+
+任一测量超出预算（固定开销 + 每输入MB允许的内存 × 输入MB）时以非零状态退出，可用作内存回归检查。
+
+用法:
+    python benchmarks/memory_profile.py --rows 2000,10000 --budget 400 --output memory.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from synthetic import generate_dataset, WORKBOOK_FORMATS
+
+
+def _rss_peak_mb(who: int) -> float:
+    """返回当前进程或已结束子进程的常驻内存峰值（MB）"""
+    import resource
+
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(config: Dict[str, object]) -> Dict[str, object]:
+    """
+    在当前进程中运行一次测量（由子进程调用）
+
+    Args:
+        config: 测量配置，见run_measurement
+
+    Returns:
+        测量结果
+    """
+    import resource
+    import tracemalloc
+    from oect_excel_processor import ExcelProcessor, BatchExcelProcessor
+    from oect_excel_processor.readers import preload_engines
+
+    # 先导入读取模块，使导入本身占用的内存不计入处理过程
+    preload_engines(config["engine"])
+    before = _rss_peak_mb(resource.RUSAGE_SELF)
+
+    if config["scenario"] != 'single':
+        # 先启动一个不处理文件的工作进程，得到工作进程自身（解释器和库）的常驻内存作为基线
+        from concurrent.futures import ProcessPoolExecutor
+        from oect_excel_processor.batch_processor import _init_worker
+
+        batch = BatchExcelProcessor(config["directory"], config["pattern"], config["sheet_types"], "mem",
+                                    transient_engine=config["transient_engine"], engine=config["engine"])
+        worker_config = batch._worker_config(len(config["files"]), config["output_dir"], "csv")
+        with ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(worker_config,)) as executor:
+            executor.submit(int).result()
+        worker_before = _rss_peak_mb(resource.RUSAGE_CHILDREN)
+
+    tracemalloc.start()
+    if config["scenario"] == 'single':
+        ExcelProcessor(config["files"][0], config["sheet_types"], os.path.join(config["output_dir"], "single"),
+                       transient_engine=config["transient_engine"], engine=config["engine"]).process_and_save()
+    else:
+        BatchExcelProcessor(config["directory"], config["pattern"], config["sheet_types"], "mem",
+                            transient_engine=config["transient_engine"], engine=config["engine"]
+                            ).process_all_files(config["output_dir"], use_multiprocessing=True,
+                                                max_workers=config["workers"])
+    traced_peak = tracemalloc.get_traced_memory()[1] / (1 << 20)
+    tracemalloc.stop()
+
+    result = {
+        "peak_rss_mb": max(0.0, _rss_peak_mb(resource.RUSAGE_SELF) - before),
+        "traced_peak_mb": traced_peak,
+    }
+    if config["scenario"] != 'single':
+        result["worker_peak_rss_mb"] = max(0.0, _rss_peak_mb(resource.RUSAGE_CHILDREN) - worker_before)
+    return result
+
+
+def run_measurement(config: Dict[str, object]) -> Dict[str, object]:
+    """
+    在新的子进程中运行一次测量，避免之前的测量影响峰值
+
+    Args:
+        config: 测量配置
+
+    Returns:
+        测量结果
+    """
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--measure', json.dumps(config)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"测量失败: {completed.stderr.strip()}")
+    # 处理过程中的进度输出在前，最后一行为结果
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def engine_combinations(extension: str, engines: Optional[List[str]]) -> List[str]:
+    """返回要测试的读取引擎：指定时原样使用，否则为支持该文件类型的所有可用引擎"""
+    from oect_excel_processor.readers import available_engines, resolve_engine
+
+    if engines:
+        return engines
+    candidates = []
+    for engine, available in available_engines().items():
+        if not available:
+            continue
+        try:
+            resolve_engine(f"probe{extension}", engine)
+        except ValueError:
+            continue
+        candidates.append(engine)
+    return candidates
+
+
+def main() -> int:
+    if len(sys.argv) == 3 and sys.argv[1] == '--measure':
+        print(json.dumps(measure(json.loads(sys.argv[2]))))
+        return 0
+
+    parser = argparse.ArgumentParser(description='峰值内存基准测试与内存预算检查')
+    parser.add_argument('--rows', default='2000,10000', help='要测试的每个工作表的数据行数，以逗号分隔')
+    parser.add_argument('--sheets', type=int, default=4, help='每个文件的工作表数量')
+    parser.add_argument('--pairs', type=int, default=5, help='transient工作表的列对数量')
+    parser.add_argument('--files', type=int, default=4, help='多进程场景的文件数量')
+    parser.add_argument('--sheet-types', default='transfer,transient', help='类型序列，以逗号分隔')
+    parser.add_argument('--format', choices=WORKBOOK_FORMATS, default='xlsx', help='测试文件格式')
+    parser.add_argument('--engines', default=None, help='要测试的读取引擎，以逗号分隔，默认为所有可用引擎')
+    parser.add_argument('--workers', type=int, default=2, help='多进程场景的工作进程数')
+    parser.add_argument('--budget', type=float, default=None,
+                        help='每输入MB允许的峰值内存增量（MB），超出时以非零状态退出')
+    parser.add_argument('--base-allowance', type=float, default=64.0,
+                        help='预算中与输入大小无关的固定开销（MB），默认为64')
+    parser.add_argument('--output', '-o', default=None, help='结果JSON文件路径')
+    args = parser.parse_args()
+
+    sheet_types = args.sheet_types.split(',')
+    engines = engine_combinations(f".{args.format}", args.engines.split(',') if args.engines else None)
+    work_dir = tempfile.mkdtemp(prefix="oect_memory_")
+    results = []
+
+    try:
+        for rows in [int(value) for value in args.rows.split(',')]:
+            directory = os.path.join(work_dir, f"rows_{rows}")
+            dataset = generate_dataset(directory, args.files, args.sheets, rows, args.pairs,
+                                       sheet_types, args.format)
+            file_mb = os.path.getsize(dataset["files"][0]) / 1e6
+            print(f"数据规模: 每个工作表 {rows} 行，单个文件 {file_mb:.2f} MB")
+
+            configs = [
+                {"scenario": "single", "engine": engine, "transient_engine": transient_engine,
+                 "input_mb": file_mb}
+                for engine in engines for transient_engine in ('numpy', 'pandas')
+            ]
+            configs.append({"scenario": "batch-parallel", "engine": "auto", "transient_engine": "numpy",
+                            "input_mb": dataset["bytes"] / 1e6, "workers": args.workers})
+
+            for config in configs:
+                output_dir = os.path.join(work_dir, "output")
+                os.makedirs(output_dir, exist_ok=True)
+                config.update({"rows": rows, "files": dataset["files"], "directory": directory,
+                               "pattern": f"*.{args.format}", "sheet_types": sheet_types,
+                               "output_dir": output_dir})
+                measured = run_measurement(config)
+                shutil.rmtree(output_dir)
+
+                # 多进程场景中每个工作进程一次只处理一个文件，按单个文件的大小和单个工作进程的峰值计算
+                per_file_mb = file_mb
+                peak = max(measured["peak_rss_mb"], measured.get("worker_peak_rss_mb", 0.0))
+
+                entry = {
+                    "scenario": config["scenario"],
+                    "engine": config["engine"],
+                    "transient_engine": config["transient_engine"],
+                    "rows": rows,
+                    "input_mb": config["input_mb"],
+                    **measured,
+                    "mb_per_input_mb": peak / per_file_mb if per_file_mb > 0 else 0.0,
+                }
+                if args.budget is not None:
+                    limit = args.base_allowance + args.budget * per_file_mb
+                    entry["budget_mb"] = limit
+                    entry["within_budget"] = peak <= limit
+                results.append(entry)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print()
+    print(f"{'场景':<16}{'读取引擎':<10}{'合并引擎':<10}{'行数':>8}{'输入MB':>9}"
+          f"{'RSS增量MB':>11}{'分配峰值MB':>12}{'MB/输入MB':>11}{'预算':>6}")
+    for entry in results:
+        status = '' if "within_budget" not in entry else ('通过' if entry["within_budget"] else '超出')
+        print(f"{entry['scenario']:<16}{entry['engine']:<10}{entry['transient_engine']:<10}{entry['rows']:>8}"
+              f"{entry['input_mb']:>9.2f}{entry['peak_rss_mb']:>11.1f}{entry['traced_peak_mb']:>12.1f}"
+              f"{entry['mb_per_input_mb']:>11.1f}{status:>6}")
+
+    if args.output:
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "params": {"rows": args.rows, "sheets": args.sheets, "pairs": args.pairs, "files": args.files,
+                       "format": args.format, "workers": args.workers, "budget": args.budget,
+                       "base_allowance": args.base_allowance},
+            "results": results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.output}")
+
+    over_budget = [entry for entry in results if entry.get("within_budget") is False]
+    if over_budget:
+        print(f"\n{len(over_budget)} 项测量超出内存预算")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
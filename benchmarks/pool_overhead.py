@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+进程池每个文件的调度开销基准测试
+
+生成大量很小的工作簿，对比三种执行方式的耗时：
+1. 单进程处理
+2. 旧的多进程方式：每个文件提交一次绑定方法（每个任务都要序列化整个BatchExcelProcessor，
+   工作进程在第一个任务时才导入读取相关模块，不分块）
+3. 当前的多进程方式：模块级任务函数 + 初始化函数 + 分块
+
+用法:
+    python benchmarks/pool_overhead.py --files 400 --workers 4
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from oect_excel_processor import BatchExcelProcessor
+from synthetic import make_workbook
+
+
+@contextlib.contextmanager
+def quiet():
+    """在文件描述符层面屏蔽标准输出（包括工作进程的进度输出）"""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, 'w') as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            yield
+        finally:
+            sys.stdout.flush()
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+def run_legacy(processor: BatchExcelProcessor, output_dir: str, workers: int) -> None:
+    """旧的多进程方式：每个文件提交一次绑定方法"""
+    files = processor.get_excel_files()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(processor._process_file, f, i + 1, output_dir, "csv")
+                   for i, f in enumerate(files)]
+        for future in futures:
+            future.result()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='进程池每个文件的调度开销基准测试')
+    parser.add_argument('--files', type=int, default=400, help='生成的工作簿数量')
+    parser.add_argument('--rows', type=int, default=20, help='每个工作表的数据行数')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='工作进程数')
+    parser.add_argument('--chunksize', type=int, default=None, help='分块大小，默认自动确定')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="oect_pool_bench_")
+    input_dir = os.path.join(work_dir, "input")
+    os.makedirs(input_dir)
+
+    try:
+        print(f"生成 {args.files} 个工作簿...")
+        template = os.path.join(work_dir, "template.xlsx")
+        # 一个transfer和一个transient工作表的小工作簿
+        make_workbook(template, ["transfer", "transient"], args.rows, pairs=1)
+        for i in range(args.files):
+            shutil.copy(template, os.path.join(input_dir, f"device_{i + 1}.xlsx"))
+
+        processor = BatchExcelProcessor(input_dir, "*.xlsx", ["transfer", "transient"], "bench")
+
+        scenarios = [
+            ("单进程", lambda out: processor.process_all_files(out)),
+            ("旧多进程（逐文件提交绑定方法）", lambda out: run_legacy(processor, out, args.workers)),
+            ("新多进程（初始化函数 + 分块）", lambda out: processor.process_all_files(
+                out, use_multiprocessing=True, max_workers=args.workers, chunksize=args.chunksize)),
+        ]
+
+        print(f"工作进程数: {args.workers}")
+        print(f"{'方式':<32}{'总耗时(s)':>12}{'每文件(ms)':>14}")
+        for i, (name, run) in enumerate(scenarios):
+            output_dir = os.path.join(work_dir, f"output_{i}")
+            os.makedirs(output_dir, exist_ok=True)
+            with quiet():
+                start = time.perf_counter()
+                run(output_dir)
+                elapsed = time.perf_counter() - start
+            shutil.rmtree(output_dir)
+            print(f"{name:<32}{elapsed:>12.2f}{elapsed / args.files * 1000:>14.2f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+可复现的性能基准测试
+
+用synthetic.py按固定参数和随机种子生成测试数据，依次运行以下场景：
+- single[numpy] / single[pandas]: ExcelProcessor处理单个文件，分别使用两种transient合并引擎
+- batch-serial[numpy] / batch-serial[pandas]: 单进程批量处理
+- batch-parallel: 多进程批量处理（按文件分发）
+- batch-parallel-sheet: 多进程批量处理（按工作表分发）
+- batch-pipeline: 读取、转换、写入三阶段流水线
+- batch-serial[typed]: 单进程批量处理，类型化模式并以6位有效数字快速写入CSV
+
+每个场景重复运行多次，取耗时中位数计算吞吐量（文件/s、行/s、MB/s，MB按输入文件大小计算），
+结果保存为JSON，可通过 --compare 与之前保存的结果比较。
+
+用法:
+    python benchmarks/run_benchmarks.py --files 20 --rows 2000 --output results.json
+    python benchmarks/run_benchmarks.py --compare results-0.1.0.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import numpy as np
+import pandas as pd
+
+import oect_excel_processor
+from oect_excel_processor import ExcelProcessor, BatchExcelProcessor
+from oect_excel_processor.readers import available_engines
+from synthetic import generate_dataset, WORKBOOK_FORMATS
+from pool_overhead import quiet
+
+
+# 所有场景名称
+SCENARIOS = ('single[numpy]', 'single[pandas]', 'batch-serial[numpy]', 'batch-serial[pandas]',
+             'batch-parallel', 'batch-parallel-sheet', 'batch-pipeline', 'batch-serial[typed]')
+
+
+def build_scenarios(dataset: Dict[str, object], sheet_types: List[str], engine: str,
+                    workers: Optional[int]) -> Dict[str, Dict[str, object]]:
+    """
+    构造每个场景的运行函数和工作量
+
+    Args:
+        dataset: generate_dataset返回的数据集信息
+        sheet_types: 类型序列
+        engine: Excel读取引擎
+        workers: 多进程场景的工作进程数
+
+    Returns:
+        场景名称到 {run: 以输出目录为参数的函数, files, rows, bytes} 的字典
+    """
+    first_file = dataset["files"][0]
+    directory = os.path.dirname(first_file)
+    pattern = f"*{os.path.splitext(first_file)[1]}"
+
+    def single(transient_engine: str) -> Callable[[str], None]:
+        def run(output_dir: str) -> None:
+            ExcelProcessor(first_file, sheet_types, os.path.join(output_dir, "single"),
+                           transient_engine=transient_engine, engine=engine).process_and_save()
+        return run
+
+    def batch(transient_engine: str = "numpy", processor_options: Optional[Dict[str, object]] = None,
+              **options) -> Callable[[str], None]:
+        def run(output_dir: str) -> None:
+            processor = BatchExcelProcessor(directory, pattern, sheet_types, "bench",
+                                            transient_engine=transient_engine, engine=engine,
+                                            **(processor_options or {}))
+            processor.process_all_files(output_dir, max_workers=workers, **options)
+        return run
+
+    single_load = {"files": 1, "rows": dataset["file_rows"][0], "bytes": os.path.getsize(first_file)}
+    batch_load = {"files": len(dataset["files"]), "rows": dataset["rows"], "bytes": dataset["bytes"]}
+
+    return {
+        'single[numpy]': {"run": single("numpy"), **single_load},
+        'single[pandas]': {"run": single("pandas"), **single_load},
+        'batch-serial[numpy]': {"run": batch("numpy"), **batch_load},
+        'batch-serial[pandas]': {"run": batch("pandas"), **batch_load},
+        'batch-parallel': {"run": batch(use_multiprocessing=True), **batch_load},
+        'batch-parallel-sheet': {"run": batch(use_multiprocessing=True, granularity="sheet"), **batch_load},
+        'batch-pipeline': {"run": batch(pipeline=True), **batch_load},
+        'batch-serial[typed]': {"run": batch(processor_options={"dtype": "float64", "precision": 6}),
+                                **batch_load},
+    }
+
+
+def run_scenario(scenario: Dict[str, object], work_dir: str, repeat: int) -> Dict[str, object]:
+    """
+    重复运行一个场景并计算吞吐量
+
+    Args:
+        scenario: build_scenarios返回的场景
+        work_dir: 临时目录，每次运行使用新的输出目录
+        repeat: 重复次数
+
+    Returns:
+        包含每次耗时、耗时中位数和吞吐量的结果字典
+    """
+    times = []
+    for i in range(repeat):
+        output_dir = os.path.join(work_dir, f"output_{i}")
+        os.makedirs(output_dir)
+        with quiet():
+            start = time.perf_counter()
+            scenario["run"](output_dir)
+            times.append(time.perf_counter() - start)
+        shutil.rmtree(output_dir)
+
+    median = statistics.median(times)
+    return {
+        "files": scenario["files"],
+        "rows": scenario["rows"],
+        "bytes": scenario["bytes"],
+        "times": times,
+        "median_s": median,
+        "files_per_s": scenario["files"] / median,
+        "rows_per_s": scenario["rows"] / median,
+        "mb_per_s": scenario["bytes"] / 1e6 / median,
+    }
+
+
+def environment() -> Dict[str, object]:
+    """记录运行环境，便于比较不同机器和版本的结果"""
+    return {
+        "package_version": oect_excel_processor.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "engines": available_engines(),
+    }
+
+
+def print_results(results: Dict[str, Dict[str, object]], baseline: Optional[Dict[str, object]] = None) -> None:
+    """
+    打印结果表格，提供基准结果时同时打印相对基准的加速比
+
+    Args:
+        results: 场景名称到结果的字典
+        baseline: 之前保存的JSON结果
+    """
+    previous = (baseline or {}).get("results", {})
+    header = f"{'场景':<24}{'耗时(s)':>10}{'文件/s':>10}{'行/s':>14}{'MB/s':>10}"
+    if previous:
+        header += f"{'加速比':>10}"
+    print(header)
+    for name, result in results.items():
+        line = (f"{name:<24}{result['median_s']:>10.3f}{result['files_per_s']:>10.2f}"
+                f"{result['rows_per_s']:>14.0f}{result['mb_per_s']:>10.2f}")
+        if name in previous:
+            line += f"{previous[name]['median_s'] / result['median_s']:>9.2f}x"
+        print(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='OECT Excel Processor 性能基准测试')
+    parser.add_argument('--files', type=int, default=8, help='批量场景的文件数量')
+    parser.add_argument('--sheets', type=int, default=4, help='每个文件的工作表数量')
+    parser.add_argument('--rows', type=int, default=2000, help='每个工作表的数据行数')
+    parser.add_argument('--pairs', type=int, default=5, help='transient工作表的列对数量')
+    parser.add_argument('--sheet-types', default='transfer,transient', help='类型序列，以逗号分隔')
+    parser.add_argument('--format', choices=WORKBOOK_FORMATS, default='xlsx', help='测试文件格式')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--engine', default='auto', help='Excel读取引擎')
+    parser.add_argument('--workers', type=int, default=None, help='多进程场景的工作进程数，默认为CPU核心数')
+    parser.add_argument('--repeat', type=int, default=3, help='每个场景的重复次数')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='要运行的场景，以逗号分隔')
+    parser.add_argument('--output', '-o', default=None, help='结果JSON文件路径')
+    parser.add_argument('--compare', default=None, help='与之前保存的结果JSON比较')
+    args = parser.parse_args()
+
+    names = args.scenarios.split(',')
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"未知的场景: {', '.join(unknown)}，可选: {', '.join(SCENARIOS)}")
+
+    sheet_types = args.sheet_types.split(',')
+    work_dir = tempfile.mkdtemp(prefix="oect_bench_")
+
+    try:
+        print("生成测试数据...")
+        dataset = generate_dataset(os.path.join(work_dir, "input"), args.files, args.sheets, args.rows,
+                                   args.pairs, sheet_types, args.format, args.seed)
+        print(f"{len(dataset['files'])} 个文件，共 {dataset['rows']} 行数据，{dataset['bytes'] / 1e6:.2f} MB")
+
+        scenarios = build_scenarios(dataset, sheet_types, args.engine, args.workers)
+        results = {}
+        for name in names:
+            print(f"运行场景: {name}")
+            results[name] = run_scenario(scenarios[name], work_dir, args.repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print()
+    print_results(results, baseline)
+
+    if args.output:
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "environment": environment(),
+            "dataset": {**dataset["params"], "total_rows": dataset["rows"], "total_bytes": dataset["bytes"],
+                        "engine": args.engine, "workers": args.workers, "repeat": args.repeat},
+            "results": results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+命令行启动时间基准测试与回归检查
+
+在新的子进程中多次运行以下场景，记录实际耗时的中位数：
+- import: import oect_excel_processor
+- help: oect-processor --help
+- bad-args: oect-processor batch（缺少参数，以参数错误退出）
+
+另外用 python -X importtime 运行每个场景一次，统计本包各模块的累计导入耗时，
+并检查是否导入了pandas、numpy、natsort等重依赖（这些场景不应导入它们）。
+
+导入耗时超出 --threshold，或导入了重依赖时以非零状态退出，可用作启动时间回归检查。
+实际耗时包含解释器本身的启动时间，受机器影响较大，只在指定 --max-wall 时检查。
+
+用法:
+    python benchmarks/startup_time.py --runs 10 --threshold 50 --output startup.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# 各场景运行的Python参数
+SCENARIOS = {
+    'import': ['-c', 'import oect_excel_processor'],
+    'help': ['-m', 'oect_excel_processor.cli', '--help'],
+    'bad-args': ['-m', 'oect_excel_processor.cli', 'batch'],
+}
+
+# 启动时不应导入的重依赖
+HEAVY_MODULES = ('pandas', 'numpy', 'natsort', 'pyarrow', 'openpyxl', 'xlrd', 'python_calamine')
+
+# 本包模块名前缀
+PACKAGE = 'oect_excel_processor'
+
+
+def _environment() -> Dict[str, str]:
+    """返回子进程的环境变量，保证导入的是当前源码树中的包"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    return env
+
+
+def time_scenario(arguments: List[str], runs: int) -> List[float]:
+    """
+    多次运行一个场景
+
+    Args:
+        arguments: Python参数
+        runs: 运行次数
+
+    Returns:
+        每次运行的实际耗时（毫秒）
+    """
+    timings = []
+    env = _environment()
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + arguments, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def import_profile(arguments: List[str]) -> Dict[str, object]:
+    """
+    用 -X importtime 运行一个场景，解析导入耗时
+
+    Args:
+        arguments: Python参数
+
+    Returns:
+        包含package_ms（本包模块的累计导入耗时，毫秒）、total_ms（所有顶层导入的累计耗时）、
+        heavy（导入了的重依赖）和slowest（耗时最长的本包模块）的字典
+    """
+    completed = subprocess.run([sys.executable, '-X', 'importtime'] + arguments,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                               universal_newlines=True, env=_environment())
+
+    package_us = 0
+    total_us = 0
+    heavy = set()
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        if not cumulative.strip().isdigit():
+            # 表头
+            continue
+        cumulative_us = int(cumulative)
+        top_level = not name.startswith('  ')
+        name = name.strip()
+
+        if name.split('.')[0] in HEAVY_MODULES:
+            heavy.add(name.split('.')[0])
+        if top_level:
+            total_us += cumulative_us
+            if name.split('.')[0] == PACKAGE:
+                package_us += cumulative_us
+        if name.startswith(PACKAGE):
+            modules.append((cumulative_us, name))
+
+    modules.sort(reverse=True)
+    return {
+        "package_ms": package_us / 1000,
+        "total_ms": total_us / 1000,
+        "heavy": sorted(heavy),
+        "slowest": [{"module": name, "cumulative_ms": us / 1000} for us, name in modules[:5]],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='命令行启动时间基准测试与回归检查')
+    parser.add_argument('--runs', type=int, default=10, help='每个场景的运行次数')
+    parser.add_argument('--threshold', type=float, default=50.0,
+                        help='每个场景中本包模块允许的累计导入耗时（毫秒），超出时以非零状态退出，默认为50')
+    parser.add_argument('--max-wall', type=float, default=None,
+                        help='每个场景允许的实际耗时中位数（毫秒），超出时以非零状态退出，默认不检查')
+    parser.add_argument('--output', '-o', default=None, help='结果JSON文件路径')
+    args = parser.parse_args()
+
+    results = []
+    for name, arguments in SCENARIOS.items():
+        timings = time_scenario(arguments, args.runs)
+        profile = import_profile(arguments)
+        entry = {
+            "scenario": name,
+            "median_ms": statistics.median(timings),
+            "min_ms": min(timings),
+            **profile,
+        }
+        failures = []
+        if profile["heavy"]:
+            failures.append(f"导入了 {', '.join(profile['heavy'])}")
+        if profile["package_ms"] > args.threshold:
+            failures.append(f"导入耗时 {profile['package_ms']:.1f}ms 超出 {args.threshold:.1f}ms")
+        if args.max_wall is not None and entry["median_ms"] > args.max_wall:
+            failures.append(f"实际耗时 {entry['median_ms']:.1f}ms 超出 {args.max_wall:.1f}ms")
+        entry["failures"] = failures
+        results.append(entry)
+
+    print(f"{'场景':<10}{'中位数ms':>10}{'最小ms':>9}{'本包导入ms':>12}{'全部导入ms':>12}  结果")
+    for entry in results:
+        status = '通过' if not entry["failures"] else '；'.join(entry["failures"])
+        print(f"{entry['scenario']:<10}{entry['median_ms']:>10.1f}{entry['min_ms']:>9.1f}"
+              f"{entry['package_ms']:>12.1f}{entry['total_ms']:>12.1f}  {status}")
+
+    slowest = max(results, key=lambda entry: entry["package_ms"])["slowest"]
+    if slowest:
+        print("\n导入最慢的本包模块:")
+        for module in slowest:
+            print(f"  {module['module']:<40}{module['cumulative_ms']:>8.1f}ms")
+
+    if args.output:
+        report = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "params": {"runs": args.runs, "threshold": args.threshold, "max_wall": args.max_wall},
+            "results": results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到: {args.output}")
+
+    failed = [entry for entry in results if entry["failures"]]
+    if failed:
+        print(f"\n{len(failed)} 个场景未通过启动时间检查")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
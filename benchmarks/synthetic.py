@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+确定性的OECT测试工作簿生成器
+
+生成与仪器导出格式相同的工作簿：前两行为仪器信息，第三行为字段名，第四行开始为数据。
+- transfer工作表：Vg(V)、Id(A)、Ig(A)、Vd(V) 四列
+- transient工作表：每两列一组 Time(s)、Id(A)，各组长度不同（后面的组更短），以覆盖合并时的补齐逻辑
+
+相同的参数和随机种子总是生成相同的数据，可用于在不同版本、不同机器之间比较性能。
+
+用法:
+    python benchmarks/synthetic.py ./bench_data --files 20 --sheets 8 --rows 2000 --pairs 10
+"""
+
+import os
+import sys
+import datetime
+import argparse
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+# 生成的文件格式，xls需要xlwt，xlsx需要openpyxl
+WORKBOOK_FORMATS = ('xlsx', 'xls')
+
+# xls格式每个工作表最多的行数
+XLS_MAX_ROWS = 65536
+
+# 写入工作簿属性的固定时间，工作簿中不记录生成时刻
+_FIXED_TIME = datetime.datetime(2024, 1, 1)
+
+
+def transfer_rows(rows: int, rng: np.random.Generator) -> List[List[float]]:
+    """
+    生成一个transfer工作表的数据行
+
+    Args:
+        rows: 数据行数
+        rng: 随机数生成器
+
+    Returns:
+        每行四个数值的列表
+    """
+    vg = np.linspace(-0.8, 0.2, rows)
+    id_ = -1e-4 / (1 + np.exp(-(vg + 0.3) * 20)) + rng.normal(0, 1e-7, rows)
+    ig = rng.normal(0, 1e-9, rows)
+    vd = np.full(rows, -0.1)
+    return np.column_stack([vg, id_, ig, vd]).tolist()
+
+
+def transient_columns(rows: int, pairs: int, rng: np.random.Generator) -> List[np.ndarray]:
+    """
+    生成一个transient工作表的各列数据
+
+    第p组（从0开始）的长度为 rows 减去 p × rows / (2 × pairs)，模拟各次测量点数不同的情况。
+
+    Args:
+        rows: 第一组的数据行数
+        pairs: 列对数量
+        rng: 随机数生成器
+
+    Returns:
+        长度为 2 × pairs 的列数组列表，依次为各组的时间列和电流列
+    """
+    columns = []
+    for p in range(pairs):
+        length = max(1, rows - p * rows // (2 * pairs))
+        time = np.arange(length) * 0.01
+        current = -5e-5 * np.exp(-time / (0.5 + p * 0.1)) + rng.normal(0, 1e-7, length)
+        columns.extend([time, current])
+    return columns
+
+
+def _sheet_rows(sheet_type: str, rows: int, pairs: int, rng: np.random.Generator) -> List[List[object]]:
+    """生成一个工作表的所有行（含前三行表头），空单元格为None"""
+    header = [["Instrument", "OECT Synthetic"], ["Date", _FIXED_TIME.strftime("%Y-%m-%d")]]
+
+    if sheet_type == 'transfer':
+        return header + [["Vg(V)", "Id(A)", "Ig(A)", "Vd(V)"]] + transfer_rows(rows, rng)
+
+    columns = transient_columns(rows, pairs, rng)
+    data = []
+    for r in range(rows):
+        data.append([float(column[r]) if r < len(column) else None for column in columns])
+    return header + [["Time(s)", "Id(A)"] * pairs] + data
+
+
+def make_workbook(path: str, sheet_types: List[str], rows: int = 1000, pairs: int = 5,
+                  seed: int = 0) -> int:
+    """
+    生成一个测试工作簿，格式由文件扩展名决定
+
+    Args:
+        path: 输出路径，扩展名为.xlsx或.xls
+        sheet_types: 每个工作表的类型，'transfer'或'transient'
+        rows: 每个工作表的数据行数
+        pairs: transient工作表的列对数量
+        seed: 随机种子
+
+    Returns:
+        所有工作表的数据行数之和
+    """
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension not in WORKBOOK_FORMATS:
+        raise ValueError(f"文件格式必须是 {WORKBOOK_FORMATS} 之一，而不是 {extension}")
+    if extension == 'xls' and rows + 3 > XLS_MAX_ROWS:
+        raise ValueError(f"xls格式每个工作表最多 {XLS_MAX_ROWS - 3} 行数据")
+
+    rng = np.random.default_rng(seed)
+    sheets = [_sheet_rows(sheet_type, rows, pairs, rng) for sheet_type in sheet_types]
+
+    if extension == 'xlsx':
+        import openpyxl
+
+        workbook = openpyxl.Workbook(write_only=True)
+        workbook.properties.created = _FIXED_TIME
+        workbook.properties.modified = _FIXED_TIME
+        for i, sheet_rows in enumerate(sheets):
+            sheet = workbook.create_sheet(f"Sheet{i + 1}")
+            for row in sheet_rows:
+                sheet.append(row)
+        workbook.save(path)
+    else:
+        import xlwt
+
+        workbook = xlwt.Workbook()
+        for i, sheet_rows in enumerate(sheets):
+            sheet = workbook.add_sheet(f"Sheet{i + 1}")
+            for r, row in enumerate(sheet_rows):
+                for c, value in enumerate(row):
+                    if value is not None:
+                        sheet.write(r, c, value)
+        workbook.save(path)
+
+    return sum(len(sheet_rows) - 3 for sheet_rows in sheets)
+
+
+def generate_dataset(directory: str, files: int, sheets: int = 4, rows: int = 1000, pairs: int = 5,
+                     sheet_types: Optional[List[str]] = None, workbook_format: str = 'xlsx',
+                     seed: int = 0) -> Dict[str, object]:
+    """
+    在目录中生成一批测试工作簿，文件名为 device_{序号}.{格式}
+
+    Args:
+        directory: 输出目录
+        files: 文件数量
+        sheets: 每个文件的工作表数量
+        rows: 每个工作表的数据行数
+        pairs: transient工作表的列对数量
+        sheet_types: 类型序列，循环应用到所有工作表，默认为 ['transfer', 'transient']
+        workbook_format: 'xlsx'或'xls'
+        seed: 随机种子，第i个文件使用 seed + i
+
+    Returns:
+        数据集信息：文件列表、每个文件的数据行数、总数据行数、总字节数和生成参数
+    """
+    sheet_types = sheet_types or ['transfer', 'transient']
+    types = [sheet_types[i % len(sheet_types)] for i in range(sheets)]
+    os.makedirs(directory, exist_ok=True)
+
+    paths = []
+    file_rows = []
+    for i in range(files):
+        path = os.path.join(directory, f"device_{i + 1}.{workbook_format}")
+        file_rows.append(make_workbook(path, types, rows, pairs, seed + i))
+        paths.append(path)
+
+    return {
+        "files": paths,
+        "file_rows": file_rows,
+        "rows": sum(file_rows),
+        "bytes": sum(os.path.getsize(path) for path in paths),
+        "params": {"files": files, "sheets": sheets, "rows": rows, "pairs": pairs,
+                   "sheet_types": sheet_types, "format": workbook_format, "seed": seed},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='生成确定性的OECT测试工作簿')
+    parser.add_argument('directory', help='输出目录')
+    parser.add_argument('--files', type=int, default=10, help='文件数量')
+    parser.add_argument('--sheets', type=int, default=4, help='每个文件的工作表数量')
+    parser.add_argument('--rows', type=int, default=1000, help='每个工作表的数据行数')
+    parser.add_argument('--pairs', type=int, default=5, help='transient工作表的列对数量')
+    parser.add_argument('--sheet-types', default='transfer,transient', help='类型序列，以逗号分隔')
+    parser.add_argument('--format', choices=WORKBOOK_FORMATS, default='xlsx', help='文件格式')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    args = parser.parse_args()
+
+    dataset = generate_dataset(args.directory, args.files, args.sheets, args.rows, args.pairs,
+                               args.sheet_types.split(','), args.format, args.seed)
+    print(f"生成 {len(dataset['files'])} 个文件，共 {dataset['rows']} 行数据，"
+          f"{dataset['bytes'] / 1e6:.2f} MB: {args.directory}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
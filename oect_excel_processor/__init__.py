@@ -3,11 +3,33 @@ OECT Excel Processor - 用于处理OECT性能测试后的Excel数据并转换为
 
 这个包提供了用于处理特定格式Excel文件并转换为CSV格式的工具，
 专门针对OECT（有机电化学晶体管）性能测试数据。
+
+ExcelProcessor等类在第一次访问时才导入（同时导入pandas、numpy），
+只使用命令行或轻量模块时不需要承担这部分启动开销。
 """
 
-from .excel_processor import ExcelProcessor
-from .batch_processor import BatchExcelProcessor
+import importlib
 
 __version__ = '0.1.0'
 __author__ = 'OECT Research Team'
-__all__ = ['ExcelProcessor', 'BatchExcelProcessor'] 
\ No newline at end of file
+__all__ = ['ExcelProcessor', 'BatchExcelProcessor', 'SheetResult']
+
+# 延迟导入的名称及其所在模块
+_LAZY_ATTRIBUTES = {
+    'ExcelProcessor': '.excel_processor',
+    'SheetResult': '.excel_processor',
+    'BatchExcelProcessor': '.batch_processor',
+}
+
+
+def __getattr__(name: str):
+    """第一次访问时导入对应模块，并缓存到包的命名空间中"""
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,13 +1,158 @@
 import os
 import glob
-from typing import List, Dict, Optional, Union, Tuple, Callable
+from typing import List, Dict, Optional, Union, Tuple, Callable, Iterator
+from collections import deque
 import pandas as pd
 from natsort import natsorted
+import time
 import multiprocessing
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 import traceback
 
-from .excel_processor import ExcelProcessor
+from .excel_processor import (ExcelProcessor, SheetResult, TRANSIENT_ENGINES, NUMERIC_DTYPES,
+                              _init_sheet_worker, _process_sheet_task)
+from .readers import READER_ENGINES, preload_engines
+from .writers import check_output_format, check_precision, preload_format
+from .compression import check_compression
+from .cache import check_cache_size
+from .manifest import BatchManifest, BatchCheckpoint, checkpoint_id
+from .scheduling import CostModel, order_tasks, estimate_memory, SCHEDULE_POLICIES
+from .pipeline import BatchPipeline, StageStats, format_stage_report, DEFAULT_QUEUE_SIZE
+from .metrics import collect_outputs
+from .consolidated import ConsolidatedWriter
+from .options import SHEET_TYPES, GRANULARITIES, DEFAULT_CHUNK_ROWS
+
+
+def _output_sheet_type(output_file: str) -> str:
+    """
+    从输出文件名 {prefix}-{sheet_index}-{sheet_type}.{扩展名} 中取出工作表类型
+    
+    Args:
+        output_file: 输出文件路径
+        
+    Returns:
+        工作表类型
+    """
+    return os.path.basename(output_file).rsplit('-', 1)[-1].split('.', 1)[0]
+
+
+def _file_prefix(output_prefix: str, file_index: int, output_dir: Optional[str]) -> str:
+    """
+    返回单个Excel文件的输出前缀 {output_prefix}-{file_index}，指定输出目录时加上目录
+    
+    Args:
+        output_prefix: 输出文件的前缀名
+        file_index: 文件在自然排序中的序号（从1开始）
+        output_dir: 输出目录，如果不指定则使用当前目录
+        
+    Returns:
+        该文件的输出前缀
+    """
+    prefix = f"{output_prefix}-{file_index}"
+    if output_dir:
+        prefix = os.path.join(output_dir, prefix)
+    return prefix
+
+
+def _process_workbook(excel_file: str, file_index: int, sheet_types: List[str], output_prefix: str,
+                      output_dir: Optional[str], output_format: str,
+                      processor_options: Dict[str, object]) -> List[str]:
+    """
+    处理单个Excel文件的所有工作表，单进程和多进程路径共用
+    
+    输出文件命名为 {output_prefix}-{file_index}-{sheet_index}-{sheet_type}.{扩展名}，
+    工作簿只会被打开和解析一次。
+    
+    Args:
+        excel_file: Excel文件路径
+        file_index: 文件在自然排序中的序号（从1开始）
+        sheet_types: 工作表类型列表
+        output_prefix: 输出文件的前缀名
+        output_dir: 输出目录，如果不指定则使用当前目录
+        output_format: 输出格式，'csv'、'parquet'、'feather'或'hdf5'
+        processor_options: 传给ExcelProcessor的其他处理选项
+        
+    Returns:
+        此文件生成的输出文件路径列表
+    """
+    processor = ExcelProcessor(excel_file, sheet_types, _file_prefix(output_prefix, file_index, output_dir),
+                               **processor_options)
+    return processor.process_and_save(output_format)
+
+
+# 工作进程内的处理配置，由_init_worker在进程启动时设置一次
+_WORKER_CONFIG: Dict[str, object] = {}
+
+
+def _init_worker(config: Dict[str, object]) -> None:
+    """
+    进程池的初始化函数，每个工作进程启动时执行一次
+    
+    保存不可变的处理配置（之后的任务只需传递文件路径和序号），
+    并预先导入读取引擎和输出格式依赖的模块。
+    
+    Args:
+        config: 处理配置，见BatchExcelProcessor._worker_config
+    """
+    _WORKER_CONFIG.clear()
+    _WORKER_CONFIG.update(config)
+    preload_engines(config["processor_options"].get("engine", "auto"))
+    preload_format(config["output_format"])
+
+
+def _process_file_task(task: Tuple[str, int]) -> Tuple[str, int, List[str], Optional[str], float]:
+    """
+    工作进程中处理单个Excel文件的任务函数
+    
+    Args:
+        task: (Excel文件路径, 文件序号) 元组
+        
+    Returns:
+        包含处理结果的元组 (excel_file, file_index, output_files, error_message, elapsed)，
+        elapsed为处理耗时（秒）
+    """
+    excel_file, file_index = task
+    config = _WORKER_CONFIG
+    file_name = os.path.basename(excel_file)
+    start = time.perf_counter()
+    
+    # 监视目录时总文件数未知
+    progress = f"{file_index}/{config['total_files']}" if config["total_files"] else f"{file_index}"
+    print(f"处理文件 {progress}: {file_name}")
+    
+    try:
+        file_csv_outputs = _process_workbook(
+            excel_file, file_index, config["sheet_types"], config["output_prefix"],
+            config["output_dir"], config["output_format"], config["processor_options"]
+        )
+        
+        print(f"  成功处理文件: {file_name}")
+        print(f"  生成的CSV文件: {len(file_csv_outputs)}")
+        
+        return excel_file, file_index, file_csv_outputs, None, time.perf_counter() - start
+        
+    except Exception as e:
+        error_message = f"处理文件 {file_name} 时出错: {str(e)}\n{traceback.format_exc()}"
+        print(f"  {error_message}")
+        return excel_file, file_index, [], error_message, time.perf_counter() - start
+
+
+def _frames_task(task: Tuple) -> Tuple[str, List[SheetResult], Optional[str]]:
+    """
+    工作进程中在内存里处理单个Excel文件的任务函数（用于iter_results）
+    
+    Args:
+        task: (Excel文件路径, 工作表类型列表, 处理选项, 是否返回NumPy数组) 元组
+        
+    Returns:
+        (Excel文件路径, 各工作表的SheetResult列表, 错误信息) 元组
+    """
+    excel_file, sheet_types, processor_options, as_numpy = task
+    try:
+        processor = ExcelProcessor(excel_file, sheet_types, **processor_options)
+        return excel_file, list(processor.iter_frames(as_numpy)), None
+    except Exception as e:
+        return excel_file, [], f"处理文件 {os.path.basename(excel_file)} 时出错: {str(e)}"
 
 
 class BatchExcelProcessor:
@@ -17,38 +162,73 @@ class BatchExcelProcessor:
     """
     
     def __init__(self, directory: str, file_pattern: str = "*.xls", 
-                 sheet_types: List[str] = None, output_prefix: str = "batch_output"):
+                 sheet_types: List[str] = None, output_prefix: str = "batch_output",
+                 transient_engine: str = "numpy", engine: str = "auto", collect_metrics: bool = False,
+                 dtype: Optional[str] = None, precision: Optional[int] = None,
+                 compression: Optional[str] = None, compression_level: Optional[int] = None,
+                 cache_dir: Optional[str] = None, cache_size: Optional[float] = None):
         """
         初始化BatchExcelProcessor类
         
         Args:
             directory: 包含Excel文件的目录路径
             file_pattern: 文件匹配模式，默认为"*.xls"
-            sheet_types: 工作表类型列表，每个元素为'transfer'或'transient'
+            sheet_types: 工作表类型列表，每个元素为'transfer'、'transient'或'auto'（只读取工作表开头几行自动识别）
             output_prefix: 输出CSV文件的前缀名
+            transient_engine: transient工作表的合并引擎，'numpy'（向量化，默认）或'pandas'（逐列对循环）
+            engine: Excel读取引擎，'auto'（默认，按文件类型选择最快的可用引擎）、
+                    'calamine'、'xlrd'或'openpyxl'
+            collect_metrics: 是否记录每个工作簿打开、解析、转换、写入各阶段的耗时、CPU时间、行数和字节数，
+                             启用后process_all_files返回的每个输出列表带有metrics属性，
+                             所有记录也保存在metrics属性中
+            dtype: 类型化模式，'float64'或'float32'时把输出数据一次转换为该类型的数值列，
+                   非数值单元格转换为空值并打印警告；默认为None（保持原有的object类型）
+            precision: CSV中浮点数保留的有效数字位数（1~15），指定时数值数据整块格式化后分块写入，
+                       写入更快、文件更小；默认为None（按原样写出完整精度）。只用于CSV
+            compression: CSV输出的压缩方式，'gzip'、'zstd'或'xz'，输出文件名为 .csv.gz、.csv.zst、.csv.xz；
+                         压缩在每个处理器的后台线程中进行，不阻塞工作表的解析和转换。默认为None（不压缩）
+            compression_level: 压缩级别，默认为None（使用该压缩方式的默认级别）
+            cache_dir: 工作表缓存目录，指定时解码得到的工作表按工作簿内容哈希保存在其中，
+                       之后用其他类型序列或输出格式处理同一批文件时不再解码Excel。默认为None（不缓存）
+            cache_size: 工作表缓存目录的大小上限（MB），超出时删除最久未使用的条目，默认为None（2048）
         """
         self.directory = directory
         self.file_pattern = file_pattern
         self.sheet_types = sheet_types if sheet_types else ["transfer"]
         self.output_prefix = output_prefix
+        self.transient_engine = transient_engine
+        self.engine = engine
+        self.collect_metrics = collect_metrics
+        self.dtype = dtype
+        self.precision = precision
+        self.compression = compression
+        self.compression_level = compression_level
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        # 最近一次运行的指标记录（按自然排序），未启用指标收集时为None
+        self.metrics: Optional[List[Dict[str, object]]] = [] if collect_metrics else None
+        # 最近一次流水线模式运行的各阶段统计
+        self.stage_stats: Dict[str, StageStats] = {}
         self._validate_inputs()
         
     @classmethod
     def create(cls, directory: str, file_pattern: str = "*.xls", 
-               sheet_types: List[str] = None, output_prefix: str = "batch_output") -> 'BatchExcelProcessor':
+               sheet_types: List[str] = None, output_prefix: str = "batch_output",
+               **options) -> 'BatchExcelProcessor':
         """
         类方法创建BatchExcelProcessor实例
         
         Args:
             directory: 包含Excel文件的目录路径
             file_pattern: 文件匹配模式，默认为"*.xls"
-            sheet_types: 工作表类型列表，每个元素为'transfer'或'transient'
+            sheet_types: 工作表类型列表，每个元素为'transfer'、'transient'或'auto'（只读取工作表开头几行自动识别）
             output_prefix: 输出CSV文件的前缀名
+            **options: 其他处理选项，原样传给构造函数（如transient_engine、engine）
             
         Returns:
             BatchExcelProcessor实例
         """
-        return cls(directory, file_pattern, sheet_types, output_prefix)
+        return cls(directory, file_pattern, sheet_types, output_prefix, **options)
     
     def _validate_inputs(self) -> None:
         """验证输入参数的有效性"""
@@ -60,8 +240,40 @@ class BatchExcelProcessor:
         
         if self.sheet_types:
             for sheet_type in self.sheet_types:
-                if sheet_type not in ['transfer', 'transient']:
-                    raise ValueError(f"工作表类型必须是 'transfer' 或 'transient'，而不是 {sheet_type}")
+                if sheet_type not in SHEET_TYPES:
+                    raise ValueError(f"工作表类型必须是 {SHEET_TYPES} 之一，而不是 {sheet_type}")
+        
+        if self.transient_engine not in TRANSIENT_ENGINES:
+            raise ValueError(f"transient合并引擎必须是 {TRANSIENT_ENGINES} 之一，而不是 {self.transient_engine}")
+        
+        if self.engine not in READER_ENGINES:
+            raise ValueError(f"读取引擎必须是 {READER_ENGINES} 之一，而不是 {self.engine}")
+        
+        if self.dtype is not None and self.dtype not in NUMERIC_DTYPES:
+            raise ValueError(f"数值类型必须是 {NUMERIC_DTYPES} 之一，而不是 {self.dtype}")
+        
+        check_precision(self.precision)
+        check_compression(self.compression, self.compression_level)
+        check_cache_size(self.cache_size)
+    
+    def _processor_options(self) -> Dict[str, object]:
+        """
+        返回传给每个ExcelProcessor的处理选项
+        
+        Returns:
+            ExcelProcessor构造函数的关键字参数字典
+        """
+        return {
+            "transient_engine": self.transient_engine,
+            "engine": self.engine,
+            "collect_metrics": self.collect_metrics,
+            "dtype": self.dtype,
+            "precision": self.precision,
+            "compression": self.compression,
+            "compression_level": self.compression_level,
+            "cache_dir": self.cache_dir,
+            "cache_size": self.cache_size,
+        }
     
     def get_excel_files(self) -> List[str]:
         """
@@ -79,81 +291,410 @@ class BatchExcelProcessor:
         
         return excel_files
     
-    def _process_single_file(self, args: Tuple) -> Tuple[str, List[str], Optional[str]]:
+    def _process_file(self, excel_file: str, file_index: int, output_dir: Optional[str] = None,
+                      output_format: str = "csv") -> List[str]:
         """
-        处理单个Excel文件（用于多进程处理）
+        处理单个Excel文件的所有工作表（单进程路径）
         
         Args:
-            args: 包含处理参数的元组 (excel_file, file_index, total_files, output_dir)
+            excel_file: Excel文件路径
+            file_index: 文件在自然排序中的序号（从1开始）
+            output_dir: 输出目录，如果不指定则使用当前目录
+            output_format: 输出格式，'csv'、'parquet'、'feather'或'hdf5'
             
         Returns:
-            包含处理结果的元组 (excel_file, csv_files, error_message)
+            此文件生成的输出文件路径列表
         """
-        excel_file, file_index, total_files, output_dir = args
-        file_name = os.path.basename(excel_file)
+        return _process_workbook(excel_file, file_index, self.sheet_types, self.output_prefix,
+                                 output_dir, output_format, self._processor_options())
+    
+    def _worker_config(self, total_files: Optional[int], output_dir: Optional[str],
+                       output_format: str) -> Dict[str, object]:
+        """
+        返回进程池工作进程使用的处理配置，只在进程启动时传递一次
         
-        print(f"处理文件 {file_index}/{total_files}: {file_name}")
+        Args:
+            total_files: 本次运行的文件总数（用于进度显示），None表示未知
+            output_dir: 输出目录
+            output_format: 输出格式
+            
+        Returns:
+            处理配置字典
+        """
+        return {
+            "sheet_types": list(self.sheet_types),
+            "output_prefix": self.output_prefix,
+            "output_dir": output_dir,
+            "output_format": output_format,
+            "total_files": total_files,
+            "processor_options": self._processor_options(),
+        }
+    
+    def _run_settings(self, output_dir: Optional[str], output_format: str) -> Dict[str, object]:
+        """
+        返回影响输出内容的处理设置，用于增量模式判断设置是否变化
         
-        try:
-            # 为每个工作表创建自定义前缀
-            def custom_prefix_generator(sheet_index, sheet_type):
-                """为每个工作表生成自定义前缀"""
-                prefix = f"{self.output_prefix}-{file_index}-{sheet_index}-{sheet_type}"
-                if output_dir:
-                    prefix = os.path.join(output_dir, prefix)
-                return prefix
+        Args:
+            output_dir: 输出目录
+            output_format: 输出格式
             
-            # 读取Excel文件
-            excel_data = pd.ExcelFile(excel_file)
-            all_sheets = excel_data.sheet_names
+        Returns:
+            可序列化为JSON的设置字典
+        """
+        settings = {
+            "sheet_types": list(self.sheet_types),
+            "output_prefix": self.output_prefix,
+            "output_dir": os.path.abspath(output_dir or os.curdir),
+            "output_format": output_format,
+            **self._processor_options(),
+        }
+        # 指标收集和工作表缓存不影响输出内容
+        for option in ("collect_metrics", "cache_dir", "cache_size"):
+            settings.pop(option)
+        # 未使用类型化模式、有效数字位数和压缩时不记录，之前的清单仍然有效
+        for option in ("dtype", "precision", "compression", "compression_level"):
+            if settings[option] is None:
+                settings.pop(option)
+        return settings
+    
+    def _record_result(self, manifest: Optional[BatchManifest], settings: Dict[str, object],
+                       excel_file: str, file_index: int, outputs: List[str],
+                       hash_contents: bool) -> None:
+        """
+        把单个文件的处理结果记入清单（未启用增量模式时不做任何事）
+        
+        Args:
+            manifest: 增量模式的清单，未启用时为None
+            settings: 本次运行的处理设置
+            excel_file: Excel文件路径
+            file_index: 文件序号
+            outputs: 生成的输出文件路径列表，为空表示处理失败
+            hash_contents: 是否记录内容哈希
+        """
+        if manifest is None:
+            return
+        
+        if outputs:
+            applied_types = [self.sheet_types[j % len(self.sheet_types)] for j in range(len(outputs))]
+            # 自动识别的工作表记录识别出的类型（输出文件名以 -{类型} 结尾）
+            applied_types = [_output_sheet_type(output) if sheet_type == 'auto' else sheet_type
+                             for sheet_type, output in zip(applied_types, outputs)]
+            manifest.record(excel_file, file_index, settings, applied_types, outputs, hash_contents)
+        else:
+            # 处理失败的文件不保留记录，下次运行时重试
+            manifest.forget(excel_file)
+    
+    def _execute(self, pending: List[Tuple[str, int]], total_files: int, output_dir: Optional[str],
+                 output_format: str, use_multiprocessing: bool, max_workers: Optional[int],
+                 chunksize: Optional[int], on_result: Callable[[str, int, List[str], float], None],
+                 granularity: str = "file", pipeline: bool = False,
+                 stage_workers: Optional[Dict[str, int]] = None, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 memory_budget: Optional[float] = None) -> None:
+        """
+        处理待处理的文件，每完成一个文件调用一次on_result
+        
+        Args:
+            pending: 待处理的 (Excel文件路径, 文件序号) 列表，按此顺序处理
+            total_files: 本次运行的文件总数（用于进度显示）
+            output_dir: 输出目录
+            output_format: 输出格式
+            use_multiprocessing: 是否使用多进程处理
+            max_workers: 最大工作进程数
+            chunksize: 多进程处理时每次发送给工作进程的文件数，None表示自动确定
+            on_result: 回调函数，参数为 (Excel文件路径, 文件序号, 输出文件路径列表, 耗时秒数)，
+                       输出为空列表表示处理失败
+            granularity: 多进程处理的任务粒度，'file'或'sheet'
+            pipeline: 是否使用读取、转换、写入三阶段流水线
+            stage_workers: 流水线各阶段的线程数
+            queue_size: 流水线阶段之间每个队列最多容纳的工作表数
+            memory_budget: 按文件的多进程处理时的内存预算（MB），None表示不限制
+        """
+        if pipeline:
+            self._execute_pipeline(pending, output_dir, output_format, stage_workers, queue_size, on_result)
+        
+        elif use_multiprocessing and granularity == 'sheet':
+            self._execute_sheets(pending, output_dir, output_format, max_workers, chunksize, on_result)
+        
+        elif use_multiprocessing and memory_budget is not None:
+            self._execute_budgeted(pending, total_files, output_dir, output_format, max_workers,
+                                   memory_budget, on_result)
+        
+        # 如果使用多进程处理
+        elif use_multiprocessing:
+            # 确定工作进程数
+            if max_workers is None:
+                max_workers = multiprocessing.cpu_count()
+            
+            # 未指定时按每个工作进程约4批自动确定分块大小，小文件多时可显著降低每个任务的开销
+            if chunksize is None:
+                chunksize = max(1, len(pending) // (max_workers * 4))
             
-            # 存储此文件生成的所有CSV文件
-            file_csv_outputs = []
+            print(f"使用多进程处理，工作进程数: {max_workers}，分块大小: {chunksize}")
             
-            # 处理每个工作表，使用模运算循环应用类型序列
-            for j, sheet_name in enumerate(all_sheets):
-                # 循环使用sheet_types序列
-                sheet_type = self.sheet_types[j % len(self.sheet_types)]
-                # 读取工作表数据
-                sheet_data = pd.read_excel(excel_file, sheet_name=sheet_name, header=None)
+            # 处理配置通过初始化函数在每个工作进程中只传递一次，任务只包含文件路径和序号
+            config = self._worker_config(total_files, output_dir, output_format)
+            
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                     initargs=(config,)) as executor:
+                for excel_file, file_index, csv_files, error, elapsed in executor.map(
+                        _process_file_task, pending, chunksize=chunksize):
+                    on_result(excel_file, file_index, csv_files, elapsed)
+        
+        # 使用单进程处理（原有逻辑）
+        else:
+            # 处理每个Excel文件
+            for excel_file, file_index in pending:
+                file_name = os.path.basename(excel_file)
                 
-                # 根据工作表类型处理数据
-                if sheet_type == 'transfer':
-                    processor = ExcelProcessor(excel_file, [sheet_type], self.output_prefix)
-                    processed_data = processor._process_transfer_sheet(sheet_data)
-                else:  # transient
-                    processor = ExcelProcessor(excel_file, [sheet_type], self.output_prefix)
-                    processed_data = processor._process_transient_sheet(sheet_data)
+                print(f"处理文件 {file_index}/{total_files}: {file_name}")
+                start = time.perf_counter()
                 
-                # 保存为CSV，使用新的命名格式
-                sheet_index = j + 1
-                output_file = f"{custom_prefix_generator(sheet_index, sheet_type)}.csv"
-                processed_data.to_csv(output_file, index=False)
-                file_csv_outputs.append(output_file)
-            
-            print(f"  成功处理文件: {file_name}")
-            print(f"  生成的CSV文件: {len(file_csv_outputs)}")
+                try:
+                    file_csv_outputs = self._process_file(excel_file, file_index, output_dir, output_format)
+                    
+                    print(f"  成功处理文件: {file_name}")
+                    print(f"  生成的CSV文件: {len(file_csv_outputs)}")
+                except Exception as e:
+                    print(f"  处理文件 {file_name} 时出错: {str(e)}")
+                    file_csv_outputs = []
+                
+                on_result(excel_file, file_index, file_csv_outputs, time.perf_counter() - start)
+    
+    def _execute_budgeted(self, pending: List[Tuple[str, int]], total_files: int, output_dir: Optional[str],
+                          output_format: str, max_workers: Optional[int], memory_budget: float,
+                          on_result: Callable[[str, int, List[str], float], None]) -> None:
+        """
+        在内存预算内多进程处理文件
+        
+        按文件大小和工作表类型估计每个文件的内存占用，只有正在处理的文件的估计总量加上新文件
+        不超过预算时才提交新文件；排在最前面的文件放不下时，会跳过它先提交后面放得下的文件。
+        单个文件的估计值就超过预算时，等其他文件处理完后单独处理，保证批处理能继续进行。
+        
+        Args:
+            pending: 待处理的 (Excel文件路径, 文件序号) 列表，按此顺序优先提交
+            total_files: 本次运行的文件总数（用于进度显示）
+            output_dir: 输出目录
+            output_format: 输出格式
+            max_workers: 最大工作进程数，None表示使用CPU核心数
+            memory_budget: 内存预算（MB）
+            on_result: 回调函数，见_execute
+        """
+        if max_workers is None:
+            max_workers = multiprocessing.cpu_count()
+        
+        estimates = {excel_file: estimate_memory(excel_file, self.sheet_types) for excel_file, _ in pending}
+        print(f"使用多进程处理，工作进程数上限: {max_workers}，内存预算: {memory_budget:.0f} MB")
+        
+        config = self._worker_config(total_files, output_dir, output_format)
+        waiting = list(pending)
+        running = {}
+        in_use = 0.0
+        
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(config,)) as executor:
+            while waiting or running:
+                # 在预算和进程数允许的范围内尽量多地提交文件
+                while waiting and len(running) < max_workers:
+                    head_file = waiting[0][0]
+                    if estimates[head_file] > memory_budget:
+                        # 超出预算的文件只能单独处理，等正在处理的文件全部完成
+                        if running:
+                            break
+                        print(f"  文件 {os.path.basename(head_file)} 的估计内存 {estimates[head_file]:.0f} MB "
+                              f"超出预算，单独处理")
+                        task = waiting.pop(0)
+                    else:
+                        task = next((item for item in waiting if in_use + estimates[item[0]] <= memory_budget),
+                                    None)
+                        if task is None:
+                            break
+                        waiting.remove(task)
+                    
+                    in_use += estimates[task[0]]
+                    running[executor.submit(_process_file_task, task)] = task
+                    if estimates[task[0]] > memory_budget:
+                        break
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    in_use -= estimates[task[0]]
+                    excel_file, file_index, csv_files, error, elapsed = future.result()
+                    on_result(excel_file, file_index, csv_files, elapsed)
+    
+    def _execute_pipeline(self, pending: List[Tuple[str, int]], output_dir: Optional[str], output_format: str,
+                          stage_workers: Optional[Dict[str, int]], queue_size: int,
+                          on_result: Callable[[str, int, List[str], float], None]) -> None:
+        """
+        使用读取、转换、写入三阶段流水线处理待处理文件，结束后打印各阶段利用率
+        
+        Args:
+            pending: 待处理的 (Excel文件路径, 文件序号) 列表，按此顺序读取
+            output_dir: 输出目录
+            output_format: 输出格式
+            stage_workers: 各阶段的线程数，None表示使用默认值
+            queue_size: 阶段之间每个队列最多容纳的工作表数
+            on_result: 回调函数，见_execute
+        """
+        options = self._processor_options()
+        
+        def make_processor(excel_file: str, file_index: int) -> ExcelProcessor:
+            return ExcelProcessor(excel_file, self.sheet_types,
+                                  _file_prefix(self.output_prefix, file_index, output_dir), **options)
+        
+        runner = BatchPipeline(make_processor, output_format, stage_workers, queue_size)
+        workers = runner.stage_workers
+        print(f"使用流水线处理，读取/转换/写入线程数: {workers['read']}/{workers['transform']}/{workers['write']}，"
+              f"队列大小: {queue_size}")
+        
+        self.stage_stats = runner.run(pending, on_result)
+        print(format_stage_report(self.stage_stats, runner.wall))
+    
+    def _execute_sheets(self, pending: List[Tuple[str, int]], output_dir: Optional[str], output_format: str,
+                        max_workers: Optional[int], chunksize: Optional[int],
+                        on_result: Callable[[str, int, List[str], float], None]) -> None:
+        """
+        把所有待处理文件的工作表分发到同一个进程池中处理
+        
+        只包含少数几个大工作簿时，按文件分发无法用满所有工作进程；按工作表分发则每个工作表都是一个任务。
+        同一文件的工作表全部完成后才调用on_result，任一工作表出错时该文件记为处理失败。
+        
+        Args:
+            pending: 待处理的 (Excel文件路径, 文件序号) 列表，按此顺序处理
+            output_dir: 输出目录
+            output_format: 输出格式
+            max_workers: 最大工作进程数
+            chunksize: 每次发送给工作进程的工作表数，None表示自动确定
+            on_result: 回调函数，见_execute
+        """
+        if max_workers is None:
+            max_workers = multiprocessing.cpu_count()
+        
+        # 在主进程中只读取工作表名称，生成所有工作表任务
+        tasks = []
+        remaining: Dict[str, Dict[str, object]] = {}
+        for excel_file, file_index in pending:
+            try:
+                processor = ExcelProcessor(excel_file, self.sheet_types,
+                                           _file_prefix(self.output_prefix, file_index, output_dir),
+                                           **self._processor_options())
+                sheet_tasks = processor._sheet_tasks(output_format)
+            except Exception as e:
+                print(f"  处理文件 {os.path.basename(excel_file)} 时出错: {str(e)}")
+                on_result(excel_file, file_index, [], 0.0)
+                continue
             
-            return excel_file, file_csv_outputs, None
+            if not sheet_tasks:
+                on_result(excel_file, file_index, [], 0.0)
+                continue
             
-        except Exception as e:
-            error_message = f"处理文件 {file_name} 时出错: {str(e)}\n{traceback.format_exc()}"
-            print(f"  {error_message}")
-            return excel_file, [], error_message
+            remaining[excel_file] = {"file_index": file_index, "count": len(sheet_tasks),
+                                     "outputs": {}, "failed": False, "elapsed": 0.0,
+                                     "metrics": [] if self.collect_metrics else None}
+            tasks.extend(sheet_tasks)
+        
+        if not tasks:
+            return
+        
+        if chunksize is None:
+            chunksize = max(1, len(tasks) // (max_workers * 4))
+        
+        print(f"使用多进程按工作表处理，工作进程数: {max_workers}，工作表数: {len(tasks)}，分块大小: {chunksize}")
+        
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_sheet_worker,
+                                 initargs=(self.engine, output_format)) as executor:
+            for excel_file, sheet_index, output_file, error, elapsed, metrics in executor.map(
+                    _process_sheet_task, tasks, chunksize=chunksize):
+                state = remaining[excel_file]
+                state["count"] -= 1
+                state["elapsed"] += elapsed
+                if error:
+                    print(f"  {error}")
+                    state["failed"] = True
+                else:
+                    state["outputs"][sheet_index] = output_file
+                    if metrics is not None:
+                        state["metrics"].extend(metrics)
+                
+                if state["count"] == 0:
+                    file_name = os.path.basename(excel_file)
+                    outputs = [] if state["failed"] else [state["outputs"][i] for i in sorted(state["outputs"])]
+                    if outputs:
+                        print(f"  成功处理文件: {file_name}")
+                        print(f"  生成的CSV文件: {len(outputs)}")
+                        outputs = collect_outputs(outputs, excel_file, state["metrics"])
+                    on_result(excel_file, state["file_index"], outputs, state["elapsed"])
     
     def process_all_files(self, output_dir: Optional[str] = None, use_multiprocessing: bool = False, 
-                          max_workers: Optional[int] = None) -> Dict[str, List[str]]:
+                          max_workers: Optional[int] = None, output_format: str = "csv",
+                          incremental: bool = False, force: bool = False,
+                          hash_contents: bool = False, checkpoint: bool = False,
+                          resume: bool = False, chunksize: Optional[int] = None, schedule: str = "natural",
+                          granularity: str = "file", pipeline: bool = False,
+                          stage_workers: Optional[Dict[str, int]] = None,
+                          queue_size: int = DEFAULT_QUEUE_SIZE,
+                          memory_budget: Optional[float] = None) -> Dict[str, List[str]]:
         """
         处理所有Excel文件
         
+        启用检查点时，每个工作簿处理完成后都会在输出文件所在目录的 .oect_checkpoint-{标识}.jsonl 中
+        追加一条记录并落盘，运行正常结束后删除该文件；运行被中断时可以用resume=True从中断处继续。
+        标识由输入目录、文件匹配模式和处理设置确定，输出到同一目录的不同批处理互不影响。
+        
         Args:
             output_dir: 输出目录，如果不指定则使用当前目录
             use_multiprocessing: 是否使用多进程处理，默认为False
             max_workers: 最大工作进程数，默认为None（使用CPU核心数）
+            output_format: 输出格式，'csv'（默认）、'parquet'、'feather'或'hdf5'
+            incremental: 是否启用增量模式，只处理新增或修改过的文件，
+                         清单保存在输出目录的 .oect_manifest.json 中
+            force: 增量模式下强制重新处理所有文件（仍会更新清单）
+            hash_contents: 增量模式下是否记录并比较文件内容哈希，
+                           修改时间变化但内容相同的文件不会被重新处理
+            checkpoint: 是否记录检查点，默认为False
+            resume: 是否从上次被中断的运行继续，跳过已完整处理、且之后没有被修改的工作簿；
+                    处理设置与上次不同时从头开始。启用时总是记录检查点
+            chunksize: 多进程处理时每次发送给工作进程的文件数，默认为None（按文件数和进程数自动确定；
+                       非natural调度策略下默认为1，以免大文件被分到同一块中）
+            schedule: 调度策略，'natural'（默认，按自然排序）、'largest-first'（按文件大小从大到小）
+                      或'cost-model'（按输出目录中 .oect_cost_model.json 学习到的耗时从长到短），
+                      只影响处理顺序，文件序号和输出文件名仍按自然排序确定
+            granularity: 多进程处理的任务粒度，'file'（默认，每个文件一个任务）或'sheet'
+                         （所有文件的工作表分发到同一个进程池，适合少数包含大量工作表的大文件）；
+                         sheet粒度下chunksize表示每次发送的工作表数
+            pipeline: 是否使用流水线模式：读取、转换、写入三个阶段各由一组线程执行，
+                      阶段之间用有界队列连接，工作簿解码、转换和磁盘写入可以重叠；
+                      结束后打印各阶段利用率，并保存在stage_stats属性中。不能与多进程同时使用
+            stage_workers: 流水线各阶段的线程数，如 {'read': 2, 'transform': 1, 'write': 2}，
+                           未指定的阶段使用默认值
+            queue_size: 流水线阶段之间每个队列最多容纳的工作表数，限制同时在内存中的数据量
+            memory_budget: 按文件的多进程处理时的内存预算（MB）。按文件大小和工作表类型估计每个文件的
+                           内存占用，只在估计总量不超过预算时提交新文件；估计值超出预算的文件单独处理。
+                           启用时逐个提交文件，不使用chunksize
             
         Returns:
-            每个Excel文件及其生成的CSV文件路径的字典
+            每个Excel文件及其生成的输出文件路径的字典，跳过的文件返回上次生成的输出；
+            启用指标收集时，本次处理成功的文件的输出列表带有metrics属性
         """
+        check_output_format(output_format)
+        if self.compression is not None and output_format != 'csv':
+            raise ValueError(f"压缩只用于CSV输出，{output_format} 格式已内置压缩")
+        
+        if schedule not in SCHEDULE_POLICIES:
+            raise ValueError(f"调度策略必须是 {SCHEDULE_POLICIES} 之一，而不是 {schedule}")
+        
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"任务粒度必须是 {GRANULARITIES} 之一，而不是 {granularity}")
+        
+        if pipeline and use_multiprocessing:
+            raise ValueError("流水线模式不能与多进程处理同时使用")
+        
+        if memory_budget is not None and memory_budget <= 0:
+            raise ValueError(f"内存预算必须为正数，而不是 {memory_budget}")
+        
+        if memory_budget is not None and (not use_multiprocessing or granularity != 'file'):
+            print("内存预算只在按文件的多进程处理中生效")
+        
         # 获取所有Excel文件
         excel_files = self.get_excel_files()
         
@@ -168,89 +709,173 @@ class BatchExcelProcessor:
         # 存储处理结果
         results = {}
         
-        # 如果使用多进程处理
-        if use_multiprocessing:
-            # 确定工作进程数
-            if max_workers is None:
-                max_workers = multiprocessing.cpu_count()
-            
-            print(f"使用多进程处理，工作进程数: {max_workers}")
-            
-            # 准备处理参数
-            process_args = [
-                (excel_file, i + 1, len(excel_files), output_dir) 
-                for i, excel_file in enumerate(excel_files)
-            ]
+        settings = self._run_settings(output_dir, output_format)
+        
+        # 检查点：每完成一个工作簿立即落盘，保存在输出文件所在的目录中
+        checkpoints = None
+        if checkpoint or resume:
+            checkpoint_dir = os.path.dirname(os.path.abspath(_file_prefix(self.output_prefix, 1, output_dir)))
+            checkpoints = BatchCheckpoint(checkpoint_dir, checkpoint_id(self.directory, self.file_pattern, settings))
+            if not checkpoints.open(settings, resume=resume):
+                checkpoints = None
+        
+        # 增量模式：跳过输入和设置都没有变化的文件
+        manifest = BatchManifest.load(output_dir) if incremental else None
+        
+        pending = []
+        resumed = 0
+        for i, excel_file in enumerate(excel_files):
+            file_index = i + 1
+            if resume and checkpoints is not None and checkpoints.is_completed(excel_file, file_index):
+                results[excel_file] = checkpoints.outputs(excel_file)
+                resumed += 1
+            elif (manifest is not None and not force
+                    and manifest.is_up_to_date(excel_file, file_index, settings, hash_contents)):
+                results[excel_file] = manifest.outputs(excel_file)
+            else:
+                pending.append((excel_file, file_index))
+        
+        if resume:
+            print(f"继续上次的运行: 跳过 {resumed} 个已完成的文件")
+        if manifest is not None:
+            print(f"增量模式: 跳过 {len(excel_files) - len(pending) - resumed} 个未变化的文件，"
+                  f"需要处理 {len(pending)} 个文件")
+        
+        # 按调度策略确定处理顺序
+        cost_model = CostModel.load(output_dir) if schedule == 'cost-model' else None
+        pending = order_tasks(pending, schedule, cost_model)
+        if schedule != 'natural' and chunksize is None:
+            chunksize = 1
+        
+        def on_result(excel_file: str, file_index: int, outputs: List[str], elapsed: float) -> None:
+            """记录单个文件的处理结果"""
+            results[excel_file] = outputs
+            if outputs:
+                if checkpoints is not None:
+                    checkpoints.record(excel_file, file_index, outputs)
+                if cost_model is not None:
+                    cost_model.observe(excel_file, elapsed)
+            self._record_result(manifest, settings, excel_file, file_index, outputs, hash_contents)
+        
+        completed = False
+        try:
+            if pending:
+                self._execute(pending, len(excel_files), output_dir, output_format,
+                              use_multiprocessing, max_workers, chunksize, on_result, granularity,
+                              pipeline, stage_workers, queue_size, memory_budget)
+            completed = True
+        finally:
+            if manifest is not None:
+                # 被中断时也保存已完成部分的记录
+                manifest.save()
+            if cost_model is not None:
+                cost_model.save()
+            # 正常结束时删除检查点，被中断时保留以便继续
+            if checkpoints is not None:
+                checkpoints.close(remove=completed)
+        
+        # 无论处理顺序如何，结果都按自然排序返回
+        ordered = {excel_file: results[excel_file] for excel_file in excel_files if excel_file in results}
+        if self.collect_metrics:
+            self.metrics = [entry for outputs in ordered.values() for entry in getattr(outputs, "metrics", [])]
+        return ordered
+    
+    def iter_results(self, as_numpy: bool = False, use_multiprocessing: bool = False,
+                     max_workers: Optional[int] = None) -> Iterator[SheetResult]:
+        """
+        按自然排序逐个产出所有文件中每个工作表的处理结果，不写入任何文件
+        
+        这是一个生成器：单进程时每次只在内存中保留一个工作表；多进程时最多有 2 × max_workers
+        个文件的结果在内存中等待取用，处理上千个工作簿时内存占用也保持不变。
+        处理失败的文件会打印错误信息并跳过。
+        
+        Args:
+            as_numpy: 是否以NumPy数组代替DataFrame返回数据
+            use_multiprocessing: 是否使用多进程处理，默认为False
+            max_workers: 最大工作进程数，默认为None（使用CPU核心数）
             
-            # 使用进程池执行处理任务
-            with ProcessPoolExecutor(max_workers=max_workers) as executor:
-                # 提交所有任务
-                future_to_file = {
-                    executor.submit(self._process_single_file, args): args[0]
-                    for args in process_args
-                }
-                
-                # 收集结果
-                for future in as_completed(future_to_file):
-                    excel_file, csv_files, error = future.result()
-                    results[excel_file] = csv_files
+        Yields:
+            每个工作表的SheetResult，file_path区分所属文件
+        """
+        excel_files = self.get_excel_files()
+        options = self._processor_options()
         
-        # 使用单进程处理（原有逻辑）
-        else:
-            # 处理每个Excel文件
-            for i, excel_file in enumerate(excel_files):
-                file_name = os.path.basename(excel_file)
-                file_index = i + 1
-                
-                print(f"处理文件 {file_index}/{len(excel_files)}: {file_name}")
-                
+        if not use_multiprocessing:
+            for excel_file in excel_files:
                 try:
-                    # 为每个工作表创建自定义前缀
-                    def custom_prefix_generator(sheet_index, sheet_type):
-                        """为每个工作表生成自定义前缀"""
-                        prefix = f"{self.output_prefix}-{file_index}-{sheet_index}-{sheet_type}"
-                        if output_dir:
-                            prefix = os.path.join(output_dir, prefix)
-                        return prefix
-                    
-                    # 读取Excel文件
-                    excel_data = pd.ExcelFile(excel_file)
-                    all_sheets = excel_data.sheet_names
-                    
-                    # 存储此文件生成的所有CSV文件
-                    file_csv_outputs = []
-                    
-                    # 处理每个工作表，使用模运算循环应用类型序列
-                    for j, sheet_name in enumerate(all_sheets):
-                        # 循环使用sheet_types序列
-                        sheet_type = self.sheet_types[j % len(self.sheet_types)]
-                        # 读取工作表数据
-                        sheet_data = pd.read_excel(excel_file, sheet_name=sheet_name, header=None)
-                        
-                        # 根据工作表类型处理数据
-                        if sheet_type == 'transfer':
-                            processor = ExcelProcessor(excel_file, [sheet_type], self.output_prefix)
-                            processed_data = processor._process_transfer_sheet(sheet_data)
-                        else:  # transient
-                            processor = ExcelProcessor(excel_file, [sheet_type], self.output_prefix)
-                            processed_data = processor._process_transient_sheet(sheet_data)
-                        
-                        # 保存为CSV，使用新的命名格式
-                        sheet_index = j + 1
-                        output_file = f"{custom_prefix_generator(sheet_index, sheet_type)}.csv"
-                        processed_data.to_csv(output_file, index=False)
-                        file_csv_outputs.append(output_file)
-                    
-                    # 存储结果
-                    results[excel_file] = file_csv_outputs
-                    
-                    print(f"  成功处理文件: {file_name}")
-                    print(f"  生成的CSV文件: {len(file_csv_outputs)}")
+                    yield from ExcelProcessor(excel_file, self.sheet_types, **options).iter_frames(as_numpy)
                 except Exception as e:
-                    print(f"  处理文件 {file_name} 时出错: {str(e)}")
-                    results[excel_file] = []
+                    print(f"  处理文件 {os.path.basename(excel_file)} 时出错: {str(e)}")
+            return
+        
+        if max_workers is None:
+            max_workers = multiprocessing.cpu_count()
+        
+        tasks = iter([(excel_file, list(self.sheet_types), options, as_numpy) for excel_file in excel_files])
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_sheet_worker,
+                                 initargs=(self.engine, "csv")) as executor:
+            # 按提交顺序取结果，同时在处理中的文件数不超过 2 × max_workers
+            in_flight = deque()
+            for task in tasks:
+                in_flight.append(executor.submit(_frames_task, task))
+                if len(in_flight) >= max_workers * 2:
+                    break
+            
+            while in_flight:
+                excel_file, results, error = in_flight.popleft().result()
+                task = next(tasks, None)
+                if task is not None:
+                    in_flight.append(executor.submit(_frames_task, task))
+                if error:
+                    print(f"  {error}")
+                yield from results
+    
+    def process_consolidated(self, output_dir: Optional[str] = None, output_format: str = "parquet",
+                             use_multiprocessing: bool = False, max_workers: Optional[int] = None,
+                             chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Dict[str, List[str]]:
+        """
+        把所有文件的处理结果合并为一个transfer表和一个transient表
+        
+        两个表都是长格式，数据列之前加上 file_index、source_file、sheet_index、sheet_name 标识列，
+        表名为 {output_prefix}-transfer 和 {output_prefix}-transient。数据按块增量写入，
+        内存中最多缓存每种类型 chunk_rows 行，不会为每个工作表生成单独的小文件。
+        
+        Args:
+            output_dir: 输出目录，如果不指定则使用当前目录
+            output_format: 'parquet'（默认，每个表是一个分块的Parquet数据集目录）或'csv'（每个表一个文件）
+            use_multiprocessing: 是否使用多进程处理，默认为False
+            max_workers: 最大工作进程数，默认为None（使用CPU核心数）
+            chunk_rows: 每块的行数
+            
+        Returns:
+            工作表类型到输出路径列表的字典
+        """
+        excel_files = self.get_excel_files()
+        if not excel_files:
+            print(f"在目录 {self.directory} 中未找到匹配 {self.file_pattern} 的Excel文件")
+            return {}
+        
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        
+        prefix = os.path.join(output_dir, self.output_prefix) if output_dir else self.output_prefix
+        writer = ConsolidatedWriter(prefix, output_format, chunk_rows)
+        file_indices = {excel_file: i + 1 for i, excel_file in enumerate(excel_files)}
+        
+        print(f"合并输出: {len(excel_files)} 个文件 -> {prefix}-transfer / {prefix}-transient ({output_format})")
+        
+        try:
+            for result in self.iter_results(use_multiprocessing=use_multiprocessing, max_workers=max_workers):
+                writer.add(file_indices[result.file_path], result.file_path, result.sheet_index,
+                           result.sheet_name, result.sheet_type, result.data)
+            outputs = writer.close()
+        except BaseException:
+            writer.abort()
+            raise
         
-        return results
+        for sheet_type, paths in outputs.items():
+            print(f"  {sheet_type}: {len(paths)} 个文件")
+        return outputs
     
     def get_processing_summary(self, results: Dict[str, List[str]]) -> Dict[str, int]:
         """
@@ -0,0 +1,393 @@
+"""
+按内容寻址的工作表缓存
+
+同一批原始工作簿经常要用不同的类型序列或输出格式反复处理，而每次处理的大部分时间都花在Excel解码上。
+启用缓存后，每个工作表解码得到的DataFrame以NumPy数组的形式保存在缓存目录中，之后再处理同一工作簿时
+直接读取，不再打开和解码Excel文件。
+
+- 键: 工作簿内容的SHA-256、工作表序号、读取方式（transfer按列裁剪读取，其他类型读取整张工作表）、
+  具体读取引擎及其版本、pandas版本。文件被移动、复制或重命名后仍然命中，内容变化后自动失效。
+- 格式: 每个工作表一个不压缩的 .npz 文件。数值列直接保存为数组；object列拆分为数值数组、
+  元素类型数组和字符串数组，不使用pickle，读取时还原为与解码结果相同的Python对象。
+  含有其他类型单元格（如日期）的工作表不缓存。
+- 淘汰: 命中时更新条目的修改时间，缓存目录超出大小上限时，按修改时间删除最久未使用的条目，
+  直到低于上限的 1 - RESCAN_FRACTION。每个进程只在第一次写入时扫描缓存目录，之后累加写入的字节数
+  估计目录大小，估计值超出上限、或上次扫描后写入的字节数超过上限的RESCAN_FRACTION（其他进程也可能写入）
+  时才重新扫描，每次扫描之间至少写入上限的RESCAN_FRACTION。
+  多个进程可以共用同一个缓存目录，条目先写入临时文件再重命名。
+"""
+
+import os
+import json
+import hashlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .manifest import content_hash
+from .readers import engine_version
+from .options import DEFAULT_CACHE_SIZE
+
+# 缓存格式版本，格式不兼容时递增，旧条目不会再被命中
+CACHE_VERSION = 1
+
+# 缓存条目的扩展名
+ENTRY_SUFFIX = '.npz'
+
+# 上次扫描后写入的字节数超过大小上限的这一比例时，重新扫描缓存目录；淘汰时删除到上限的 1 - RESCAN_FRACTION
+RESCAN_FRACTION = 0.1
+
+# object列中元素的类型编码
+_KIND_FLOAT = 0
+_KIND_INT = 1
+_KIND_BOOL = 2
+_KIND_STR = 3
+_KIND_NONE = 4
+
+_KINDS = {
+    float: _KIND_FLOAT, np.float64: _KIND_FLOAT, np.float32: _KIND_FLOAT,
+    int: _KIND_INT, np.int64: _KIND_INT, np.int32: _KIND_INT,
+    bool: _KIND_BOOL, np.bool_: _KIND_BOOL,
+    str: _KIND_STR,
+    type(None): _KIND_NONE,
+}
+
+# float64能精确表示的最大整数
+_MAX_EXACT_INT = 2 ** 53
+
+# 进程内的文件内容哈希缓存，键为 (路径, 大小, 修改时间)，同一工作簿的多个工作表只计算一次哈希
+_CONTENT_HASHES: Dict[Tuple[str, int, int], str] = {}
+_MAX_CONTENT_HASHES = 256
+
+# 进程内共用的SheetCache，键为 (缓存目录的绝对路径, 大小上限)，同一进程处理的所有工作簿共用目录大小的估计值
+_SHARED_CACHES: Dict[Tuple[str, Optional[float]], 'SheetCache'] = {}
+
+
+def workbook_hash(file_path: str) -> str:
+    """
+    返回工作簿内容的SHA-256，文件大小和修改时间不变时复用进程内已计算的结果
+
+    Args:
+        file_path: Excel文件路径
+
+    Returns:
+        十六进制哈希字符串
+    """
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    digest = _CONTENT_HASHES.get(key)
+    if digest is None:
+        if len(_CONTENT_HASHES) >= _MAX_CONTENT_HASHES:
+            _CONTENT_HASHES.clear()
+        digest = _CONTENT_HASHES[key] = content_hash(file_path)
+    return digest
+
+
+def check_cache_size(cache_size: Optional[float]) -> None:
+    """
+    检查缓存大小上限
+
+    Args:
+        cache_size: 大小上限（MB），None表示使用默认值
+    """
+    if cache_size is not None and not cache_size > 0:
+        raise ValueError(f"缓存大小上限必须为正数（MB），而不是 {cache_size}")
+
+
+def _encode_objects(values: Sequence[object]) -> Optional[Dict[str, np.ndarray]]:
+    """
+    把Python对象序列拆分为数值数组、类型数组和字符串数组
+
+    Args:
+        values: 对象序列（object列的值或列名）
+
+    Returns:
+        包含numbers、kinds、texts三个数组的字典；含有无法编码的对象时返回None
+    """
+    values = np.asarray(values, dtype=object)
+    kinds = np.fromiter((_KINDS.get(type(value), -1) for value in values), dtype=np.int8, count=len(values))
+    if (kinds < 0).any():
+        return None
+
+    numbers = np.full(len(values), np.nan)
+    numeric = kinds <= _KIND_BOOL
+    numbers[numeric] = values[numeric].astype(np.float64)
+    if (np.abs(numbers[kinds == _KIND_INT]) > _MAX_EXACT_INT).any():
+        return None
+
+    texts = values[kinds == _KIND_STR].tolist()
+    # NumPy的字符串数组会去掉末尾的空字符
+    if any(text.endswith('\x00') for text in texts):
+        return None
+    return {"numbers": numbers, "kinds": kinds, "texts": np.array(texts, dtype=str)}
+
+
+def _decode_objects(numbers: np.ndarray, kinds: np.ndarray, texts: np.ndarray) -> np.ndarray:
+    """
+    还原_encode_objects拆分的对象序列
+
+    Returns:
+        object数组，元素为Python的float、int、bool、str或None
+    """
+    values = numbers.astype(object)
+    for kind, dtype in ((_KIND_INT, np.int64), (_KIND_BOOL, np.bool_)):
+        mask = kinds == kind
+        if mask.any():
+            values[mask] = numbers[mask].astype(dtype).astype(object)
+    values[kinds == _KIND_STR] = texts.tolist()
+    values[kinds == _KIND_NONE] = None
+    return values
+
+
+def encode_frame(frame: pd.DataFrame) -> Optional[Dict[str, np.ndarray]]:
+    """
+    把解码得到的工作表数据转换为可以用np.savez保存的数组
+
+    Args:
+        frame: 工作表数据，行索引为从0开始的RangeIndex
+
+    Returns:
+        数组名到数组的字典；行索引、列类型或单元格类型无法精确还原时返回None（不缓存）
+    """
+    if not isinstance(frame.index, pd.RangeIndex) or frame.index.start != 0 or frame.index.step != 1:
+        return None
+
+    labels = _encode_objects(list(frame.columns))
+    if labels is None:
+        return None
+    arrays = {f"labels_{name}": array for name, array in labels.items()}
+
+    dtypes = []
+    for i in range(frame.shape[1]):
+        column = frame.iloc[:, i]
+        dtype = column.dtype
+        if dtype.kind in 'biuf' and not isinstance(dtype, pd.api.extensions.ExtensionDtype):
+            arrays[f"c{i}"] = column.to_numpy()
+        elif dtype == object or isinstance(dtype, pd.StringDtype):
+            encoded = _encode_objects(column.to_numpy(dtype=object))
+            if encoded is None:
+                return None
+            arrays.update({f"c{i}_{name}": array for name, array in encoded.items()})
+        else:
+            return None
+        dtypes.append(str(dtype))
+
+    meta = {"version": CACHE_VERSION, "rows": len(frame), "dtypes": dtypes,
+            "columns_dtype": str(frame.columns.dtype), "columns_range": isinstance(frame.columns, pd.RangeIndex)}
+    arrays["meta"] = np.array(json.dumps(meta))
+    return arrays
+
+
+def decode_frame(arrays: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    还原encode_frame转换的工作表数据
+
+    Args:
+        arrays: encode_frame返回的数组（或从 .npz 文件读取的数组）
+
+    Returns:
+        与缓存前相同的DataFrame
+    """
+    meta = json.loads(str(arrays["meta"]))
+    labels = _decode_objects(arrays["labels_numbers"], arrays["labels_kinds"], arrays["labels_texts"])
+
+    columns = {}
+    for i, dtype in enumerate(meta["dtypes"]):
+        if f"c{i}" in arrays:
+            columns[i] = arrays[f"c{i}"]
+            continue
+        values = _decode_objects(arrays[f"c{i}_numbers"], arrays[f"c{i}_kinds"], arrays[f"c{i}_texts"])
+        columns[i] = pd.Series(values, dtype=object) if dtype == 'object' else pd.Series(values).astype(dtype)
+
+    frame = pd.DataFrame(columns, index=pd.RangeIndex(meta["rows"]))
+    if meta["columns_range"]:
+        frame.columns = pd.RangeIndex(len(labels))
+    else:
+        frame.columns = pd.Index(labels, dtype=object).astype(meta["columns_dtype"])
+    return frame
+
+
+def shared_cache(directory: str, max_size: Optional[float] = None) -> 'SheetCache':
+    """
+    返回进程内共用的SheetCache，同一缓存目录和大小上限只创建一次
+
+    Args:
+        directory: 缓存目录
+        max_size: 大小上限（MB），None表示使用默认值
+
+    Returns:
+        SheetCache实例
+    """
+    key = (os.path.abspath(directory), max_size)
+    cache = _SHARED_CACHES.get(key)
+    if cache is None:
+        cache = _SHARED_CACHES[key] = SheetCache(directory, max_size)
+    return cache
+
+
+class SheetCache:
+    """
+    保存在磁盘上的工作表缓存，按最近使用时间淘汰
+    """
+
+    def __init__(self, directory: str, max_size: Optional[float] = None):
+        """
+        初始化SheetCache类
+
+        Args:
+            directory: 缓存目录，不存在时创建
+            max_size: 缓存目录的大小上限（MB），默认为None（DEFAULT_CACHE_SIZE）
+        """
+        check_cache_size(max_size)
+        if max_size is None:
+            max_size = DEFAULT_CACHE_SIZE
+        self.directory = directory
+        self.max_bytes = int(max_size * 1024 * 1024)
+        os.makedirs(directory, exist_ok=True)
+        # 缓存目录总大小的估计值（第一次写入时扫描得到），以及上次扫描后本实例写入的字节数
+        self._size: Optional[int] = None
+        self._written = 0
+
+    def entry_path(self, file_path: str, sheet_index: int, layout: str, engine: str) -> str:
+        """
+        返回工作表对应的缓存条目路径
+
+        Args:
+            file_path: Excel文件路径
+            sheet_index: 工作表序号（从1开始）
+            layout: 读取方式，'transfer'（按列裁剪读取）或'full'（整张工作表）
+            engine: 具体读取引擎（不能是'auto'）
+
+        Returns:
+            缓存条目的路径
+        """
+        key = json.dumps([CACHE_VERSION, workbook_hash(file_path), sheet_index, layout,
+                          engine_version(engine), pd.__version__])
+        return os.path.join(self.directory, hashlib.sha256(key.encode('utf-8')).hexdigest() + ENTRY_SUFFIX)
+
+    def load(self, file_path: str, sheet_index: int, layout: str, engine: str) -> Optional[pd.DataFrame]:
+        """
+        读取缓存的工作表数据，命中时更新条目的最近使用时间
+
+        Returns:
+            工作表数据；未命中或条目损坏时返回None（损坏的条目会被删除）
+        """
+        path = self.entry_path(file_path, sheet_index, layout, engine)
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                frame = decode_frame({name: entry[name] for name in entry.files})
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return frame
+
+    def store(self, file_path: str, sheet_index: int, layout: str, engine: str, frame: pd.DataFrame) -> bool:
+        """
+        把工作表数据写入缓存，估计的目录大小超出上限时淘汰最久未使用的条目
+
+        Returns:
+            是否写入了缓存（工作表含有无法缓存的单元格类型时为False）
+        """
+        arrays = encode_frame(frame)
+        if arrays is None:
+            return False
+
+        path = self.entry_path(file_path, sheet_index, layout, engine)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            # 长时间运行的进程中缓存目录可能已被删除
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **arrays)
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self._remove(tmp_path)
+            print(f"  写入工作表缓存失败: {str(e)}")
+            return False
+
+        if self._size is None:
+            # 第一次写入：扫描得到的大小已包含新条目
+            self._size = self.size()
+        else:
+            self._size += size
+        self._written += size
+        if self._size > self.max_bytes or self._written > self.max_bytes * RESCAN_FRACTION:
+            self.evict()
+        return True
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """
+        列出缓存目录中的条目
+
+        Returns:
+            (最近使用时间, 大小, 路径) 元组列表，按最近使用时间从早到晚排序
+        """
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for item in scan:
+                if not item.name.endswith(ENTRY_SUFFIX):
+                    continue
+                try:
+                    stat = item.stat()
+                except FileNotFoundError:
+                    # 已被其他进程淘汰
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, item.path))
+        entries.sort()
+        return entries
+
+    def size(self) -> int:
+        """返回所有缓存条目的总字节数"""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self) -> int:
+        """
+        扫描缓存目录，超出大小上限时删除最久未使用的条目，直到不超过上限的 1 - RESCAN_FRACTION，
+        并更新目录大小的估计值
+
+        Returns:
+            删除的条目数
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * (1 - RESCAN_FRACTION) if total > self.max_bytes else total
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        self._size = total
+        self._written = 0
+        return removed
+
+    def clear(self) -> int:
+        """
+        删除所有缓存条目
+
+        Returns:
+            删除的条目数
+        """
+        entries = self.entries()
+        for _, _, path in entries:
+            self._remove(path)
+        self._size = 0
+        self._written = 0
+        return len(entries)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        """删除文件，文件已不存在时忽略"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -8,10 +8,18 @@
 import os
 import sys
 import argparse
-from typing import List, Optional
+from typing import Any, Callable, List, Optional
 
-from .excel_processor import ExcelProcessor
-from .batch_processor import BatchExcelProcessor
+# 只导入不依赖pandas/numpy的模块，解析参数（包括 --help 和参数错误）时不加载处理模块，
+# 处理模块在各子命令函数中导入
+from .options import (READER_ENGINES, OUTPUT_FORMATS, TRANSIENT_ENGINES, NUMERIC_DTYPES, GRANULARITIES,
+                      CONSOLIDATED_FORMATS, DEFAULT_CHUNK_ROWS, DEFAULT_SETTLE_SECONDS, DEFAULT_POLL_INTERVAL,
+                      DEFAULT_SERVE_HOST, DEFAULT_SERVE_PORT, DEFAULT_MAX_QUEUED, DEFAULT_CACHE_SIZE,
+                      CSV_PRECISION_RANGE)
+from .scheduling import SCHEDULE_POLICIES, parse_memory_size
+from .pipeline import DEFAULT_QUEUE_SIZE, parse_stage_workers
+from .metrics import write_metrics
+from .compression import COMPRESSIONS, check_compression
 
 
 def process_single_file(args) -> None:
@@ -21,20 +29,39 @@ def process_single_file(args) -> None:
     Args:
         args: 命令行参数
     """
+    from .excel_processor import ExcelProcessor
+
     print(f"处理Excel文件: {args.file}")
     
     processor = ExcelProcessor(
         file_path=args.file,
         sheet_types=args.sheet_types.split(','),
-        output_prefix=args.output_prefix
+        output_prefix=args.output_prefix,
+        transient_engine=args.transient_engine,
+        engine=args.engine,
+        collect_metrics=bool(args.metrics),
+        dtype=args.dtype,
+        precision=args.precision,
+        compression=args.compress,
+        compression_level=args.compress_level,
+        cache_dir=args.cache,
+        cache_size=args.cache_size
     )
     
-    saved_files = processor.process_and_save()
+    saved_files = processor.process_and_save(
+        output_format=args.format,
+        parallel_sheets=args.parallel_sheets,
+        max_workers=args.workers
+    )
     
     print(f"成功处理Excel文件: {args.file}")
-    print(f"生成的CSV文件:")
+    print(f"生成的{args.format.upper()}文件:")
     for file in saved_files:
         print(f"  - {file}")
+    
+    if args.metrics:
+        count = write_metrics(args.metrics, saved_files.metrics)
+        print(f"已保存 {count} 条指标记录: {args.metrics}")
 
 
 def process_batch_files(args) -> None:
@@ -44,6 +71,8 @@ def process_batch_files(args) -> None:
     Args:
         args: 命令行参数
     """
+    from .batch_processor import BatchExcelProcessor
+
     print(f"批量处理目录: {args.directory}")
     print(f"文件匹配模式: {args.pattern}")
     
@@ -55,7 +84,16 @@ def process_batch_files(args) -> None:
         directory=args.directory,
         file_pattern=args.pattern,
         sheet_types=args.sheet_types.split(','),
-        output_prefix=args.output_prefix
+        output_prefix=args.output_prefix,
+        transient_engine=args.transient_engine,
+        engine=args.engine,
+        collect_metrics=bool(args.metrics),
+        dtype=args.dtype,
+        precision=args.precision,
+        compression=args.compress,
+        compression_level=args.compress_level,
+        cache_dir=args.cache,
+        cache_size=args.cache_size
     )
     
     # 获取Excel文件列表
@@ -66,11 +104,35 @@ def process_batch_files(args) -> None:
         print("未找到Excel文件，请确保目录中有匹配的文件")
         return
     
+    # 合并输出：整批只生成一个transfer表和一个transient表
+    if args.consolidate:
+        processor.process_consolidated(
+            output_dir=args.output_dir,
+            output_format=args.consolidate,
+            use_multiprocessing=args.multiprocessing,
+            max_workers=args.workers,
+            chunk_rows=args.chunk_rows
+        )
+        return
+    
     # 处理所有文件
     results = processor.process_all_files(
         output_dir=args.output_dir,
         use_multiprocessing=args.multiprocessing,
-        max_workers=args.workers
+        max_workers=args.workers,
+        chunksize=args.chunksize,
+        schedule=args.schedule,
+        granularity=args.granularity,
+        pipeline=args.pipeline,
+        stage_workers=parse_stage_workers(args.stage_workers) if args.stage_workers else None,
+        queue_size=args.queue_size,
+        memory_budget=args.memory_budget,
+        output_format=args.format,
+        incremental=args.incremental,
+        force=args.force,
+        hash_contents=args.hash,
+        checkpoint=True,
+        resume=args.resume
     )
     
     # 获取处理摘要
@@ -84,6 +146,200 @@ def process_batch_files(args) -> None:
     
     if args.output_dir:
         print(f"\n所有CSV文件已保存到目录: {args.output_dir}")
+    
+    if args.metrics:
+        count = write_metrics(args.metrics, processor.metrics)
+        print(f"已保存 {count} 条指标记录: {args.metrics}")
+
+
+def watch_folder(args) -> None:
+    """
+    监视目录，处理新的或修改过的Excel文件
+    
+    Args:
+        args: 命令行参数
+    """
+    from .batch_processor import BatchExcelProcessor
+    from .watcher import FolderWatcher
+    
+    processor = BatchExcelProcessor(
+        directory=args.directory,
+        file_pattern=args.pattern,
+        sheet_types=args.sheet_types.split(','),
+        output_prefix=args.output_prefix,
+        transient_engine=args.transient_engine,
+        engine=args.engine,
+        dtype=args.dtype,
+        precision=args.precision,
+        compression=args.compress,
+        compression_level=args.compress_level,
+        cache_dir=args.cache,
+        cache_size=args.cache_size
+    )
+    
+    watcher = FolderWatcher(
+        processor,
+        output_dir=args.output_dir,
+        output_format=args.format,
+        max_workers=args.workers,
+        settle=args.settle,
+        poll_interval=args.poll_interval,
+        backend='polling' if args.poll else 'auto',
+        hash_contents=args.hash
+    )
+    watcher.run()
+
+
+def serve(args) -> None:
+    """
+    启动本地处理服务
+    
+    Args:
+        args: 命令行参数
+    """
+    from .server import ProcessingServer
+    
+    server = ProcessingServer(
+        state_dir=args.state_dir,
+        host=args.host,
+        port=args.port,
+        socket_path=args.socket,
+        max_workers=args.workers,
+        max_queued=args.max_queued
+    )
+    server.serve_forever()
+
+
+def _argument_type(parse: Callable[[str], Any]) -> Callable[[str], Any]:
+    """
+    把抛出ValueError的解析函数包装为argparse的type，非法取值时给出用法错误而不是异常堆栈
+    
+    Args:
+        parse: 解析函数，非法取值时抛出ValueError
+        
+    Returns:
+        可用作add_argument type参数的函数
+    """
+    def convert(value: str) -> Any:
+        try:
+            return parse(value)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e))
+    convert.__name__ = parse.__name__
+    return convert
+
+
+def _parse_precision(value: str) -> int:
+    """
+    解析CSV浮点数的有效数字位数
+    
+    Args:
+        value: 命令行中的取值
+        
+    Returns:
+        有效数字位数
+    """
+    low, high = CSV_PRECISION_RANGE
+    try:
+        precision = int(value)
+    except ValueError:
+        raise ValueError(f"有效数字位数必须是整数，而不是 {value}")
+    if not low <= precision <= high:
+        raise ValueError(f"有效数字位数必须在 {low} 到 {high} 之间，而不是 {precision}")
+    return precision
+
+
+def _processing_options(output_prefix: str) -> argparse.ArgumentParser:
+    """
+    返回single、batch、watch子命令共用的处理选项，作为父解析器传给各子命令
+    
+    Args:
+        output_prefix: 输出文件前缀的默认值
+        
+    Returns:
+        不带帮助选项的参数解析器
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        '--sheet-types', '-t',
+        default='transfer,transient',
+        help='工作表类型序列，以逗号分隔，会循环应用到所有工作表。例如: transfer,transient 或 transient,transfer,transfer；auto只读取工作表开头几行自动识别类型'
+    )
+    parser.add_argument(
+        '--output-prefix', '-o',
+        default=output_prefix,
+        help='输出CSV文件的前缀名'
+    )
+    parser.add_argument(
+        '--format', '-f',
+        choices=OUTPUT_FORMATS,
+        default='csv',
+        help='输出格式：csv（默认）、parquet、feather（Arrow IPC）或hdf5，列式格式保留数据类型并压缩存储'
+    )
+    parser.add_argument(
+        '--engine', '-e',
+        choices=READER_ENGINES,
+        default='auto',
+        help='Excel读取引擎：auto按文件类型选择最快的可用引擎（默认），calamine需安装python-calamine，xlrd用于.xls，openpyxl以只读流式模式读取.xlsx'
+    )
+    parser.add_argument(
+        '--transient-engine',
+        choices=TRANSIENT_ENGINES,
+        default='numpy',
+        help='transient工作表的合并引擎：numpy为向量化实现（默认），pandas为逐列对循环的原有实现'
+    )
+    parser.add_argument(
+        '--dtype',
+        choices=NUMERIC_DTYPES,
+        default=None,
+        help='类型化模式：把输出数据一次转换为float64或float32数值列，写入更快、内存更少，非数值单元格转换为空值并打印警告；默认保持原样'
+    )
+    parser.add_argument(
+        '--precision',
+        type=_argument_type(_parse_precision),
+        default=None,
+        help='CSV中浮点数保留的有效数字位数（1~15，如6），数值数据整块格式化后写入，写入更快、文件更小；默认写出完整精度'
+    )
+    parser.add_argument(
+        '--compress',
+        choices=COMPRESSIONS,
+        default=None,
+        help='压缩CSV输出：gzip（.csv.gz）、zstd（.csv.zst，需安装zstandard）或xz（.csv.xz），在后台线程中压缩，不阻塞解析；默认不压缩'
+    )
+    parser.add_argument(
+        '--compress-level',
+        type=int,
+        default=None,
+        help='压缩级别，gzip为1~9（默认6），zstd为1~22（默认3），xz为0~9（默认6）'
+    )
+    parser.add_argument(
+        '--cache',
+        default=None,
+        help='工作表缓存目录：解码得到的工作表按工作簿内容哈希保存在其中，之后用其他类型序列或输出格式处理同一工作簿时不再解码Excel；默认不缓存'
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=_argument_type(parse_memory_size),
+        default=None,
+        help=f'工作表缓存目录的大小上限，如 "512M"、"4G"（不带单位时按MB计），超出时删除最久未使用的条目，默认为{DEFAULT_CACHE_SIZE}M'
+    )
+    return parser
+
+
+def _metrics_option() -> argparse.ArgumentParser:
+    """
+    返回single、batch子命令共用的指标选项
+    
+    Returns:
+        不带帮助选项的参数解析器
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        '--metrics',
+        default=None,
+        help='记录打开、解析、转换、写入各阶段的耗时、CPU时间、行数和字节数，以JSON Lines格式保存到指定文件'
+    )
+    return parser
 
 
 def main(args: Optional[List[str]] = None) -> int:
@@ -101,39 +357,34 @@ def main(args: Optional[List[str]] = None) -> int:
     )
     
     subparsers = parser.add_subparsers(dest='command', help='子命令')
+    batch_options = _processing_options('batch_output')
+    metrics_option = _metrics_option()
     
     # 单文件处理子命令
-    single_parser = subparsers.add_parser('single', help='处理单个Excel文件')
+    single_parser = subparsers.add_parser('single', help='处理单个Excel文件',
+                                          parents=[_processing_options('output'), metrics_option])
     single_parser.add_argument('file', help='Excel文件路径')
     single_parser.add_argument(
-        '--sheet-types', '-t', 
-        default='transfer,transient',
-        help='工作表类型序列，以逗号分隔，会循环应用到所有工作表。例如: transfer,transient 或 transient,transfer,transfer'
+        '--parallel-sheets',
+        action='store_true',
+        help='把工作表分发到多个进程并行处理，适用于包含大量工作表的大文件'
     )
     single_parser.add_argument(
-        '--output-prefix', '-o',
-        default='output',
-        help='输出CSV文件的前缀名'
+        '--workers', '-w',
+        type=int,
+        default=None,
+        help='并行处理工作表时的最大工作进程数，默认为None（使用所有可用CPU核心）'
     )
     
     # 批量处理子命令
-    batch_parser = subparsers.add_parser('batch', help='批量处理Excel文件')
+    batch_parser = subparsers.add_parser('batch', help='批量处理Excel文件',
+                                         parents=[batch_options, metrics_option])
     batch_parser.add_argument('directory', help='包含Excel文件的目录路径')
     batch_parser.add_argument(
         '--pattern', '-p',
         default='*.xls',
         help='文件匹配模式，默认为"*.xls"'
     )
-    batch_parser.add_argument(
-        '--sheet-types', '-t',
-        default='transfer,transient',
-        help='工作表类型序列，以逗号分隔，会循环应用到所有工作表。例如: transfer,transient'
-    )
-    batch_parser.add_argument(
-        '--output-prefix', '-o',
-        default='batch_output',
-        help='输出CSV文件的前缀名'
-    )
     batch_parser.add_argument(
         '--output-dir', '-d',
         help='输出目录，如果不指定则使用当前目录'
@@ -149,15 +400,190 @@ def main(args: Optional[List[str]] = None) -> int:
         default=None,
         help='最大工作进程数，默认为None（使用所有可用CPU核心）'
     )
+    batch_parser.add_argument(
+        '--chunksize',
+        type=int,
+        default=None,
+        help='多进程处理时每次发送给工作进程的文件数，默认按文件数和进程数自动确定'
+    )
+    batch_parser.add_argument(
+        '--schedule',
+        choices=SCHEDULE_POLICIES,
+        default='natural',
+        help='调度策略：natural按自然排序（默认），largest-first按文件大小从大到小，cost-model按学习到的耗时从长到短；只影响处理顺序，不影响输出文件名'
+    )
+    batch_parser.add_argument(
+        '--memory-budget',
+        type=_argument_type(parse_memory_size),
+        default=None,
+        help='多进程处理时的内存预算，如 4096（MB）、8G；按文件大小和工作表类型估计内存占用，估计总量超出预算时暂缓提交新文件，超出预算的大文件单独处理'
+    )
+    batch_parser.add_argument(
+        '--granularity',
+        choices=GRANULARITIES,
+        default='file',
+        help='多进程处理的任务粒度：file为每个文件一个任务（默认），sheet把所有文件的工作表分发到同一个进程池，适合少数包含大量工作表的大文件'
+    )
+    batch_parser.add_argument(
+        '--pipeline',
+        action='store_true',
+        help='流水线模式：读取、转换、写入三个阶段各由一组线程执行并通过有界队列连接，结束后报告各阶段利用率；不能与-m同时使用'
+    )
+    batch_parser.add_argument(
+        '--stage-workers',
+        default=None,
+        help='流水线各阶段的线程数，格式为"读取,转换,写入"，默认为"2,1,2"'
+    )
+    batch_parser.add_argument(
+        '--queue-size',
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        help=f'流水线阶段之间每个队列最多容纳的工作表数，默认为{DEFAULT_QUEUE_SIZE}'
+    )
+    batch_parser.add_argument(
+        '--consolidate',
+        nargs='?',
+        const='parquet',
+        default=None,
+        choices=CONSOLIDATED_FORMATS,
+        help='合并输出：整批只生成一个transfer表和一个transient表（长格式，带file_index、source_file、sheet_index、sheet_name列），按块增量写入；格式为parquet（默认，分块数据集目录）或csv'
+    )
+    batch_parser.add_argument(
+        '--chunk-rows',
+        type=int,
+        default=DEFAULT_CHUNK_ROWS,
+        help=f'合并输出时每块的行数，默认为{DEFAULT_CHUNK_ROWS}'
+    )
+    batch_parser.add_argument(
+        '--incremental', '-i',
+        action='store_true',
+        help='增量模式：只处理新增或修改过的文件，处理记录保存在输出目录的 .oect_manifest.json 中'
+    )
+    batch_parser.add_argument(
+        '--force',
+        action='store_true',
+        help='增量模式下强制重新处理所有文件'
+    )
+    batch_parser.add_argument(
+        '--hash',
+        action='store_true',
+        help='增量模式下记录并比较文件内容哈希，修改时间变化但内容相同的文件不会被重新处理'
+    )
+    batch_parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='从上次被中断的运行继续，跳过已完整处理且之后没有修改过的工作簿（检查点保存在输出目录的 .oect_checkpoint-*.jsonl 中）'
+    )
+    
+    # 监视目录子命令
+    watch_parser = subparsers.add_parser('watch', help='监视目录，新的Excel文件写入完成后立即处理',
+                                         parents=[batch_options])
+    watch_parser.add_argument('directory', help='要监视的目录路径')
+    watch_parser.add_argument(
+        '--pattern', '-p',
+        default='*.xls',
+        help='文件匹配模式，默认为"*.xls"'
+    )
+    watch_parser.add_argument(
+        '--output-dir', '-d',
+        help='输出目录，如果不指定则使用当前目录；处理记录保存在其中的 .oect_manifest.json 中'
+    )
+    watch_parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=None,
+        help='常驻进程池的工作进程数，默认为None（使用所有可用CPU核心）'
+    )
+    watch_parser.add_argument(
+        '--settle',
+        type=float,
+        default=DEFAULT_SETTLE_SECONDS,
+        help=f'文件大小和修改时间保持不变多少秒后视为写入完成，默认为{DEFAULT_SETTLE_SECONDS:g}'
+    )
+    watch_parser.add_argument(
+        '--poll',
+        action='store_true',
+        help='定期轮询目录而不使用文件事件（未安装watchdog时自动轮询）；监视网络共享目录时使用'
+    )
+    watch_parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help=f'轮询间隔（秒），默认为{DEFAULT_POLL_INTERVAL:g}'
+    )
+    watch_parser.add_argument(
+        '--hash',
+        action='store_true',
+        help='记录并比较文件内容哈希，修改时间变化但内容相同的文件不会被重新处理'
+    )
+    
+    # 处理服务子命令
+    serve_parser = subparsers.add_parser('serve', help='启动本地处理服务，通过HTTP接口提交任务，多个客户端共用常驻进程池')
+    serve_parser.add_argument(
+        '--host',
+        default=DEFAULT_SERVE_HOST,
+        help=f'监听的地址，默认为{DEFAULT_SERVE_HOST}（只接受本机连接）'
+    )
+    serve_parser.add_argument(
+        '--port',
+        type=int,
+        default=DEFAULT_SERVE_PORT,
+        help=f'监听的端口，默认为{DEFAULT_SERVE_PORT}'
+    )
+    serve_parser.add_argument(
+        '--socket',
+        default=None,
+        help='监听Unix套接字而不是TCP端口，指定套接字文件路径'
+    )
+    serve_parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=None,
+        help='常驻进程池的工作进程数，即同时处理的最大任务数，默认为None（使用所有可用CPU核心）'
+    )
+    serve_parser.add_argument(
+        '--state-dir',
+        default='.oect_server',
+        help='状态目录，任务队列保存在其中的 jobs.json 中，服务重启后继续处理未完成的任务；默认为当前目录下的 .oect_server'
+    )
+    serve_parser.add_argument(
+        '--max-queued',
+        type=int,
+        default=DEFAULT_MAX_QUEUED,
+        help=f'最多排队的任务数，超出时拒绝新任务，默认为{DEFAULT_MAX_QUEUED}'
+    )
     
     # 解析命令行参数
     parsed_args = parser.parse_args(args)
+    if parsed_args.command in ('single', 'batch', 'watch'):
+        # 压缩级别的范围取决于压缩方式，解析完所有参数后再验证
+        try:
+            check_compression(parsed_args.compress, parsed_args.compress_level)
+        except (ValueError, ImportError) as e:
+            subparsers.choices[parsed_args.command].error(str(e))
+    if parsed_args.command == 'batch' and parsed_args.consolidate:
+        # 合并输出有自己的格式，且每次都重新生成整个表
+        ignored = [option for option, used in (
+            ('--format', parsed_args.format != 'csv'),
+            ('--precision', parsed_args.precision is not None),
+            ('--compress', parsed_args.compress is not None),
+            ('--compress-level', parsed_args.compress_level is not None),
+            ('--metrics', parsed_args.metrics is not None),
+            ('--incremental', parsed_args.incremental),
+            ('--resume', parsed_args.resume),
+        ) if used]
+        if ignored:
+            batch_parser.error(f"--consolidate 不能与 {'、'.join(ignored)} 一起使用")
     
     # 执行相应的命令
     if parsed_args.command == 'single':
         process_single_file(parsed_args)
     elif parsed_args.command == 'batch':
         process_batch_files(parsed_args)
+    elif parsed_args.command == 'watch':
+        watch_folder(parsed_args)
+    elif parsed_args.command == 'serve':
+        serve(parsed_args)
     else:
         parser.print_help()
         return 1
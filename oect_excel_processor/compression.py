@@ -0,0 +1,224 @@
+"""
+CSV输出的压缩
+
+支持的压缩方式：
+- gzip: 标准库实现，扩展名 .csv.gz
+- zstd: 压缩和解压都很快，需要 zstandard，扩展名 .csv.zst
+- xz: 标准库实现，压缩率最高但最慢，扩展名 .csv.xz
+
+压缩在后台线程中进行（各压缩库在压缩时都会释放GIL），处理器把工作表渲染为CSV文本后
+立即继续解析下一个工作表；磁盘上只写入压缩后的文件，不会先写出未压缩的CSV。
+"""
+
+import os
+import gzip
+import lzma
+import threading
+import importlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, List, Optional
+
+from .metrics import measure
+
+
+# 可选的压缩方式
+COMPRESSIONS = ('gzip', 'zstd', 'xz')
+
+# 每种压缩方式追加的扩展名
+COMPRESSION_EXTENSIONS = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+    'xz': '.xz',
+}
+
+# 每种压缩方式的级别范围和默认级别（最小, 最大, 默认）
+COMPRESSION_LEVELS = {
+    'gzip': (1, 9, 6),
+    'zstd': (1, 22, 3),
+    'xz': (0, 9, 6),
+}
+
+# 需要额外安装的压缩依赖（模块名, pip包名）
+_COMPRESSION_DEPENDENCIES = {
+    'zstd': ('zstandard', 'zstandard'),
+}
+
+# 每个处理器的后台压缩线程数
+COMPRESS_THREADS = 2
+
+# 等待压缩的工作表数上限，达到后渲染下一个工作表前先等待，限制内存占用
+MAX_PENDING = 4
+
+
+def check_compression(compression: Optional[str], level: Optional[int] = None) -> None:
+    """
+    验证压缩方式和级别，并检查其依赖是否已安装
+
+    Args:
+        compression: 压缩方式，None表示不压缩
+        level: 压缩级别，None表示使用默认级别
+    """
+    if compression is None:
+        if level is not None:
+            raise ValueError("指定压缩级别时必须同时指定压缩方式")
+        return
+
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"压缩方式必须是 {COMPRESSIONS} 之一，而不是 {compression}")
+
+    low, high, _ = COMPRESSION_LEVELS[compression]
+    if level is not None and not low <= level <= high:
+        raise ValueError(f"{compression} 的压缩级别必须在 {low} 到 {high} 之间，而不是 {level}")
+
+    if compression in _COMPRESSION_DEPENDENCIES:
+        module, package = _COMPRESSION_DEPENDENCIES[compression]
+        if importlib.util.find_spec(module) is None:
+            raise ImportError(f"压缩方式 {compression} 需要 {package}，请先安装: pip install {package}")
+
+
+def compressed_path(path: str, compression: Optional[str]) -> str:
+    """
+    返回压缩后的文件路径，如 output-1-transfer.csv → output-1-transfer.csv.gz
+
+    Args:
+        path: 未压缩的文件路径
+        compression: 压缩方式，None表示不压缩
+
+    Returns:
+        压缩后的文件路径
+    """
+    if compression is None:
+        return path
+    return f"{path}{COMPRESSION_EXTENSIONS[compression]}"
+
+
+def compress_bytes(data: bytes, compression: str, level: Optional[int] = None) -> bytes:
+    """
+    压缩数据
+
+    Args:
+        data: 原始数据
+        compression: 压缩方式
+        level: 压缩级别，None表示使用默认级别
+
+    Returns:
+        压缩后的数据
+    """
+    if level is None:
+        level = COMPRESSION_LEVELS[compression][2]
+
+    if compression == 'gzip':
+        # 不记录修改时间，相同内容得到相同的压缩文件
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if compression == 'xz':
+        return lzma.compress(data, preset=level)
+
+    zstandard = importlib.import_module('zstandard')
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def write_compressed(data: bytes, path: str, compression: str, level: Optional[int] = None) -> int:
+    """
+    压缩数据并写入文件，先写入临时文件再重命名
+
+    Args:
+        data: 原始数据
+        path: 压缩后的文件路径
+        compression: 压缩方式
+        level: 压缩级别
+
+    Returns:
+        压缩后的字节数
+    """
+    compressed = compress_bytes(data, compression, level)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return len(compressed)
+
+
+class CompressionStage:
+    """
+    在后台线程中压缩并写入输出文件
+
+    submit立即返回最终的文件路径，close等待所有文件写入完成，任一文件失败时抛出其异常。
+    """
+
+    def __init__(self, compression: str, level: Optional[int] = None,
+                 metrics: Optional[List[Dict[str, object]]] = None,
+                 threads: int = COMPRESS_THREADS, max_pending: int = MAX_PENDING):
+        """
+        初始化CompressionStage类
+
+        Args:
+            compression: 压缩方式
+            level: 压缩级别，None表示使用默认级别
+            metrics: 指标记录列表，启用时为每个文件记录compress阶段
+            threads: 压缩线程数
+            max_pending: 同时等待压缩的文件数上限
+        """
+        self.compression = compression
+        self.level = level
+        self.metrics = metrics
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="oect-compress")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._futures: List[Future] = []
+
+    def _compress(self, data: bytes, path: str, fields: Dict[str, object]) -> None:
+        """压缩线程中执行的任务"""
+        try:
+            with measure(self.metrics, 'compress', **fields) as entry:
+                size = write_compressed(data, path, self.compression, self.level)
+            if entry is not None:
+                entry["bytes"] = size
+        finally:
+            self._slots.release()
+
+    def submit(self, data: bytes, path: str, **fields: object) -> str:
+        """
+        提交一个文件，等待压缩的文件已达上限时先等待
+
+        Args:
+            data: 未压缩的CSV文本
+            path: 未压缩时的文件路径
+            **fields: 指标记录中的其他字段，如file、sheet_index、rows
+
+        Returns:
+            压缩后的文件路径（可能尚未写入完成）
+        """
+        target = compressed_path(path, self.compression)
+        self._slots.acquire()
+        try:
+            self._futures.append(self._executor.submit(self._compress, data, target, fields))
+        except BaseException:
+            self._slots.release()
+            raise
+        return target
+
+    def close(self, cancel: bool = False) -> None:
+        """
+        等待所有文件写入完成并结束压缩线程
+
+        Args:
+            cancel: 为True时取消尚未开始的任务并忽略错误（处理已经出错时使用）
+        """
+        if cancel:
+            for future in self._futures:
+                future.cancel()
+        self._executor.shutdown(wait=True)
+
+        futures, self._futures = self._futures, []
+        if cancel:
+            return
+        for future in futures:
+            future.result()
+
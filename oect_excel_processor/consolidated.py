@@ -0,0 +1,206 @@
+"""
+批处理的合并输出：整批文件只生成一个transfer表和一个transient表
+
+两个表都是长格式，在数据列之前加上标识列：
+- file_index: 文件在自然排序中的序号（从1开始）
+- source_file: 源文件名
+- sheet_index: 工作表序号（从1开始）
+- sheet_name: 工作表名称
+
+每个表的字段由该类型的第一个工作表确定：之后字段名不同但字段数相同的工作表按位置对应到这些字段
+（并打印警告），字段数不同时抛出ValueError，不会丢弃任何数据。
+
+数据按块增量写入，内存中最多缓存每种类型 chunk_rows 行：
+- parquet（推荐）: 每个表是一个目录，每块写为一个 part-XXXXX.parquet 文件，
+  可以用 pd.read_parquet(目录) 或 pyarrow.dataset 整体读取。所有分块使用同一个schema：
+  数据列都是float64，非数值单元格转换为空值并打印警告
+- csv: 每个表是一个CSV文件，逐块追加，全部写完后再重命名为最终文件名
+"""
+
+import os
+import glob
+from typing import Dict, List
+
+import pandas as pd
+
+from .excel_processor import to_numeric_frame
+from .writers import check_output_format, output_path, unique_column_names
+from .options import CONSOLIDATED_FORMATS, DEFAULT_CHUNK_ROWS
+
+# 合并表中的标识列
+ID_COLUMNS = ('file_index', 'source_file', 'sheet_index', 'sheet_name')
+
+
+class ConsolidatedWriter:
+    """
+    按工作表类型把各工作表的数据追加到合并表中
+    """
+
+    def __init__(self, prefix: str, output_format: str = 'parquet', chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        """
+        初始化ConsolidatedWriter类
+
+        Args:
+            prefix: 输出路径前缀，表名为 {prefix}-transfer 和 {prefix}-transient
+            output_format: 'parquet'（默认）或'csv'
+            chunk_rows: 每种类型在内存中最多缓存的行数，达到后写出一块
+        """
+        if output_format not in CONSOLIDATED_FORMATS:
+            raise ValueError(f"合并输出的格式必须是 {CONSOLIDATED_FORMATS} 之一，而不是 {output_format}")
+        check_output_format(output_format)
+        if chunk_rows < 1:
+            raise ValueError(f"每块行数必须是正整数，而不是 {chunk_rows}")
+
+        self.prefix = prefix
+        self.output_format = output_format
+        self.chunk_rows = chunk_rows
+        self._buffers: Dict[str, List[pd.DataFrame]] = {}
+        self._buffered_rows: Dict[str, int] = {}
+        self._outputs: Dict[str, List[str]] = {}
+        self._columns: Dict[str, List[str]] = {}
+        self._csv_handles: Dict[str, object] = {}
+
+    def _table_path(self, sheet_type: str) -> str:
+        """返回某种类型的合并表路径：parquet为目录，csv为文件"""
+        if self.output_format == 'parquet':
+            return f"{self.prefix}-{sheet_type}"
+        return output_path(f"{self.prefix}-{sheet_type}", self.output_format)
+
+    def add(self, file_index: int, source_file: str, sheet_index: int, sheet_name: str, sheet_type: str,
+            frame: pd.DataFrame) -> None:
+        """
+        追加一个工作表的处理结果
+
+        Args:
+            file_index: 文件序号
+            source_file: 源文件路径，表中只记录文件名
+            sheet_index: 工作表序号
+            sheet_name: 工作表名称
+            sheet_type: 工作表类型
+            frame: 处理后的数据
+        """
+        data = self._conform(source_file, sheet_index, sheet_type, frame.reset_index(drop=True))
+        ids = pd.DataFrame({
+            'file_index': file_index,
+            'source_file': os.path.basename(source_file),
+            'sheet_index': sheet_index,
+            'sheet_name': sheet_name,
+        }, index=data.index)
+        self._buffers.setdefault(sheet_type, []).append(pd.concat([ids, data], axis=1))
+        self._buffered_rows[sheet_type] = self._buffered_rows.get(sheet_type, 0) + len(data)
+
+        if self._buffered_rows[sheet_type] >= self.chunk_rows:
+            self._flush(sheet_type)
+
+    def _conform(self, source_file: str, sheet_index: int, sheet_type: str, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        把工作表的数据列对应到合并表的字段，parquet输出时再转换为float64
+
+        Args:
+            source_file: 源文件路径
+            sheet_index: 工作表序号
+            sheet_type: 工作表类型
+            data: 处理后的数据
+
+        Returns:
+            字段名与合并表一致的数据
+        """
+        sheet = f"{os.path.basename(source_file)} 的第 {sheet_index} 个工作表"
+        names = unique_column_names(data)
+        columns = self._columns.setdefault(sheet_type, names)
+        if len(names) != len(columns):
+            raise ValueError(f"{sheet}有 {len(names)} 个字段 {names}，"
+                             f"与合并表 {sheet_type} 的 {len(columns)} 个字段 {columns} 不一致")
+        if names != columns:
+            print(f"警告: {sheet}的字段 {names} 与合并表 {sheet_type} 的字段 {columns} 不同，已按位置对应")
+        data.columns = columns
+
+        if self.output_format != 'parquet':
+            return data
+        data, count, examples = to_numeric_frame(data, 'float64')
+        if count:
+            details = "，".join(f"{column} 第{row}行 {value!r}" for column, row, value in examples)
+            more = " 等" if count > len(examples) else ""
+            print(f"警告: {sheet}有 {count} 个非数值单元格，已转换为空值: {details}{more}")
+        return data
+
+    def _schema(self, sheet_type: str):
+        """返回某种类型的合并表的Arrow schema，所有分块都转换为这个schema"""
+        import pyarrow as pa
+
+        return pa.schema([('file_index', pa.int64()), ('source_file', pa.string()),
+                          ('sheet_index', pa.int64()), ('sheet_name', pa.string())]
+                         + [(name, pa.float64()) for name in self._columns[sheet_type]])
+
+    def _write_part(self, chunk: pd.DataFrame, sheet_type: str, path: str) -> None:
+        """按固定的schema把一块数据写为Parquet文件，先写入临时文件再重命名"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(chunk, schema=self._schema(sheet_type), preserve_index=False)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            pq.write_table(table, tmp_path, compression='zstd')
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _flush(self, sheet_type: str) -> None:
+        """写出某种类型缓存的数据"""
+        frames = self._buffers.pop(sheet_type, [])
+        self._buffered_rows[sheet_type] = 0
+        if not frames:
+            return
+        chunk = pd.concat(frames, ignore_index=True)
+
+        if self.output_format == 'parquet':
+            directory = self._table_path(sheet_type)
+            if sheet_type not in self._outputs:
+                # 清除上次运行留下的分块
+                os.makedirs(directory, exist_ok=True)
+                for stale in glob.glob(os.path.join(directory, "part-*.parquet")):
+                    os.remove(stale)
+                self._outputs[sheet_type] = []
+            part = output_path(os.path.join(directory, f"part-{len(self._outputs[sheet_type]):05d}"), 'parquet')
+            self._write_part(chunk, sheet_type, part)
+            self._outputs[sheet_type].append(part)
+            return
+
+        # CSV：字段已在add中对应到第一个工作表的字段，先写入临时文件，close时再重命名
+        handle = self._csv_handles.get(sheet_type)
+        if handle is None:
+            handle = open(f"{self._table_path(sheet_type)}.{os.getpid()}.tmp", 'w', newline='')
+            self._csv_handles[sheet_type] = handle
+            chunk.to_csv(handle, index=False)
+        else:
+            chunk.to_csv(handle, index=False, header=False)
+
+    def close(self) -> Dict[str, List[str]]:
+        """
+        写出剩余的数据并完成所有表
+
+        Returns:
+            工作表类型到输出路径列表的字典：parquet为各分块文件，csv为单个文件
+        """
+        for sheet_type in list(self._buffers):
+            self._flush(sheet_type)
+
+        for sheet_type, handle in self._csv_handles.items():
+            tmp_path = handle.name
+            handle.close()
+            path = self._table_path(sheet_type)
+            os.replace(tmp_path, path)
+            self._outputs[sheet_type] = [path]
+        self._csv_handles = {}
+
+        return dict(self._outputs)
+
+    def abort(self) -> None:
+        """出错时关闭并删除未完成的CSV临时文件"""
+        for handle in self._csv_handles.values():
+            handle.close()
+            if os.path.exists(handle.name):
+                os.remove(handle.name)
+        self._csv_handles = {}
@@ -0,0 +1,107 @@
+"""
+工作表类型的自动识别（sheet_types中的'auto'）
+
+只读取工作表开头的几行（readers.read_preambles），根据第三行的字段名判断类型：
+- transient: 字段名严格按两列一组重复，如 Time(s), Id(A), Time(s), Id(A), ...；
+  只有一组时两列无法与其他布局区分，第一个字段名是时间（Time、t）时才识别为transient
+- transfer: 恰好四个互不相同的字段名，如 Vg(V), Id(A), Ig(A), Vd(V)
+
+识别只需比较一行字段名，开销远小于读取工作表开头，因此每个工作表都单独识别，不缓存结果。
+其他布局（如 Time, Id, Time, Id, Time 或两列的 Vg, Id）视为无法识别并报错，而不是按错误的类型处理。
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .readers import read_preambles
+
+# 识别时读取的行数：前两行为说明，第三行为字段名
+SNIFF_ROWS = 3
+
+# 字段名所在的行（从0开始）
+HEADER_ROW = SNIFF_ROWS - 1
+
+# transfer工作表的字段数
+TRANSFER_FIELDS = 4
+
+# 时间字段名：Time、time(s)、t、t(s) 等
+_TIME_NAME = re.compile(r'(time|t)(?![a-z])', re.IGNORECASE)
+
+
+def header_signature(preamble: List[List[object]]) -> Tuple[str, ...]:
+    """
+    返回工作表字段名行的签名：去掉末尾空单元格后各单元格的文本
+
+    Args:
+        preamble: 工作表开头几行的单元格值
+
+    Returns:
+        字段名元组，空单元格为空字符串
+    """
+    row = list(preamble[HEADER_ROW]) if len(preamble) > HEADER_ROW else []
+    while row and (row[-1] is None or str(row[-1]).strip() == ''):
+        row.pop()
+    return tuple('' if value is None else str(value).strip() for value in row)
+
+
+def _is_name(preamble: List[List[object]], column: int) -> bool:
+    """字段名行的某一列是否为非空的文本"""
+    row = preamble[HEADER_ROW]
+    return column < len(row) and isinstance(row[column], str) and row[column].strip() != ''
+
+
+def classify_preamble(preamble: List[List[object]]) -> Optional[str]:
+    """
+    根据工作表开头几行判断工作表类型
+
+    Args:
+        preamble: 工作表开头几行的单元格值
+
+    Returns:
+        'transfer'、'transient'，无法识别时返回None
+    """
+    names = header_signature(preamble)
+    if len(names) < 2 or not all(_is_name(preamble, column) for column in range(len(names))):
+        return None
+
+    # 字段名严格按两列一组重复，只有一组时还要求第一列是时间
+    if len(names) % 2 == 0 and names[0] != names[1] and all(
+            name == names[i % 2] for i, name in enumerate(names)):
+        if len(names) > 2 or _TIME_NAME.match(names[0]):
+            return 'transient'
+        return None
+
+    if len(names) == TRANSFER_FIELDS and len(set(names)) == TRANSFER_FIELDS:
+        return 'transfer'
+
+    return None
+
+
+def detect_sheet_types(file_path: str, sheet_names: List[str], engine: str = 'auto',
+                       excel_file: Optional[object] = None) -> Dict[str, str]:
+    """
+    识别工作表的类型，只读取每个工作表开头的几行
+
+    Args:
+        file_path: Excel文件路径
+        sheet_names: 要识别的工作表名称
+        engine: 读取引擎，无法直接读取文件开头时使用
+        excel_file: 已打开的工作簿（pd.ExcelFile），无法直接读取文件开头时复用
+
+    Returns:
+        工作表名称到类型的字典
+    """
+    if not sheet_names:
+        return {}
+
+    preambles = read_preambles(file_path, sheet_names, SNIFF_ROWS, engine, excel_file)
+    detected = {}
+    for name in sheet_names:
+        preamble = preambles[name]
+        sheet_type = classify_preamble(preamble)
+        if sheet_type is None:
+            signature = list(header_signature(preamble))
+            raise ValueError(f"无法识别工作表 {name} 的类型（第{HEADER_ROW + 1}行字段名: {signature}），"
+                             f"请在sheet_types中指定 'transfer' 或 'transient'")
+        detected[name] = sheet_type
+    return detected
@@ -1,7 +1,101 @@
 import os
+import time
+import threading
+import multiprocessing
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from typing import List, Tuple, Optional, Dict, Union
+from typing import List, Tuple, Optional, Dict, Union, Iterator, NamedTuple
+
+from .readers import open_workbook, resolve_engine, list_sheet_names, preload_engines
+from .writers import check_output_format, check_precision, write_frame, render_csv, output_path, preload_format
+from .compression import CompressionStage, check_compression
+from .metrics import measure, annotate_frame, collect_outputs
+from .detection import detect_sheet_types
+from .cache import SheetCache, check_cache_size, shared_cache
+from .options import SHEET_TYPES, TRANSIENT_ENGINES, NUMERIC_DTYPES
+
+
+# transfer工作表的布局：第三行为字段名，第四行开始为数据，只使用前四列
+TRANSFER_HEADER_ROW = 2
+TRANSFER_COLUMNS = 4
+
+# 报告非数值单元格时最多列出的示例数
+NON_NUMERIC_EXAMPLES = 5
+
+
+class SheetResult(NamedTuple):
+    """
+    单个工作表的处理结果（不写入磁盘）
+    
+    Attributes:
+        file_path: Excel文件路径
+        sheet_index: 工作表序号（从1开始）
+        sheet_name: 工作表名称
+        sheet_type: 工作表类型
+        columns: 字段名列表
+        data: 处理后的数据，DataFrame或NumPy数组
+    """
+    file_path: str
+    sheet_index: int
+    sheet_name: str
+    sheet_type: str
+    columns: List[str]
+    data: Union[pd.DataFrame, np.ndarray]
+
+
+def frame_to_numpy(frame: pd.DataFrame) -> np.ndarray:
+    """
+    把处理后的数据转换为NumPy数组
+    
+    能转换为数值时返回float64数组（空单元格为NaN），含有无法转换的文本时返回object数组。
+    
+    Args:
+        frame: 处理后的DataFrame
+        
+    Returns:
+        二维数组
+    """
+    try:
+        return frame.to_numpy(dtype=np.float64, na_value=np.nan)
+    except (ValueError, TypeError):
+        return frame.to_numpy(dtype=object)
+
+
+def to_numeric_frame(frame: pd.DataFrame, dtype: str) -> Tuple[pd.DataFrame, int, List[Tuple[str, int, object]]]:
+    """
+    把处理后的数据一次转换为指定类型的连续数值列
+    
+    所有列写入同一个按列连续存储的二维数组，之后的切片、写入都直接在数值数组上进行。
+    无法解析为数值的单元格转换为NaN，并统计数量。
+    
+    Args:
+        frame: 处理后的DataFrame
+        dtype: 'float64'或'float32'
+        
+    Returns:
+        (转换后的DataFrame, 非数值单元格数量, 前几个非数值单元格的 (字段名, 数据行号, 原值) 列表) 元组，
+        数据行号从1开始
+    """
+    values = np.empty(frame.shape, dtype=dtype, order='F')
+    count = 0
+    examples = []
+    
+    for position in range(frame.shape[1]):
+        column = frame.iloc[:, position]
+        if pd.api.types.is_numeric_dtype(column.dtype) and not pd.api.types.is_bool_dtype(column.dtype):
+            values[:, position] = column.to_numpy(dtype=dtype, na_value=np.nan)
+            continue
+        
+        numeric = pd.to_numeric(column, errors='coerce')
+        invalid = np.flatnonzero(numeric.isna().to_numpy() & column.notna().to_numpy())
+        count += len(invalid)
+        for row in invalid[:NON_NUMERIC_EXAMPLES - len(examples)]:
+            examples.append((str(frame.columns[position]), int(row) + 1, column.iat[row]))
+        values[:, position] = numeric.to_numpy(dtype=dtype, na_value=np.nan)
+    
+    return pd.DataFrame(values, columns=frame.columns, copy=False), count, examples
 
 
 class ExcelProcessor:
@@ -12,34 +106,71 @@ class ExcelProcessor:
     2. transient类型：第三行前两列是字段名，数据按每两列一组排列，需要合并
     """
 
-    def __init__(self, file_path: str, sheet_types: List[str], output_prefix: str = "output"):
+    def __init__(self, file_path: str, sheet_types: List[str], output_prefix: str = "output",
+                 transient_engine: str = "numpy", engine: str = "auto", collect_metrics: bool = False,
+                 dtype: Optional[str] = None, precision: Optional[int] = None,
+                 compression: Optional[str] = None, compression_level: Optional[int] = None,
+                 cache_dir: Optional[str] = None, cache_size: Optional[float] = None):
         """
         初始化ExcelProcessor类
         
         Args:
             file_path: Excel文件路径
-            sheet_types: 工作表类型列表，每个元素为'transfer'或'transient'
+            sheet_types: 工作表类型列表，每个元素为'transfer'、'transient'或'auto'（只读取工作表开头几行自动识别）
             output_prefix: 输出CSV文件的前缀名
+            transient_engine: transient工作表的合并引擎，'numpy'（向量化，默认）或'pandas'（逐列对循环）
+            engine: Excel读取引擎，'auto'（默认，按文件类型选择最快的可用引擎）、
+                    'calamine'、'xlrd'或'openpyxl'
+            collect_metrics: 是否记录打开、解析、转换、写入各阶段的耗时、CPU时间、行数和字节数，
+                             启用后process_and_save返回的列表带有metrics属性（见metrics模块）
+            dtype: 类型化模式，'float64'或'float32'时把输出数据一次转换为该类型的数值列，
+                   非数值单元格转换为空值并打印警告；默认为None（保持原有的object类型）
+            precision: CSV中浮点数保留的有效数字位数（1~15），指定时数值数据整块格式化后分块写入，
+                       写入更快、文件更小；默认为None（按原样写出完整精度）。只用于CSV
+            compression: CSV输出的压缩方式，'gzip'、'zstd'或'xz'，输出文件名为 .csv.gz、.csv.zst、.csv.xz；
+                         压缩在后台线程中进行，不阻塞工作表的解析和转换。默认为None（不压缩）
+            compression_level: 压缩级别，默认为None（使用该压缩方式的默认级别）
+            cache_dir: 工作表缓存目录，指定时解码得到的工作表按工作簿内容哈希保存在其中，
+                       再次处理同一工作簿时直接读取，不再解码Excel（见cache模块）。默认为None（不缓存）
+            cache_size: 工作表缓存目录的大小上限（MB），超出时删除最久未使用的条目，默认为None（2048）
         """
         self.file_path = file_path
         self.sheet_types = sheet_types
         self.output_prefix = output_prefix
+        self.transient_engine = transient_engine
+        self.engine = engine
+        self.collect_metrics = collect_metrics
+        self.dtype = dtype
+        self.precision = precision
+        self.compression = compression
+        self.compression_level = compression_level
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        # 压缩输出时的后台压缩线程，第一次写入时创建
+        self._compression_stage: Optional[CompressionStage] = None
+        self._compression_lock = threading.Lock()
+        # 各阶段的指标记录，未启用指标收集时为None
+        self.metrics: Optional[List[Dict[str, object]]] = [] if collect_metrics else None
         self._validate_inputs()
+        # 工作表缓存，未指定缓存目录时为None
+        self._sheet_cache: Optional[SheetCache] = shared_cache(cache_dir, cache_size) if cache_dir else None
         
     @classmethod
-    def create(cls, file_path: str, sheet_types: List[str], output_prefix: str = "output") -> 'ExcelProcessor':
+    def create(cls, file_path: str, sheet_types: List[str], output_prefix: str = "output",
+               **options) -> 'ExcelProcessor':
         """
         类方法创建ExcelProcessor实例
         
         Args:
             file_path: Excel文件路径
-            sheet_types: 工作表类型列表，每个元素为'transfer'或'transient'
+            sheet_types: 工作表类型列表，每个元素为'transfer'、'transient'或'auto'（只读取工作表开头几行自动识别）
             output_prefix: 输出CSV文件的前缀名
+            **options: 其他处理选项，原样传给构造函数（如transient_engine、engine）
             
         Returns:
             ExcelProcessor实例
         """
-        return cls(file_path, sheet_types, output_prefix)
+        return cls(file_path, sheet_types, output_prefix, **options)
     
     def _validate_inputs(self) -> None:
         """验证输入参数的有效性"""
@@ -50,8 +181,40 @@ class ExcelProcessor:
             raise ValueError(f"文件必须是Excel格式 (.xls 或 .xlsx): {self.file_path}")
         
         for sheet_type in self.sheet_types:
-            if sheet_type not in ['transfer', 'transient']:
-                raise ValueError(f"工作表类型必须是 'transfer' 或 'transient'，而不是 {sheet_type}")
+            if sheet_type not in SHEET_TYPES:
+                raise ValueError(f"工作表类型必须是 {SHEET_TYPES} 之一，而不是 {sheet_type}")
+        
+        if self.transient_engine not in TRANSIENT_ENGINES:
+            raise ValueError(f"transient合并引擎必须是 {TRANSIENT_ENGINES} 之一，而不是 {self.transient_engine}")
+        
+        if self.dtype is not None and self.dtype not in NUMERIC_DTYPES:
+            raise ValueError(f"数值类型必须是 {NUMERIC_DTYPES} 之一，而不是 {self.dtype}")
+        
+        check_precision(self.precision)
+        check_compression(self.compression, self.compression_level)
+        check_cache_size(self.cache_size)
+        
+        # 提前确定读取引擎，引擎不支持该文件类型或未安装时立即报错
+        resolve_engine(self.file_path, self.engine)
+    
+    def _options(self) -> Dict[str, object]:
+        """
+        返回构造函数中除文件路径、类型序列和前缀之外的处理选项
+        
+        Returns:
+            可传给ExcelProcessor构造函数的关键字参数字典
+        """
+        return {
+            "transient_engine": self.transient_engine,
+            "engine": self.engine,
+            "collect_metrics": self.collect_metrics,
+            "dtype": self.dtype,
+            "precision": self.precision,
+            "compression": self.compression,
+            "compression_level": self.compression_level,
+            "cache_dir": self.cache_dir,
+            "cache_size": self.cache_size,
+        }
     
     def _process_transfer_sheet(self, sheet_data: pd.DataFrame) -> pd.DataFrame:
         """
@@ -74,7 +237,53 @@ class ExcelProcessor:
     
     def _process_transient_sheet(self, sheet_data: pd.DataFrame) -> pd.DataFrame:
         """
-        处理transient类型的工作表
+        处理transient类型的工作表，按transient_engine选择合并引擎
+        
+        Args:
+            sheet_data: 工作表数据
+            
+        Returns:
+            处理后的DataFrame
+        """
+        if self.transient_engine == 'pandas':
+            return self._process_transient_sheet_pandas(sheet_data)
+        return self._process_transient_sheet_numpy(sheet_data)
+    
+    def _process_transient_sheet_numpy(self, sheet_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        向量化的transient合并引擎
+        
+        把成对排列的数据块一次性重排为 (列对数 × 行数, 2) 的数组，
+        再用一个掩码去掉任一列为空的行，结果与逐列对循环的实现一致。
+        
+        Args:
+            sheet_data: 工作表数据
+            
+        Returns:
+            处理后的DataFrame
+        """
+        # 获取第三行前两列作为字段名
+        headers = sheet_data.iloc[2, :2].values
+        
+        # 只取完整成对的列，落单的最后一列与原实现一样被忽略
+        n_pairs = sheet_data.shape[1] // 2
+        if n_pairs == 0:
+            return pd.DataFrame(columns=headers)
+        
+        # 从第四行开始的数据块，形状为 (行数, 列对数 * 2)
+        block = sheet_data.iloc[3:, :n_pairs * 2].to_numpy()
+        
+        # (行, 列对, 2) → (列对, 行, 2) → (列对 * 行, 2)，保持先按列对、再按行的拼接顺序
+        pairs = block.reshape(block.shape[0], n_pairs, 2).transpose(1, 0, 2).reshape(-1, 2)
+        
+        # 只保留两列都有值的行
+        mask = ~pd.isna(pairs).any(axis=1)
+        
+        return pd.DataFrame(pairs[mask], columns=headers)
+    
+    def _process_transient_sheet_pandas(self, sheet_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        逐列对循环的transient合并引擎（原有实现）
         
         Args:
             sheet_data: 工作表数据
@@ -118,55 +327,549 @@ class ExcelProcessor:
             
         return pd.concat(result_data, ignore_index=True)
     
-    def process_and_save(self) -> List[str]:
+    def _read_transfer_sheet(self, excel_file: pd.ExcelFile, sheet_name: str) -> pd.DataFrame:
+        """
+        按列裁剪读取transfer类型的工作表，直接得到处理后的数据
+        
+        跳过字段名之前的说明行，只解析前四列；数据部分不含字段名行，
+        由解析器直接构建数值列，而不是先读入整张object类型的工作表再切片复制。
+        
+        Args:
+            excel_file: 已打开的Excel文件
+            sheet_name: 工作表名称
+            
+        Returns:
+            处理后的DataFrame
+        """
+        def usecols(col) -> bool:
+            return col < TRANSFER_COLUMNS
+        
+        # 第三行为字段名，单独读取这一行
+        header_row = excel_file.parse(sheet_name, header=None, skiprows=TRANSFER_HEADER_ROW,
+                                      nrows=1, usecols=usecols)
+        if header_row.empty:
+            # 工作表不足三行，沿用原有逻辑（与之前一样报错）
+            return self._process_transfer_sheet(excel_file.parse(sheet_name, header=None))
+        
+        # 第四行开始为数据
+        data = excel_file.parse(sheet_name, header=None, skiprows=TRANSFER_HEADER_ROW + 1,
+                                usecols=usecols)
+        
+        # 字段名行与数据的已用列数可能不同，统一补齐为相同宽度
+        width = max(header_row.shape[1], data.shape[1])
+        data = data.reindex(columns=range(width))
+        data.columns = header_row.iloc[0].reindex(range(width)).values
+        
+        return data
+    
+    def _read_sheet(self, excel_file: pd.ExcelFile, sheet_name: str, sheet_type: str) -> pd.DataFrame:
+        """
+        从已打开的Excel文件中读取单个工作表
+        
+        transfer类型按列裁剪读取，已经是处理后的形式；transient类型读取整张工作表。
+        
+        Args:
+            excel_file: 已打开的Excel文件
+            sheet_name: 工作表名称
+            sheet_type: 工作表类型，'transfer'或'transient'
+            
+        Returns:
+            工作表数据
+        """
+        if sheet_type == 'transfer':
+            return self._read_transfer_sheet(excel_file, sheet_name)
+        return excel_file.parse(sheet_name, header=None)
+    
+    def _transform_sheet(self, sheet_type: str, sheet_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        对_read_sheet读取的工作表数据进行转换
+        
+        Args:
+            sheet_type: 工作表类型，'transfer'或'transient'
+            sheet_data: _read_sheet返回的工作表数据
+            
+        Returns:
+            处理后的DataFrame
+        """
+        if sheet_type == 'transfer':
+            # 读取时已完成列裁剪和字段名设置
+            return sheet_data
+        return self._process_transient_sheet(sheet_data)
+    
+    def _resolve_sheet_types(self, sheet_names: List[str],
+                             excel_file: Optional[pd.ExcelFile] = None) -> List[str]:
+        """
+        确定每个工作表的类型：循环使用sheet_types序列，其中为'auto'的工作表只读取开头几行自动识别
+        
+        Args:
+            sheet_names: 工作簿中所有工作表的名称
+            excel_file: 已打开的工作簿，识别时可以复用
+            
+        Returns:
+            与sheet_names一一对应的工作表类型列表
+        """
+        sheet_types = [self.sheet_types[i % len(self.sheet_types)] for i in range(len(sheet_names))]
+        auto_sheets = [name for name, sheet_type in zip(sheet_names, sheet_types) if sheet_type == 'auto']
+        if not auto_sheets:
+            return sheet_types
+        
+        with measure(self.metrics, 'detect', file=self.file_path) as entry:
+            detected = detect_sheet_types(self.file_path, auto_sheets, self.engine, excel_file)
+        if entry is not None:
+            entry["sheets"] = len(auto_sheets)
+        return [detected[name] if sheet_type == 'auto' else sheet_type
+                for name, sheet_type in zip(sheet_names, sheet_types)]
+    
+    def _iter_sheets(self) -> Iterator[Tuple[int, str, str, pd.DataFrame]]:
+        """
+        只打开并解析一次工作簿，依次产出其中每个工作表的数据
+        
+        pd.read_excel(path, sheet_name=...) 每次调用都会重新打开并解码整个工作簿，
+        这里复用同一个 pd.ExcelFile 对象，避免耗时随工作表数量平方增长。
+        
+        Yields:
+            (工作表序号, 工作表名称, 工作表类型, 工作表数据) 元组，序号从1开始，
+            工作表数据为_read_sheet的返回值
+        """
+        if self._sheet_cache is not None:
+            yield from self._iter_cached_sheets()
+            return
+        
+        excel_file = self._open_workbook()
+        with excel_file:
+            sheet_types = self._resolve_sheet_types(excel_file.sheet_names, excel_file)
+            for i, sheet_name in enumerate(excel_file.sheet_names):
+                sheet_type = sheet_types[i]
+                sheet_data = self._parse_sheet(excel_file, i + 1, sheet_name, sheet_type)
+                yield i + 1, sheet_name, sheet_type, sheet_data
+    
+    def _iter_cached_sheets(self) -> Iterator[Tuple[int, str, str, pd.DataFrame]]:
+        """
+        启用工作表缓存时的_iter_sheets
+        
+        工作表名称只读取工作簿的元数据；第一个未命中缓存的工作表才打开工作簿，
+        所有工作表都命中缓存时完全不解码Excel文件。
+        
+        Yields:
+            与_iter_sheets相同
+        """
+        sheet_names = list_sheet_names(self.file_path, self.engine)
+        sheet_types = self._resolve_sheet_types(sheet_names)
+        excel_file = None
+        try:
+            for i, sheet_name in enumerate(sheet_names):
+                sheet_type = sheet_types[i]
+                sheet_data = self._load_cached_sheet(i + 1, sheet_name, sheet_type)
+                if sheet_data is None:
+                    if excel_file is None:
+                        excel_file = self._open_workbook()
+                    sheet_data = self._parse_sheet(excel_file, i + 1, sheet_name, sheet_type)
+                yield i + 1, sheet_name, sheet_type, sheet_data
+        finally:
+            if excel_file is not None:
+                excel_file.close()
+    
+    def _open_workbook(self) -> pd.ExcelFile:
+        """
+        打开工作簿，启用指标收集时记录open阶段
+        
+        Returns:
+            打开的pd.ExcelFile对象，调用方负责关闭
+        """
+        with measure(self.metrics, 'open', file=self.file_path) as entry:
+            excel_file = open_workbook(self.file_path, self.engine)
+        if entry is not None:
+            entry["bytes"] = os.path.getsize(self.file_path)
+        return excel_file
+    
+    def _cache_key(self, sheet_index: int, sheet_type: str) -> Tuple[str, int, str, str]:
         """
-        处理Excel文件中的所有工作表并保存为CSV
+        返回工作表在缓存中的键：transfer工作表按列裁剪读取，与整张读取的数据不同，分开缓存
+        
+        Args:
+            sheet_index: 工作表序号（从1开始）
+            sheet_type: 工作表类型
+            
+        Returns:
+            (文件路径, 工作表序号, 读取方式, 具体读取引擎) 元组，作为SheetCache.load/store的参数
+        """
+        layout = 'transfer' if sheet_type == 'transfer' else 'full'
+        return self.file_path, sheet_index, layout, resolve_engine(self.file_path, self.engine)
+    
+    def _load_cached_sheet(self, sheet_index: int, sheet_name: str, sheet_type: str) -> Optional[pd.DataFrame]:
+        """
+        从工作表缓存读取单个工作表，启用指标收集时记录cache阶段
+        
+        Args:
+            sheet_index: 工作表序号（从1开始）
+            sheet_name: 工作表名称
+            sheet_type: 工作表类型
+            
+        Returns:
+            _read_sheet的返回值；未启用缓存或未命中时返回None
+        """
+        if self._sheet_cache is None:
+            return None
+        
+        with measure(self.metrics, 'cache', file=self.file_path, sheet_index=sheet_index,
+                     sheet_name=sheet_name, sheet_type=sheet_type) as entry:
+            sheet_data = self._sheet_cache.load(*self._cache_key(sheet_index, sheet_type))
+        if entry is not None:
+            entry["hit"] = sheet_data is not None
+            if sheet_data is not None:
+                annotate_frame(entry, sheet_data)
+        return sheet_data
+    
+    def _parse_sheet(self, excel_file: pd.ExcelFile, sheet_index: int, sheet_name: str,
+                     sheet_type: str) -> pd.DataFrame:
+        """
+        解析单个工作表，启用指标收集时记录parse阶段；启用工作表缓存时把结果写入缓存
+        
+        Args:
+            excel_file: 打开的工作簿
+            sheet_index: 工作表序号（从1开始）
+            sheet_name: 工作表名称
+            sheet_type: 工作表类型
+            
+        Returns:
+            _read_sheet的返回值
+        """
+        with measure(self.metrics, 'parse', file=self.file_path, sheet_index=sheet_index,
+                     sheet_name=sheet_name, sheet_type=sheet_type) as entry:
+            sheet_data = self._read_sheet(excel_file, sheet_name, sheet_type)
+        annotate_frame(entry, sheet_data)
+        if self._sheet_cache is not None:
+            self._sheet_cache.store(*self._cache_key(sheet_index, sheet_type), sheet_data)
+        return sheet_data
+    
+    def _convert_sheet(self, sheet_index: int, sheet_type: str, sheet_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        转换单个工作表，启用指标收集时记录transform阶段
+        
+        Args:
+            sheet_index: 工作表序号（从1开始）
+            sheet_type: 工作表类型
+            sheet_data: _read_sheet返回的工作表数据
+            
+        Returns:
+            转换后的数据
+        """
+        with measure(self.metrics, 'transform', file=self.file_path, sheet_index=sheet_index,
+                     sheet_type=sheet_type) as entry:
+            processed_data = self._transform_sheet(sheet_type, sheet_data)
+            if self.dtype is not None:
+                processed_data = self._to_numeric(sheet_index, processed_data, entry)
+        annotate_frame(entry, processed_data)
+        return processed_data
+    
+    def _to_numeric(self, sheet_index: int, processed_data: pd.DataFrame,
+                    entry: Optional[Dict[str, object]]) -> pd.DataFrame:
+        """
+        类型化模式下把转换后的数据转换为数值列，有非数值单元格时打印警告
+        
+        Args:
+            sheet_index: 工作表序号（从1开始）
+            processed_data: 转换后的数据
+            entry: transform阶段的指标记录，启用时补充non_numeric字段
+            
+        Returns:
+            数值类型的DataFrame
+        """
+        numeric_data, count, examples = to_numeric_frame(processed_data, self.dtype)
+        if entry is not None:
+            entry["non_numeric"] = count
+        if count:
+            details = "，".join(f"{column} 第{row}行 {value!r}" for column, row, value in examples)
+            more = " 等" if count > len(examples) else ""
+            print(f"警告: {os.path.basename(self.file_path)} 的第 {sheet_index} 个工作表有 {count} 个非数值单元格，"
+                  f"已转换为空值: {details}{more}")
+        return numeric_data
+    
+    def _write_sheet(self, sheet_index: int, sheet_type: str, processed_data: pd.DataFrame,
+                     output_format: str) -> str:
+        """
+        按输出格式保存转换后的工作表
+        
+        Args:
+            sheet_index: 工作表序号（从1开始）
+            sheet_type: 工作表类型
+            processed_data: 转换后的数据
+            output_format: 输出格式
+            
+        Returns:
+            保存的输出文件路径
+        """
+        # 使用新的命名格式
+        prefix = f"{self.output_prefix}-{sheet_index}-{sheet_type}"
+        
+        if self.compression is not None:
+            # 渲染为CSV文本后交给压缩线程，压缩和写入与后续工作表的处理同时进行
+            with measure(self.metrics, 'write', file=self.file_path, sheet_index=sheet_index,
+                         sheet_type=sheet_type) as entry:
+                data = render_csv(processed_data, self.precision)
+            if entry is not None:
+                entry["rows"] = int(len(processed_data))
+                entry["bytes"] = len(data)
+            return self._get_compression_stage().submit(
+                data, output_path(prefix, output_format), file=self.file_path, sheet_index=sheet_index,
+                sheet_type=sheet_type, rows=int(len(processed_data)))
+        
+        with measure(self.metrics, 'write', file=self.file_path, sheet_index=sheet_index,
+                     sheet_type=sheet_type) as entry:
+            path = write_frame(processed_data, prefix, output_format, self.precision)
+        if entry is not None:
+            entry["rows"] = int(len(processed_data))
+            entry["bytes"] = os.path.getsize(path)
+        return path
+    
+    def _get_compression_stage(self) -> CompressionStage:
+        """返回后台压缩线程，第一次调用时创建（流水线中多个写入线程可能同时调用）"""
+        with self._compression_lock:
+            if self._compression_stage is None:
+                self._compression_stage = CompressionStage(self.compression, self.compression_level,
+                                                           self.metrics)
+            return self._compression_stage
+    
+    def finish_writes(self, cancel: bool = False) -> None:
+        """
+        等待后台压缩线程写完所有输出文件，未压缩输出时不做任何事
+        
+        Args:
+            cancel: 为True时放弃尚未开始压缩的文件并忽略错误（处理已经出错时使用）
+        """
+        with self._compression_lock:
+            stage, self._compression_stage = self._compression_stage, None
+        if stage is not None:
+            stage.close(cancel)
+    
+    def _save_sheet(self, sheet_index: int, sheet_type: str, sheet_data: pd.DataFrame,
+                    output_format: str) -> str:
+        """
+        转换单个工作表并按输出格式保存
+        
+        Args:
+            sheet_index: 工作表序号（从1开始）
+            sheet_type: 工作表类型
+            sheet_data: _read_sheet返回的工作表数据
+            output_format: 输出格式
+            
+        Returns:
+            保存的输出文件路径
+        """
+        processed_data = self._convert_sheet(sheet_index, sheet_type, sheet_data)
+        return self._write_sheet(sheet_index, sheet_type, processed_data, output_format)
+    
+    def _sheet_tasks(self, output_format: str) -> List[Tuple]:
+        """
+        生成按工作表并行处理时的任务列表
+        
+        只读取工作表名称，不解码工作表内容；类型按sheet_types循环分配，'auto'只读取工作表开头几行识别。
+        
+        Args:
+            output_format: 输出格式
+            
+        Returns:
+            _process_sheet_task的任务元组列表
+        """
+        options = self._options()
+        sheet_names = list_sheet_names(self.file_path, self.engine)
+        sheet_types = self._resolve_sheet_types(sheet_names)
+        return [
+            (self.file_path, i + 1, sheet_name, sheet_types[i], self.output_prefix, output_format, options)
+            for i, sheet_name in enumerate(sheet_names)
+        ]
+    
+    def _process_sheets_in_parallel(self, output_format: str, max_workers: Optional[int]) -> List[str]:
+        """
+        把工作簿中的工作表分发到进程池中并行处理
+        
+        Args:
+            output_format: 输出格式
+            max_workers: 最大工作进程数，None表示使用CPU核心数
+            
+        Returns:
+            按工作表顺序排列的输出文件路径列表
+        """
+        tasks = self._sheet_tasks(output_format)
+        if not tasks:
+            return []
+        
+        if max_workers is None:
+            max_workers = multiprocessing.cpu_count()
+        
+        # 相邻的工作表分到同一块，每个工作进程只需打开工作簿少数几次
+        chunksize = max(1, len(tasks) // (max_workers * 4))
+        
+        saved_files = []
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_sheet_worker,
+                                 initargs=(self.engine, output_format)) as executor:
+            for _, _, output_file, error, _, metrics in executor.map(_process_sheet_task, tasks,
+                                                                     chunksize=chunksize):
+                if error:
+                    raise RuntimeError(error)
+                saved_files.append(output_file)
+                if self.metrics is not None:
+                    self.metrics.extend(metrics)
+        
+        return saved_files
+    
+    def process_and_save(self, output_format: str = "csv", parallel_sheets: bool = False,
+                         max_workers: Optional[int] = None) -> List[str]:
+        """
+        处理Excel文件中的所有工作表并保存
         
         sheet_types序列会循环应用到所有工作表:
         - 例如 ['transfer', 'transient'] + 4个sheet → transfer, transient, transfer, transient
         
+        Args:
+            output_format: 输出格式，'csv'（默认）、'parquet'、'feather'或'hdf5'
+            parallel_sheets: 是否把工作表分发到多个进程并行处理，适用于包含大量工作表的大文件
+            max_workers: 并行处理时的最大工作进程数，默认为None（使用CPU核心数）
+        
         Returns:
-            保存的CSV文件路径列表
+            保存的输出文件路径列表；启用指标收集时为带metrics属性的OutputList，
+            包含各阶段的工作表级记录和一条文件级汇总
         """
-        # 读取Excel文件
-        excel_file = pd.ExcelFile(self.file_path)
+        check_output_format(output_format)
+        if self.compression is not None and output_format != 'csv':
+            raise ValueError(f"压缩只用于CSV输出，{output_format} 格式已内置压缩")
+        
+        if self.metrics is not None:
+            self.metrics = []
         
-        # 获取所有工作表
-        all_sheets = excel_file.sheet_names
+        if parallel_sheets:
+            saved_files = self._process_sheets_in_parallel(output_format, max_workers)
+            return collect_outputs(saved_files, self.file_path, self.metrics)
         
         saved_files = []
         
-        # 处理每个工作表，使用模运算循环应用类型序列
-        for i, sheet_name in enumerate(all_sheets):
-            # 循环使用sheet_types序列
-            sheet_type = self.sheet_types[i % len(self.sheet_types)]
+        # 工作簿只打开一次，逐个处理其中的工作表
+        try:
+            for sheet_index, sheet_name, sheet_type, sheet_data in self._iter_sheets():
+                saved_files.append(self._save_sheet(sheet_index, sheet_type, sheet_data, output_format))
+        except BaseException:
+            self.finish_writes(cancel=True)
+            raise
+        self.finish_writes()
             
-            # 读取工作表数据
-            sheet_data = pd.read_excel(self.file_path, sheet_name=sheet_name, header=None)
-            
-            # 根据工作表类型处理数据
-            if sheet_type == 'transfer':
-                processed_data = self._process_transfer_sheet(sheet_data)
-            else:  # transient
-                processed_data = self._process_transient_sheet(sheet_data)
+        return collect_outputs(saved_files, self.file_path, self.metrics)
+    
+    def iter_frames(self, as_numpy: bool = False) -> Iterator[SheetResult]:
+        """
+        逐个产出处理后的工作表数据，不写入任何文件
+        
+        工作簿只打开一次，每次只解析和转换一个工作表，适合在其他程序中直接使用处理结果。
+        
+        Args:
+            as_numpy: 是否以NumPy数组代替DataFrame返回数据
             
-            # 保存为CSV，使用新的命名格式
-            output_file = f"{self.output_prefix}-{i+1}-{sheet_type}.csv"
-            processed_data.to_csv(output_file, index=False)
-            saved_files.append(output_file)
+        Yields:
+            每个工作表的SheetResult
+        """
+        for sheet_index, sheet_name, sheet_type, sheet_data in self._iter_sheets():
+            processed_data = self._convert_sheet(sheet_index, sheet_type, sheet_data)
+            columns = [str(column) for column in processed_data.columns]
+            if not as_numpy:
+                data = processed_data
+            elif self.dtype is not None:
+                # 类型化模式下已经是数值列，直接取出，保持float32
+                data = processed_data.to_numpy()
+            else:
+                data = frame_to_numpy(processed_data)
+            yield SheetResult(self.file_path, sheet_index, sheet_name, sheet_type, columns, data)
+    
+    def process_to_frames(self, as_numpy: bool = False) -> Dict[Tuple[int, str], Union[pd.DataFrame, np.ndarray]]:
+        """
+        处理Excel文件中的所有工作表并在内存中返回结果，不写入任何文件
+        
+        Args:
+            as_numpy: 是否以NumPy数组代替DataFrame返回数据（字段名可通过iter_frames获得）
             
-        return saved_files
+        Returns:
+            (工作表序号, 工作表类型) 到处理后数据的字典，按工作表顺序排列
+        """
+        return {(result.sheet_index, result.sheet_type): result.data for result in self.iter_frames(as_numpy)}
     
     def get_sheet_info(self) -> Dict[str, str]:
         """
-        获取Excel文件中所有工作表的信息（使用循环类型序列）
+        获取Excel文件中所有工作表的信息（使用循环类型序列，'auto'为识别出的类型）
         
         Returns:
             工作表名称和类型的字典
         """
-        excel_file = pd.ExcelFile(self.file_path)
-        all_sheets = excel_file.sheet_names
+        all_sheets = list_sheet_names(self.file_path, self.engine)
         
         # 使用模运算循环应用类型序列
-        return {sheet: self.sheet_types[i % len(self.sheet_types)] 
-                for i, sheet in enumerate(all_sheets)} 
\ No newline at end of file
+        return dict(zip(all_sheets, self._resolve_sheet_types(all_sheets)))
+
+
+# 工作进程内最近打开的工作簿，处理同一工作簿的连续多个工作表时只打开一次
+_OPEN_WORKBOOK: Dict[str, object] = {}
+
+
+def _get_open_workbook(file_path: str, engine: str,
+                       metrics: Optional[List[Dict[str, object]]] = None) -> pd.ExcelFile:
+    """
+    获取工作进程中已打开的工作簿，切换到其他工作簿时关闭之前的一个
+    
+    Args:
+        file_path: Excel文件路径
+        engine: 读取引擎
+        metrics: 指标记录列表，真正打开工作簿时记录open阶段
+        
+    Returns:
+        打开的pd.ExcelFile对象
+    """
+    key = (file_path, engine)
+    if _OPEN_WORKBOOK.get("key") != key:
+        if _OPEN_WORKBOOK.get("excel_file") is not None:
+            _OPEN_WORKBOOK["excel_file"].close()
+            _OPEN_WORKBOOK.clear()
+        with measure(metrics, 'open', file=file_path) as entry:
+            _OPEN_WORKBOOK["excel_file"] = open_workbook(file_path, engine)
+        if entry is not None:
+            entry["bytes"] = os.path.getsize(file_path)
+        _OPEN_WORKBOOK["key"] = key
+    return _OPEN_WORKBOOK["excel_file"]
+
+
+def _init_sheet_worker(engine: str, output_format: str) -> None:
+    """
+    按工作表并行处理时进程池的初始化函数，预先导入读取引擎和输出格式依赖的模块
+    
+    Args:
+        engine: 读取引擎
+        output_format: 输出格式
+    """
+    preload_engines(engine)
+    preload_format(output_format)
+
+
+def _process_sheet_task(task: Tuple) -> Tuple[str, int, Optional[str], Optional[str], float,
+                                              Optional[List[Dict[str, object]]]]:
+    """
+    工作进程中处理单个工作表的任务函数
+    
+    Args:
+        task: (文件路径, 工作表序号, 工作表名称, 工作表类型, 输出前缀, 输出格式, 处理选项) 元组
+        
+    Returns:
+        (文件路径, 工作表序号, 输出文件路径, 错误信息, 耗时秒数, 指标记录) 元组，出错时输出文件路径为None，
+        未启用指标收集时指标记录为None
+    """
+    file_path, sheet_index, sheet_name, sheet_type, output_prefix, output_format, options = task
+    start = time.perf_counter()
+    
+    try:
+        processor = ExcelProcessor(file_path, [sheet_type], output_prefix, **options)
+        sheet_data = processor._load_cached_sheet(sheet_index, sheet_name, sheet_type)
+        if sheet_data is None:
+            excel_file = _get_open_workbook(file_path, processor.engine, processor.metrics)
+            sheet_data = processor._parse_sheet(excel_file, sheet_index, sheet_name, sheet_type)
+        output_file = processor._save_sheet(sheet_index, sheet_type, sheet_data, output_format)
+        processor.finish_writes()
+        return file_path, sheet_index, output_file, None, time.perf_counter() - start, processor.metrics
+    except Exception as e:
+        error_message = (f"处理文件 {os.path.basename(file_path)} 的工作表 {sheet_name} 时出错: "
+                         f"{str(e)}\n{traceback.format_exc()}")
+        return file_path, sheet_index, None, error_message, time.perf_counter() - start, None
@@ -0,0 +1,401 @@
+"""
+增量批处理使用的变更检测清单，以及中断后继续运行使用的检查点
+
+清单以JSON格式保存在输出目录中，记录每个已处理工作簿的源文件路径、大小、
+修改时间、可选的内容哈希、各工作表类型、输出文件路径以及处理设置。
+再次运行时，输入和设置都没有变化、且输出文件仍然存在的工作簿会被跳过。
+
+检查点在每个工作簿处理完成后立即落盘，运行被中断后可以从中断处继续。
+"""
+
+import os
+import json
+import hashlib
+from typing import Dict, List, Optional
+
+
+# 清单文件名，保存在输出目录中
+MANIFEST_FILENAME = ".oect_manifest.json"
+
+# 清单格式版本，格式不兼容时递增，旧清单会被忽略
+MANIFEST_VERSION = 1
+
+
+def content_hash(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    计算文件内容的SHA-256哈希
+
+    Args:
+        file_path: 文件路径
+        chunk_size: 每次读取的字节数
+
+    Returns:
+        十六进制哈希字符串
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_json_atomic(path: str, data: object) -> None:
+    """
+    原子地写入JSON文件：先写入同目录下的临时文件并刷新到磁盘，再重命名覆盖
+
+    Args:
+        path: 目标文件路径
+        data: 可序列化为JSON的数据
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class BatchManifest:
+    """
+    批处理的变更检测清单
+    """
+
+    def __init__(self, output_dir: Optional[str] = None):
+        """
+        初始化BatchManifest类
+
+        Args:
+            output_dir: 输出目录，清单保存在其中；不指定则使用当前目录
+        """
+        self.path = os.path.join(output_dir or os.curdir, MANIFEST_FILENAME)
+        self.entries: Dict[str, Dict[str, object]] = {}
+
+    @classmethod
+    def load(cls, output_dir: Optional[str] = None) -> 'BatchManifest':
+        """
+        从输出目录加载清单，清单不存在、损坏或版本不符时返回空清单
+
+        Args:
+            output_dir: 输出目录
+
+        Returns:
+            BatchManifest实例
+        """
+        manifest = cls(output_dir)
+        if os.path.exists(manifest.path):
+            try:
+                with open(manifest.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") == MANIFEST_VERSION:
+                    manifest.entries = data.get("files", {})
+            except (OSError, ValueError) as e:
+                print(f"  无法读取清单 {manifest.path}，将重新处理所有文件: {str(e)}")
+        return manifest
+
+    def save(self) -> None:
+        """保存清单"""
+        write_json_atomic(self.path, {"version": MANIFEST_VERSION, "files": self.entries})
+
+    def is_up_to_date(self, excel_file: str, file_index: int, settings: Dict[str, object],
+                      hash_contents: bool = False) -> bool:
+        """
+        判断工作簿自上次处理以来是否没有变化
+
+        大小和修改时间都相同时直接视为未变化；启用内容哈希时，
+        大小相同但修改时间变化的文件会再比较哈希，内容相同仍视为未变化。
+
+        Args:
+            excel_file: Excel文件路径
+            file_index: 文件在本次运行中的序号（决定输出文件名）
+            settings: 本次运行的处理设置
+            hash_contents: 是否使用内容哈希进行比较
+
+        Returns:
+            未变化且输出文件齐全时返回True
+        """
+        entry = self.entries.get(os.path.abspath(excel_file))
+        if not entry:
+            return False
+
+        if entry.get("settings") != settings or entry.get("file_index") != file_index:
+            return False
+
+        if not all(os.path.exists(path) for path in entry.get("outputs", [])):
+            return False
+
+        stat = os.stat(excel_file)
+        if stat.st_size != entry.get("size"):
+            return False
+
+        if stat.st_mtime != entry.get("mtime"):
+            if not hash_contents or not entry.get("sha256"):
+                return False
+            if content_hash(excel_file) != entry["sha256"]:
+                return False
+            # 内容未变，只是修改时间变了，更新记录以便下次走快速路径
+            entry["mtime"] = stat.st_mtime
+
+        return True
+
+    def record(self, excel_file: str, file_index: int, settings: Dict[str, object],
+               sheet_types: List[str], outputs: List[str], hash_contents: bool = False) -> None:
+        """
+        记录一个处理成功的工作簿
+
+        Args:
+            excel_file: Excel文件路径
+            file_index: 文件在本次运行中的序号
+            settings: 本次运行的处理设置
+            sheet_types: 每个工作表实际使用的类型
+            outputs: 生成的输出文件路径列表
+            hash_contents: 是否记录内容哈希
+        """
+        stat = os.stat(excel_file)
+        self.entries[os.path.abspath(excel_file)] = {
+            "file_index": file_index,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": content_hash(excel_file) if hash_contents else None,
+            "sheet_types": sheet_types,
+            "outputs": outputs,
+            "settings": settings,
+        }
+
+    def file_index(self, excel_file: str) -> Optional[int]:
+        """
+        获取工作簿上次处理时的文件序号
+
+        Args:
+            excel_file: Excel文件路径
+
+        Returns:
+            文件序号，清单中没有该工作簿时返回None
+        """
+        entry = self.entries.get(os.path.abspath(excel_file))
+        return entry.get("file_index") if entry else None
+
+    def forget(self, excel_file: str) -> None:
+        """
+        移除一个工作簿的记录（如处理失败时），下次运行会重新处理
+
+        Args:
+            excel_file: Excel文件路径
+        """
+        self.entries.pop(os.path.abspath(excel_file), None)
+
+    def outputs(self, excel_file: str) -> List[str]:
+        """
+        获取工作簿上次生成的输出文件
+
+        Args:
+            excel_file: Excel文件路径
+
+        Returns:
+            输出文件路径列表
+        """
+        entry = self.entries.get(os.path.abspath(excel_file), {})
+        return list(entry.get("outputs", []))
+
+
+# 检查点文件名前缀，保存在输出文件所在的目录中，批处理正常结束后删除
+CHECKPOINT_PREFIX = ".oect_checkpoint"
+
+
+def checkpoint_id(directory: str, file_pattern: str, settings: Dict[str, object]) -> str:
+    """
+    返回一次批处理的检查点标识：输入目录、文件匹配模式和处理设置都相同的运行共用同一个检查点，
+    输出到同一目录的其他批处理使用各自的检查点文件
+
+    Args:
+        directory: 输入目录
+        file_pattern: 文件匹配模式
+        settings: 处理设置
+
+    Returns:
+        16位十六进制字符串
+    """
+    key = json.dumps([os.path.abspath(directory), file_pattern, settings], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+
+def _try_lock(handle) -> bool:
+    """
+    对打开的文件加排他锁（不等待），进程退出时自动释放
+
+    Args:
+        handle: 打开的文件对象
+
+    Returns:
+        加锁成功返回True，已被其他进程锁定时返回False；不支持fcntl的平台（Windows）不加锁，总是返回True
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return True
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+class BatchCheckpoint:
+    """
+    批处理的断点记录
+
+    以JSON Lines格式追加写入：第一行为本次运行的处理设置，之后每处理完一个工作簿追加一行，
+    并立即刷新到磁盘。运行被中断后，可以从最后一个完整处理的工作簿继续。
+    运行期间持有检查点文件的排他锁，相同的批处理同时运行时只有一个记录检查点。
+    """
+
+    def __init__(self, output_dir: Optional[str] = None, run_id: Optional[str] = None):
+        """
+        初始化BatchCheckpoint类
+
+        Args:
+            output_dir: 输出文件所在的目录，检查点保存在其中；不指定则使用当前目录
+            run_id: checkpoint_id返回的检查点标识，文件名为 .oect_checkpoint-{run_id}.jsonl；
+                    不指定时为 .oect_checkpoint.jsonl
+        """
+        filename = f"{CHECKPOINT_PREFIX}-{run_id}.jsonl" if run_id else f"{CHECKPOINT_PREFIX}.jsonl"
+        self.path = os.path.join(output_dir or os.curdir, filename)
+        self.completed: Dict[str, Dict[str, object]] = {}
+        self._handle = None
+
+    def _load(self, settings: Dict[str, object]) -> bool:
+        """
+        读取已有的检查点（调用方已打开并锁定文件），只有处理设置相同时才采用其中的记录
+
+        Args:
+            settings: 本次运行的处理设置
+
+        Returns:
+            已有检查点可以继续使用时返回True
+        """
+        self._handle.seek(0)
+        content = self._handle.read()
+        if not content:
+            return False
+        lines = content.splitlines()
+
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            header = {}
+        if header.get("version") != MANIFEST_VERSION or header.get("settings") != settings:
+            print(f"  检查点 {self.path} 的处理设置与本次不同，将从头开始处理")
+            return False
+
+        completed = {}
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # 中断时可能留下不完整的最后一行
+                continue
+            completed[entry["source"]] = entry
+
+        if not content.endswith("\n"):
+            # 结束被中断时写了一半的行，避免与新记录连在一起
+            self._handle.write("\n")
+        self.completed = completed
+        return True
+
+    def open(self, settings: Dict[str, object], resume: bool = False) -> bool:
+        """
+        开始记录本次运行
+
+        Args:
+            settings: 本次运行的处理设置
+            resume: 是否从已有检查点继续；否则清空旧检查点重新开始
+
+        Returns:
+            是否开始记录；相同的批处理正在运行（检查点已被其他进程锁定）时返回False，本次不记录检查点
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        handle = open(self.path, 'a+', encoding='utf-8')
+        if not _try_lock(handle):
+            handle.close()
+            print(f"  检查点 {self.path} 正被另一个相同的批处理使用，本次不记录检查点")
+            return False
+        self._handle = handle
+
+        if resume and self._load(settings):
+            return True
+
+        self.completed = {}
+        self._handle.seek(0)
+        self._handle.truncate()
+        self._write_line({"version": MANIFEST_VERSION, "settings": settings})
+        return True
+
+    def _write_line(self, data: Dict[str, object]) -> None:
+        """写入一行并立即刷新到磁盘"""
+        self._handle.write(json.dumps(data, ensure_ascii=False) + "\n")
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+
+    def is_completed(self, excel_file: str, file_index: int) -> bool:
+        """
+        判断工作簿是否已在被中断的运行中完整处理
+
+        Args:
+            excel_file: Excel文件路径
+            file_index: 文件在本次运行中的序号
+
+        Returns:
+            已完成、序号相同、文件大小和修改时间都没有变化且输出文件齐全时返回True
+        """
+        entry = self.completed.get(os.path.abspath(excel_file))
+        if not entry or entry.get("file_index") != file_index:
+            return False
+        try:
+            stat = os.stat(excel_file)
+        except OSError:
+            return False
+        # 中断后被替换或编辑过的工作簿需要重新处理
+        if entry.get("size") != stat.st_size or entry.get("mtime") != stat.st_mtime:
+            return False
+        return all(os.path.exists(path) for path in entry.get("outputs", []))
+
+    def outputs(self, excel_file: str) -> List[str]:
+        """
+        获取检查点中记录的输出文件
+
+        Args:
+            excel_file: Excel文件路径
+
+        Returns:
+            输出文件路径列表
+        """
+        entry = self.completed.get(os.path.abspath(excel_file), {})
+        return list(entry.get("outputs", []))
+
+    def record(self, excel_file: str, file_index: int, outputs: List[str]) -> None:
+        """
+        记录一个完整处理的工作簿，同时记录其大小和修改时间
+
+        Args:
+            excel_file: Excel文件路径
+            file_index: 文件序号
+            outputs: 生成的输出文件路径列表
+        """
+        stat = os.stat(excel_file)
+        entry = {"source": os.path.abspath(excel_file), "file_index": file_index,
+                 "size": stat.st_size, "mtime": stat.st_mtime, "outputs": outputs}
+        self.completed[entry["source"]] = entry
+        self._write_line(entry)
+
+    def close(self, remove: bool = True) -> None:
+        """
+        结束记录并释放锁
+
+        Args:
+            remove: 是否删除检查点文件；运行被中断时应保留以便继续
+        """
+        if self._handle is None:
+            return
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
+        self._handle.close()
+        self._handle = None
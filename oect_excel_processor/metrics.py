@@ -0,0 +1,146 @@
+"""
+可选的处理阶段计时与吞吐量指标
+
+启用后，每个工作簿记录以下指标（每条为一个字典）：
+- open: 打开工作簿，bytes为输入文件大小
+- detect: 自动识别工作表类型（只在sheet_types中有'auto'时记录），sheets为识别的工作表数
+- parse: 解析单个工作表，rows为解析出的行数，bytes为DataFrame占用的内存
+- cache: 从工作表缓存读取单个工作表（只在启用缓存时记录），hit表示是否命中，命中时rows和bytes同parse
+- transform: 转换单个工作表，rows和bytes为转换后的数据
+- write: 写入单个工作表，rows为写入的行数，bytes为输出文件大小（压缩输出时为压缩前的大小）
+- compress: 在后台线程中压缩并写入单个工作表（只在压缩输出时记录），bytes为压缩后的文件大小
+- file: 文件级汇总，wall_s和cpu_s为以上各阶段之和，rows为解析出（或从缓存读取）的总行数，bytes为输入文件大小
+
+每条记录都包含wall_s（实际耗时）和cpu_s（所在线程的CPU时间）。
+"""
+
+import os
+import json
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# 记录的阶段名称
+METRIC_STAGES = ('open', 'detect', 'parse', 'cache', 'transform', 'write', 'compress', 'file')
+
+
+class OutputList(list):
+    """
+    输出文件路径列表，启用指标收集时通过metrics属性附带该工作簿的指标记录
+
+    本身就是list，不使用指标的调用方无需任何修改。
+    """
+
+    def __init__(self, paths: Iterable[str] = (), metrics: Optional[List[Dict[str, object]]] = None):
+        super().__init__(paths)
+        self.metrics: List[Dict[str, object]] = list(metrics or [])
+
+
+@contextmanager
+def measure(records: Optional[List[Dict[str, object]]], stage: str,
+            **fields: object) -> Iterator[Optional[Dict[str, object]]]:
+    """
+    测量一个阶段的实际耗时和CPU时间，结束时把记录追加到records
+
+    Args:
+        records: 记录列表，为None表示未启用指标收集，此时不做任何事
+        stage: 阶段名称
+        **fields: 记录中的其他字段，如file、sheet_index
+
+    Yields:
+        本次的记录字典（未启用时为None），调用方可以在阶段结束后补充rows、bytes等字段
+    """
+    if records is None:
+        yield None
+        return
+
+    entry: Dict[str, object] = {"level": "sheet" if "sheet_index" in fields else "file", "stage": stage}
+    entry.update(fields)
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    try:
+        yield entry
+    finally:
+        entry["wall_s"] = time.perf_counter() - wall
+        entry["cpu_s"] = time.thread_time() - cpu
+        records.append(entry)
+
+
+def annotate_frame(entry: Optional[Dict[str, object]], frame: 'pd.DataFrame') -> None:
+    """
+    在记录中补充DataFrame的行数和内存占用
+
+    Args:
+        entry: measure产出的记录，为None时不做任何事
+        frame: 数据
+    """
+    if entry is None:
+        return
+    entry["rows"] = int(len(frame))
+    entry["bytes"] = int(frame.memory_usage(index=False, deep=True).sum())
+
+
+def summarize_file(records: List[Dict[str, object]], file_path: str) -> Dict[str, object]:
+    """
+    汇总一个工作簿的各阶段记录，生成文件级记录
+
+    Args:
+        records: 该工作簿的阶段记录
+        file_path: Excel文件路径
+
+    Returns:
+        stage为'file'的记录
+    """
+    stages = [entry for entry in records if entry["stage"] != 'file']
+    parsed = [entry for entry in stages if entry["stage"] == 'parse' or entry.get("hit")]
+    return {
+        "level": "file",
+        "stage": "file",
+        "file": file_path,
+        "sheets": len(parsed),
+        "wall_s": sum(entry["wall_s"] for entry in stages),
+        "cpu_s": sum(entry["cpu_s"] for entry in stages),
+        "rows": sum(entry.get("rows", 0) for entry in parsed),
+        "bytes": os.path.getsize(file_path),
+    }
+
+
+def collect_outputs(outputs: List[str], file_path: str,
+                    records: Optional[List[Dict[str, object]]]) -> List[str]:
+    """
+    返回工作簿的输出文件列表，启用指标收集时附带阶段记录和文件级汇总
+
+    Args:
+        outputs: 输出文件路径列表
+        file_path: Excel文件路径
+        records: 该工作簿的阶段记录，为None表示未启用指标收集
+
+    Returns:
+        未启用时原样返回outputs，否则返回OutputList
+    """
+    if records is None:
+        return outputs
+    return OutputList(outputs, records + [summarize_file(records, file_path)])
+
+
+def write_metrics(path: str, records: Iterable[Dict[str, object]]) -> int:
+    """
+    以JSON Lines格式写入指标记录，每行一条
+
+    Args:
+        path: 输出文件路径
+        records: 指标记录
+
+    Returns:
+        写入的记录数
+    """
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for entry in records:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            count += 1
+    return count
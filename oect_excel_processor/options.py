@@ -0,0 +1,53 @@
+"""
+命令行和API共用的选项取值
+
+这里只定义常量，不导入pandas、numpy等依赖，命令行解析参数（包括 --help 和参数错误）时
+只需导入本模块，处理模块在真正开始处理时才导入。各常量仍可从原来的模块导入。
+"""
+
+
+# 工作表类型：auto只读取工作表开头几行，根据字段名自动识别为transfer或transient
+SHEET_TYPES = ('transfer', 'transient', 'auto')
+
+# 可选的读取引擎
+READER_ENGINES = ('auto', 'calamine', 'xlrd', 'openpyxl')
+
+# 可选的输出格式
+OUTPUT_FORMATS = ('csv', 'parquet', 'feather', 'hdf5')
+
+# transient工作表的合并引擎：numpy为向量化实现，pandas为逐列对循环的原有实现
+TRANSIENT_ENGINES = ('numpy', 'pandas')
+
+# 类型化模式的数值类型：输出数据一次转换为该类型的连续数值列，不指定时保持读取时的类型
+NUMERIC_DTYPES = ('float64', 'float32')
+
+# 多进程处理的任务粒度：按文件分发，或把所有文件的工作表分发到同一个进程池
+GRANULARITIES = ('file', 'sheet')
+
+# 监视目录时的变更来源：auto在安装了watchdog时使用文件事件（inotify等），否则轮询
+WATCH_BACKENDS = ('auto', 'watchdog', 'polling')
+
+# 监视目录时，文件大小和修改时间保持不变多少秒后视为写入完成
+DEFAULT_SETTLE_SECONDS = 1.0
+
+# 监视目录时轮询的间隔（秒）
+DEFAULT_POLL_INTERVAL = 2.0
+
+# 处理服务默认监听的地址和端口，默认只接受本机连接
+DEFAULT_SERVE_HOST = '127.0.0.1'
+DEFAULT_SERVE_PORT = 8765
+
+# 处理服务最多排队的任务数，超出时拒绝新任务
+DEFAULT_MAX_QUEUED = 1000
+
+# 工作表缓存目录的默认大小上限（MB）
+DEFAULT_CACHE_SIZE = 2048
+
+# CSV浮点数有效数字位数的取值范围，float64能可靠表示15位十进制有效数字
+CSV_PRECISION_RANGE = (1, 15)
+
+# 合并输出支持的格式
+CONSOLIDATED_FORMATS = ('parquet', 'csv')
+
+# 合并输出默认每块的行数
+DEFAULT_CHUNK_ROWS = 500_000
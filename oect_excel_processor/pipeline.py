@@ -0,0 +1,317 @@
+"""
+批处理的流水线模式：读取、转换、写入三个阶段并行执行
+
+每个阶段由一组线程组成，阶段之间用有界队列连接：
+- read: 打开工作簿并逐个解析工作表
+- transform: transfer/transient转换
+- write: 按输出格式写入文件
+
+工作簿解码（calamine/xlrd等C/Rust实现）和磁盘写入期间会释放GIL，
+因此与其他阶段的转换可以重叠执行。有界队列限制了同时在内存中的工作表数量。
+"""
+
+import os
+import time
+import queue
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from .metrics import collect_outputs
+
+if TYPE_CHECKING:
+    from .excel_processor import ExcelProcessor
+
+
+# 流水线的阶段名称，按数据流动顺序排列
+PIPELINE_STAGES = ('read', 'transform', 'write')
+
+# 每个阶段默认的线程数
+DEFAULT_STAGE_WORKERS = {'read': 2, 'transform': 1, 'write': 2}
+
+# 阶段之间每个队列默认最多容纳的工作表数
+DEFAULT_QUEUE_SIZE = 4
+
+# 通知下游线程结束的标记
+_STOP = object()
+
+
+def parse_stage_workers(spec: str) -> Dict[str, int]:
+    """
+    解析命令行中的各阶段线程数，格式为 "读取,转换,写入"，如 "2,1,2"
+
+    Args:
+        spec: 以逗号分隔的三个正整数
+
+    Returns:
+        阶段名称到线程数的字典
+    """
+    parts = spec.split(',')
+    if len(parts) != len(PIPELINE_STAGES) or not all(part.strip().isdigit() and int(part) > 0 for part in parts):
+        raise ValueError(f"各阶段线程数必须是以逗号分隔的三个正整数（读取,转换,写入），而不是 {spec}")
+    return {stage: int(part) for stage, part in zip(PIPELINE_STAGES, parts)}
+
+
+class StageStats:
+    """
+    单个流水线阶段的运行统计
+    """
+
+    def __init__(self, name: str, workers: int):
+        """
+        初始化StageStats类
+
+        Args:
+            name: 阶段名称
+            workers: 阶段的线程数
+        """
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, elapsed: float) -> None:
+        """记录处理一个工作表的耗时"""
+        with self._lock:
+            self.items += 1
+            self.busy += elapsed
+
+    def utilization(self, wall: float) -> float:
+        """
+        返回阶段的利用率：所有线程的忙碌时间 / (总耗时 × 线程数)
+
+        利用率接近1的阶段是瓶颈，可以增加其线程数；利用率很低的阶段可以减少线程数。
+
+        Args:
+            wall: 流水线的总耗时（秒）
+
+        Returns:
+            0到1之间的利用率
+        """
+        if wall <= 0:
+            return 0.0
+        return min(1.0, self.busy / (wall * self.workers))
+
+
+def format_stage_report(stats: Dict[str, StageStats], wall: float) -> str:
+    """
+    生成各阶段利用率的文本报告
+
+    Args:
+        stats: 阶段名称到统计的字典
+        wall: 流水线的总耗时（秒）
+
+    Returns:
+        多行文本
+    """
+    lines = [f"流水线各阶段利用率（总耗时 {wall:.2f}s）:"]
+    for stage in PIPELINE_STAGES:
+        stage_stats = stats[stage]
+        lines.append(f"  {stage:<10} 线程数: {stage_stats.workers}  工作表数: {stage_stats.items}  "
+                     f"忙碌: {stage_stats.busy:.2f}s  利用率: {stage_stats.utilization(wall):.0%}")
+    return "\n".join(lines)
+
+
+class _FileState:
+    """
+    单个文件在流水线中的进度，所有工作表写入完成后该文件才算完成
+    """
+
+    def __init__(self, excel_file: str, file_index: int):
+        self.excel_file = excel_file
+        self.file_index = file_index
+        self.total: Optional[int] = None
+        self.done = 0
+        self.outputs: Dict[int, str] = {}
+        self.failed = False
+        self.elapsed = 0.0
+        self.reported = False
+        self.processor: Optional['ExcelProcessor'] = None
+
+
+class BatchPipeline:
+    """
+    读取、转换、写入三阶段流水线
+
+    每个文件的所有工作表都写入完成后，通过on_result回调报告该文件的结果；
+    回调在调用run的线程中执行，无需额外加锁。
+    """
+
+    def __init__(self, make_processor: Callable[[str, int], 'ExcelProcessor'], output_format: str,
+                 stage_workers: Optional[Dict[str, int]] = None, queue_size: int = DEFAULT_QUEUE_SIZE):
+        """
+        初始化BatchPipeline类
+
+        Args:
+            make_processor: 根据 (Excel文件路径, 文件序号) 创建ExcelProcessor的函数
+            output_format: 输出格式
+            stage_workers: 各阶段的线程数，未指定的阶段使用默认值
+            queue_size: 阶段之间每个队列最多容纳的工作表数
+        """
+        self.make_processor = make_processor
+        self.output_format = output_format
+        self.stage_workers = dict(DEFAULT_STAGE_WORKERS)
+        self.stage_workers.update(stage_workers or {})
+        if any(workers < 1 for workers in self.stage_workers.values()):
+            raise ValueError(f"各阶段线程数必须是正整数，而不是 {self.stage_workers}")
+        if queue_size < 1:
+            raise ValueError(f"队列大小必须是正整数，而不是 {queue_size}")
+        self.queue_size = queue_size
+        self.stats = {stage: StageStats(stage, self.stage_workers[stage]) for stage in PIPELINE_STAGES}
+        self.wall = 0.0
+
+    def run(self, pending: List[Tuple[str, int]],
+            on_result: Callable[[str, int, List[str], float], None]) -> Dict[str, StageStats]:
+        """
+        运行流水线处理所有待处理文件
+
+        Args:
+            pending: 待处理的 (Excel文件路径, 文件序号) 列表，按此顺序读取
+            on_result: 回调函数，参数为 (Excel文件路径, 文件序号, 输出文件路径列表, 耗时秒数)，
+                       输出为空列表表示处理失败；耗时为该文件各阶段忙碌时间之和
+
+        Returns:
+            各阶段的运行统计
+        """
+        start = time.perf_counter()
+
+        files: "queue.Queue" = queue.Queue()
+        for task in pending:
+            files.put(task)
+        read_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        write_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        finished: "queue.Queue" = queue.Queue()
+
+        lock = threading.Lock()
+
+        def settle(state: _FileState, done: int = 0, elapsed: float = 0.0) -> None:
+            """更新文件进度，文件的所有工作表都完成时通知主线程"""
+            with lock:
+                state.done += done
+                state.elapsed += elapsed
+                complete = state.total is not None and state.done == state.total and not state.reported
+                if complete:
+                    state.reported = True
+            if complete:
+                finished.put(state)
+
+        def read_worker() -> None:
+            """读取阶段：逐个打开工作簿，把解析后的工作表放入转换队列"""
+            while True:
+                try:
+                    excel_file, file_index = files.get_nowait()
+                except queue.Empty:
+                    return
+                state = _FileState(excel_file, file_index)
+
+                print(f"处理文件 {file_index}: {os.path.basename(excel_file)}")
+                count = 0
+                tick = time.perf_counter()
+                try:
+                    processor = self.make_processor(excel_file, file_index)
+                    state.processor = processor
+                    for sheet_index, _, sheet_type, sheet_data in processor._iter_sheets():
+                        elapsed = time.perf_counter() - tick
+                        self.stats['read'].add(elapsed)
+                        settle(state, elapsed=elapsed)
+                        count += 1
+                        # 队列已满时在此等待，限制同时在内存中的工作表数量
+                        read_queue.put((state, processor, sheet_index, sheet_type, sheet_data))
+                        tick = time.perf_counter()
+                except Exception as e:
+                    print(f"  处理文件 {os.path.basename(excel_file)} 时出错: {str(e)}")
+                    state.failed = True
+
+                with lock:
+                    state.total = count
+                settle(state)
+
+        def transform_worker() -> None:
+            """转换阶段：对工作表做transfer/transient转换"""
+            while True:
+                item = read_queue.get()
+                if item is _STOP:
+                    return
+                state, processor, sheet_index, sheet_type, sheet_data = item
+                tick = time.perf_counter()
+                try:
+                    processed_data = processor._convert_sheet(sheet_index, sheet_type, sheet_data)
+                except Exception as e:
+                    print(f"  处理文件 {os.path.basename(state.excel_file)} 的第 {sheet_index} 个工作表时出错: {str(e)}")
+                    state.failed = True
+                    processed_data = None
+                elapsed = time.perf_counter() - tick
+                self.stats['transform'].add(elapsed)
+                settle(state, elapsed=elapsed)
+                write_queue.put((state, processor, sheet_index, sheet_type, processed_data))
+
+        def write_worker() -> None:
+            """写入阶段：按输出格式写入文件"""
+            while True:
+                item = write_queue.get()
+                if item is _STOP:
+                    return
+                state, processor, sheet_index, sheet_type, processed_data = item
+                tick = time.perf_counter()
+                if processed_data is not None:
+                    try:
+                        state.outputs[sheet_index] = processor._write_sheet(sheet_index, sheet_type, processed_data,
+                                                                            self.output_format)
+                    except Exception as e:
+                        print(f"  写入文件 {os.path.basename(state.excel_file)} 的第 {sheet_index} 个工作表时出错: {str(e)}")
+                        state.failed = True
+                elapsed = time.perf_counter() - tick
+                self.stats['write'].add(elapsed)
+                settle(state, done=1, elapsed=elapsed)
+
+        def run_stage(target: Callable[[], None], count: int, downstream: Optional["queue.Queue"],
+                      downstream_count: int) -> List[threading.Thread]:
+            """启动一个阶段的线程，最后一个线程结束时通知下游阶段结束"""
+            remaining = [count]
+
+            def wrapper() -> None:
+                try:
+                    target()
+                finally:
+                    with lock:
+                        remaining[0] -= 1
+                        last = remaining[0] == 0
+                    if last and downstream is not None:
+                        for _ in range(downstream_count):
+                            downstream.put(_STOP)
+
+            threads = [threading.Thread(target=wrapper, daemon=True) for _ in range(count)]
+            for thread in threads:
+                thread.start()
+            return threads
+
+        workers = self.stage_workers
+        threads = (run_stage(read_worker, workers['read'], read_queue, workers['transform'])
+                   + run_stage(transform_worker, workers['transform'], write_queue, workers['write'])
+                   + run_stage(write_worker, workers['write'], None, 0))
+
+        # 在调用线程中按完成顺序报告每个文件的结果
+        for _ in range(len(pending)):
+            state = finished.get()
+            file_name = os.path.basename(state.excel_file)
+            if state.processor is not None:
+                # 压缩输出时等待后台压缩线程写完该文件的所有输出
+                try:
+                    state.processor.finish_writes(cancel=state.failed)
+                except Exception as e:
+                    print(f"  写入文件 {file_name} 的压缩输出时出错: {str(e)}")
+                    state.failed = True
+            if state.failed:
+                outputs = []
+            else:
+                outputs = [state.outputs[i] for i in sorted(state.outputs)]
+                print(f"  成功处理文件: {file_name}")
+                print(f"  生成的CSV文件: {len(outputs)}")
+                outputs = collect_outputs(outputs, state.excel_file, state.processor.metrics)
+            on_result(state.excel_file, state.file_index, outputs, state.elapsed)
+
+        for thread in threads:
+            thread.join()
+
+        self.wall = time.perf_counter() - start
+        return self.stats
@@ -0,0 +1,408 @@
+"""
+Excel读取引擎的选择与工作簿打开
+
+支持的引擎：
+- xlrd: 只支持.xls
+- openpyxl: 只支持.xlsx，pandas以只读流式模式（read_only=True）打开工作簿
+- calamine: Rust实现的读取器（python-calamine），同时支持.xls和.xlsx，需要单独安装
+- auto: 按文件类型自动选择可用的最快引擎
+"""
+
+import os
+import zipfile
+import posixpath
+import importlib
+import importlib.util
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from .options import READER_ENGINES
+
+# 每个引擎依赖的Python模块
+_ENGINE_MODULES = {
+    'calamine': 'python_calamine',
+    'xlrd': 'xlrd',
+    'openpyxl': 'openpyxl',
+}
+
+# 进程内缓存的引擎版本，避免每个工作表都读取包的元数据
+_ENGINE_VERSIONS: Dict[str, str] = {}
+
+# 每个引擎支持的文件扩展名
+_ENGINE_EXTENSIONS = {
+    'calamine': ('.xls', '.xlsx'),
+    'xlrd': ('.xls',),
+    'openpyxl': ('.xlsx',),
+}
+
+# auto模式下按文件类型尝试的引擎顺序，越靠前越快
+_AUTO_PREFERENCE = {
+    '.xls': ['calamine', 'xlrd'],
+    '.xlsx': ['calamine', 'openpyxl'],
+}
+
+# .xlsx中的关系命名空间
+_RELATIONSHIP_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+
+def is_engine_available(engine: str) -> bool:
+    """
+    检查读取引擎是否可用
+
+    Args:
+        engine: 引擎名称
+
+    Returns:
+        引擎依赖已安装且当前pandas支持该引擎时返回True
+    """
+    if importlib.util.find_spec(_ENGINE_MODULES[engine]) is None:
+        return False
+
+    if engine == 'calamine':
+        # pandas 2.2 起才内置calamine读取器
+        return importlib.util.find_spec('pandas.io.excel._calamine') is not None
+
+    return True
+
+
+def available_engines() -> Dict[str, bool]:
+    """
+    列出所有具体引擎的可用情况
+
+    Returns:
+        引擎名称到是否可用的字典
+    """
+    return {engine: is_engine_available(engine) for engine in _ENGINE_MODULES}
+
+
+def engine_version(engine: str) -> str:
+    """
+    返回具体引擎的版本，用于工作表缓存的键（引擎升级后解码结果可能不同）
+
+    Args:
+        engine: 具体引擎名称（不能是'auto'）
+
+    Returns:
+        如 "calamine-0.4.0" 的字符串，无法获得版本时为 "calamine-unknown"
+    """
+    version = _ENGINE_VERSIONS.get(engine)
+    if version is None:
+        version = _ENGINE_VERSIONS[engine] = _package_version(_ENGINE_MODULES[engine])
+    return f"{engine}-{version}"
+
+
+def _package_version(module_name: str) -> str:
+    """
+    返回已安装的包的版本：优先读取包的元数据（importlib.metadata从Python 3.8起才有，
+    3.7使用importlib_metadata向后移植包），都不可用时使用模块的__version__属性
+
+    Args:
+        module_name: 模块名
+
+    Returns:
+        版本字符串，无法获得时为 "unknown"
+    """
+    for metadata_module in ('importlib.metadata', 'importlib_metadata'):
+        try:
+            metadata = importlib.import_module(metadata_module)
+        except ImportError:
+            continue
+        try:
+            return metadata.version(module_name.replace('_', '-'))
+        except metadata.PackageNotFoundError:
+            break
+
+    try:
+        return str(getattr(importlib.import_module(module_name), '__version__', 'unknown'))
+    except ImportError:
+        return 'unknown'
+
+
+def resolve_engine(file_path: str, engine: str = 'auto') -> str:
+    """
+    根据文件类型确定实际使用的读取引擎
+
+    Args:
+        file_path: Excel文件路径
+        engine: 引擎名称，'auto'表示自动选择
+
+    Returns:
+        实际使用的引擎名称
+    """
+    if engine not in READER_ENGINES:
+        raise ValueError(f"读取引擎必须是 {READER_ENGINES} 之一，而不是 {engine}")
+
+    extension = os.path.splitext(file_path)[1].lower()
+
+    if engine == 'auto':
+        candidates: List[str] = _AUTO_PREFERENCE.get(extension, [])
+        for candidate in candidates:
+            if is_engine_available(candidate):
+                return candidate
+        raise ImportError(f"没有可用于 {extension} 文件的读取引擎，请安装 {' 或 '.join(candidates)}")
+
+    if extension not in _ENGINE_EXTENSIONS[engine]:
+        raise ValueError(f"读取引擎 {engine} 不支持 {extension} 文件: {file_path}")
+
+    if not is_engine_available(engine):
+        raise ImportError(f"读取引擎 {engine} 不可用，请先安装 {_ENGINE_MODULES[engine].replace('_', '-')}")
+
+    return engine
+
+
+def open_workbook(file_path: str, engine: str = 'auto') -> pd.ExcelFile:
+    """
+    使用指定引擎打开工作簿
+
+    Args:
+        file_path: Excel文件路径
+        engine: 引擎名称，'auto'表示自动选择
+
+    Returns:
+        打开的pd.ExcelFile对象，调用方负责关闭
+    """
+    return pd.ExcelFile(file_path, engine=resolve_engine(file_path, engine))
+
+
+def list_sheet_names(file_path: str, engine: str = 'auto') -> List[str]:
+    """
+    只读取工作簿中的工作表名称，尽量不解码工作表内容
+
+    xlrd以按需加载模式打开，openpyxl（只读模式）和calamine本身就按需加载工作表。
+
+    Args:
+        file_path: Excel文件路径
+        engine: 引擎名称，'auto'表示自动选择
+
+    Returns:
+        工作表名称列表
+    """
+    resolved = resolve_engine(file_path, engine)
+
+    if resolved == 'xlrd':
+        import xlrd
+        book = xlrd.open_workbook(file_path, on_demand=True)
+        try:
+            return book.sheet_names()
+        finally:
+            book.release_resources()
+
+    with pd.ExcelFile(file_path, engine=resolved) as excel_file:
+        return list(excel_file.sheet_names)
+
+
+def preload_engines(engine: str = 'auto') -> None:
+    """
+    预先导入读取引擎及pandas中对应的读取器模块
+
+    用于工作进程初始化，避免第一个任务承担这些模块的导入开销。
+
+    Args:
+        engine: 引擎名称，'auto'表示导入所有可用引擎
+    """
+    engines = list(_ENGINE_MODULES) if engine == 'auto' else [engine]
+    for name in engines:
+        if not is_engine_available(name):
+            continue
+        importlib.import_module(_ENGINE_MODULES[name])
+        importlib.import_module(f"pandas.io.excel._{name}")
+
+
+def _local_name(tag: str) -> str:
+    """去掉XML标签的命名空间（兼容Transitional和Strict两种OOXML命名空间）"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _column_index(reference: str) -> int:
+    """把单元格引用（如 "C3"）的列部分转换为从0开始的列号"""
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - ord('A') + 1
+    return index - 1
+
+
+def _xlsx_sheet_paths(archive: zipfile.ZipFile) -> Dict[str, str]:
+    """返回.xlsx中工作表名称到其XML文件路径的字典"""
+    workbook_path = 'xl/workbook.xml'
+    targets = {}
+    for relationship in ET.fromstring(archive.read('xl/_rels/workbook.xml.rels')):
+        target = relationship.get('Target', '')
+        # 目标可以是相对于xl/的路径，也可以是以/开头的包内绝对路径
+        if target.startswith('/'):
+            target = target.lstrip('/')
+        else:
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(workbook_path), target))
+        targets[relationship.get('Id')] = target
+
+    paths = {}
+    for element in ET.fromstring(archive.read(workbook_path)).iter():
+        if _local_name(element.tag) == 'sheet':
+            relationship_id = element.get(f'{_RELATIONSHIP_NS}id')
+            if relationship_id in targets:
+                paths[element.get('name')] = targets[relationship_id]
+    return paths
+
+
+def _iter_xlsx_rows(archive: zipfile.ZipFile, sheet_path: str,
+                    rows: int) -> Iterator[List[tuple]]:
+    """
+    流式解析工作表XML，依次产出前rows行的单元格，读到第rows+1行时停止，不解压其余部分
+
+    Yields:
+        每行的 (列号, 类型, 值) 元组列表，类型为 's'（共享字符串序号）、'inlineStr'、'n' 等；
+        缺失的行产出空列表
+    """
+    expected = 1
+    with archive.open(sheet_path) as stream:
+        cells: List[tuple] = []
+        cell = None
+        for event, element in ET.iterparse(stream, events=('start', 'end')):
+            name = _local_name(element.tag)
+            if event == 'start':
+                if name == 'row':
+                    number = int(element.get('r', expected))
+                    # 跳过的空行
+                    while expected < min(number, rows + 1):
+                        yield []
+                        expected += 1
+                    if number > rows:
+                        return
+                    cells = []
+                elif name == 'c':
+                    cell = [_column_index(element.get('r', '')) if element.get('r') else len(cells),
+                            element.get('t', 'n'), None]
+                continue
+
+            if name == 'v' and cell is not None:
+                cell[2] = element.text
+            elif name == 't' and cell is not None and cell[1] == 'inlineStr':
+                cell[2] = (cell[2] or '') + (element.text or '')
+            elif name == 'c' and cell is not None:
+                cells.append(tuple(cell))
+                cell = None
+            elif name == 'row':
+                yield cells
+                expected += 1
+                if expected > rows:
+                    return
+            elif name == 'sheetData':
+                break
+            element.clear()
+
+    while expected <= rows:
+        yield []
+        expected += 1
+
+
+def _read_shared_strings(archive: zipfile.ZipFile, count: int) -> List[str]:
+    """流式读取前count个共享字符串，读够后停止"""
+    strings: List[str] = []
+    if count <= 0 or 'xl/sharedStrings.xml' not in archive.namelist():
+        return strings
+
+    with archive.open('xl/sharedStrings.xml') as stream:
+        parts: List[str] = []
+        for _, element in ET.iterparse(stream, events=('end',)):
+            name = _local_name(element.tag)
+            if name == 't':
+                parts.append(element.text or '')
+            elif name == 'si':
+                strings.append(''.join(parts))
+                parts = []
+                element.clear()
+                if len(strings) >= count:
+                    break
+    return strings
+
+
+def _read_xlsx_preambles(file_path: str, sheet_names: List[str], rows: int) -> Dict[str, List[List[object]]]:
+    """直接读取.xlsx压缩包中各工作表XML的开头部分"""
+    with zipfile.ZipFile(file_path) as archive:
+        sheet_paths = _xlsx_sheet_paths(archive)
+        raw = {name: list(_iter_xlsx_rows(archive, sheet_paths[name], rows)) for name in sheet_names}
+
+        needed = [int(value) for cells in raw.values() for row in cells
+                  for _, kind, value in row if kind == 's' and value is not None]
+        shared = _read_shared_strings(archive, max(needed) + 1 if needed else 0)
+
+    preambles = {}
+    for name, cells in raw.items():
+        preamble = []
+        for row in cells:
+            values: List[object] = [None] * (max((column for column, _, _ in row), default=-1) + 1)
+            for column, kind, value in row:
+                if value is None:
+                    continue
+                if kind == 's':
+                    values[column] = shared[int(value)]
+                elif kind in ('inlineStr', 'str'):
+                    values[column] = value
+                elif kind == 'b':
+                    values[column] = value == '1'
+                elif kind == 'n':
+                    values[column] = float(value)
+                else:
+                    values[column] = value
+            preamble.append(values)
+        preambles[name] = preamble
+    return preambles
+
+
+def read_preambles(file_path: str, sheet_names: List[str], rows: int, engine: str = 'auto',
+                   excel_file: Optional[pd.ExcelFile] = None) -> Dict[str, List[List[object]]]:
+    """
+    只读取工作表开头的几行，不解码整个工作表
+
+    - .xlsx: 直接流式解析压缩包中每个工作表XML的开头，读够rows行即停止，与读取引擎无关
+      （calamine即使只取前几行也会先解码整个工作表）
+    - .xls: xlrd以按需加载模式只加载所需的工作表，读取前几行
+    - 其他情况（如.xlsx结构异常）使用读取引擎解析前rows行
+
+    Args:
+        file_path: Excel文件路径
+        sheet_names: 要读取的工作表名称
+        rows: 读取的行数
+        engine: 引擎名称，回退到读取引擎时使用
+        excel_file: 已打开的工作簿，回退到读取引擎时复用，避免重新打开
+
+    Returns:
+        工作表名称到前rows行单元格值的字典，每行为一个列表，空单元格为None
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+
+    if extension == '.xlsx':
+        try:
+            return _read_xlsx_preambles(file_path, sheet_names, rows)
+        except (KeyError, ValueError, IndexError, zipfile.BadZipFile, ET.ParseError):
+            pass
+    elif extension == '.xls' and is_engine_available('xlrd'):
+        import xlrd
+        book = xlrd.open_workbook(file_path, on_demand=True)
+        try:
+            preambles = {}
+            for name in sheet_names:
+                sheet = book.sheet_by_name(name)
+                preambles[name] = [
+                    [None if value == '' else value for value in sheet.row_values(r)]
+                    for r in range(min(rows, sheet.nrows))
+                ]
+                book.unload_sheet(name)
+            return preambles
+        finally:
+            book.release_resources()
+
+    def parse(workbook: pd.ExcelFile) -> Dict[str, List[List[object]]]:
+        return {
+            name: [[None if pd.isna(value) else value for value in row]
+                   for row in workbook.parse(name, header=None, nrows=rows).values.tolist()]
+            for name in sheet_names
+        }
+
+    if excel_file is not None:
+        return parse(excel_file)
+    with open_workbook(file_path, engine) as workbook:
+        return parse(workbook)
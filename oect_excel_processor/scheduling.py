@@ -0,0 +1,223 @@
+"""
+批处理的任务调度策略
+
+- natural: 按自然排序的顺序处理（默认）
+- largest-first: 按文件大小从大到小处理，避免批次末尾的大文件让其他工作进程空等
+- cost-model: 按学习到的耗时模型估计每个文件的处理时间，从长到短处理
+
+调度只改变处理顺序，文件序号（file_index）和输出文件名仍由自然排序决定。
+
+此外提供内存预算下的准入估计：按文件大小、文件类型和工作表类型估计每个文件处理时的内存占用，
+多进程处理时只在估计总量不超过预算时才把新文件交给工作进程。
+"""
+
+import os
+import json
+from typing import Dict, List, Optional, Tuple
+
+from .manifest import write_json_atomic
+
+
+# 可选的调度策略
+SCHEDULE_POLICIES = ('natural', 'largest-first', 'cost-model')
+
+# 耗时模型文件名，保存在输出目录中
+COST_MODEL_FILENAME = ".oect_cost_model.json"
+
+# 每MB输入文件在处理时大约占用的内存（MB）：xlsx是压缩格式，解压和解析后膨胀得更多
+MEMORY_PER_INPUT_MB = {
+    '.xls': 6.0,
+    '.xlsx': 40.0,
+}
+
+# 不同工作表类型的相对内存系数：transient工作表读取为object类型并在合并时复制列对
+SHEET_TYPE_MEMORY_WEIGHTS = {
+    'transfer': 1.0,
+    'transient': 1.5,
+    # 自动识别的类型在打开文件之前未知，按占用较多的transient估计
+    'auto': 1.5,
+}
+
+# 每个工作进程本身（解释器、pandas和读取模块）的内存占用（MB）
+WORKER_BASE_MEMORY_MB = 120.0
+
+# 内存大小的单位，以MB为基准
+_SIZE_UNITS = {'K': 1 / 1024, 'M': 1.0, 'G': 1024.0, 'T': 1024.0 * 1024.0}
+
+
+class CostModel:
+    """
+    按文件扩展名学习的处理耗时模型
+
+    对每种扩展名用最小二乘拟合 耗时 = 固定开销 + 每字节耗时 × 文件大小，
+    只保存拟合所需的累计量，每次运行结束后合并本次的观测结果。
+    """
+
+    def __init__(self, output_dir: Optional[str] = None):
+        """
+        初始化CostModel类
+
+        Args:
+            output_dir: 输出目录，模型保存在其中；不指定则使用当前目录
+        """
+        self.path = os.path.join(output_dir or os.curdir, COST_MODEL_FILENAME)
+        # 扩展名 -> 累计量 {n, sx, sy, sxx, sxy}，x为文件字节数，y为耗时秒数
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    @classmethod
+    def load(cls, output_dir: Optional[str] = None) -> 'CostModel':
+        """
+        从输出目录加载耗时模型，不存在或损坏时返回空模型
+
+        Args:
+            output_dir: 输出目录
+
+        Returns:
+            CostModel实例
+        """
+        model = cls(output_dir)
+        if os.path.exists(model.path):
+            try:
+                with open(model.path, 'r', encoding='utf-8') as f:
+                    model.stats = json.load(f).get("stats", {})
+            except (OSError, ValueError):
+                model.stats = {}
+        return model
+
+    def save(self) -> None:
+        """保存耗时模型"""
+        write_json_atomic(self.path, {"stats": self.stats})
+
+    def observe(self, excel_file: str, elapsed: float) -> None:
+        """
+        记录一个文件的实际处理耗时
+
+        Args:
+            excel_file: Excel文件路径
+            elapsed: 处理耗时（秒）
+        """
+        extension = os.path.splitext(excel_file)[1].lower()
+        size = float(os.path.getsize(excel_file))
+        stats = self.stats.setdefault(extension, {"n": 0.0, "sx": 0.0, "sy": 0.0, "sxx": 0.0, "sxy": 0.0})
+        stats["n"] += 1
+        stats["sx"] += size
+        stats["sy"] += elapsed
+        stats["sxx"] += size * size
+        stats["sxy"] += size * elapsed
+
+    def coefficients(self, extension: str) -> Optional[Tuple[float, float]]:
+        """
+        返回某种扩展名拟合得到的 (固定开销, 每字节耗时)
+
+        Args:
+            extension: 文件扩展名，如'.xls'
+
+        Returns:
+            系数元组，没有观测数据时返回None
+        """
+        stats = self.stats.get(extension)
+        if not stats or stats["n"] == 0:
+            return None
+
+        n, sx, sy, sxx, sxy = stats["n"], stats["sx"], stats["sy"], stats["sxx"], stats["sxy"]
+        denominator = n * sxx - sx * sx
+        if n >= 2 and denominator > 0:
+            per_byte = (n * sxy - sx * sy) / denominator
+            overhead = (sy - per_byte * sx) / n
+            if per_byte > 0 and overhead >= 0:
+                return overhead, per_byte
+
+        # 观测点不足、文件大小相近或拟合结果不合理时，退化为按平均每字节耗时估计
+        return 0.0, sy / sx if sx > 0 else 0.0
+
+    def estimate(self, excel_file: str) -> float:
+        """
+        估计一个文件的处理耗时
+
+        Args:
+            excel_file: Excel文件路径
+
+        Returns:
+            估计的耗时（秒）；该扩展名没有观测数据时按所有扩展名的平均每字节耗时估计，
+            完全没有观测数据时返回文件大小，仍可用于排序
+        """
+        size = float(os.path.getsize(excel_file))
+        coefficients = self.coefficients(os.path.splitext(excel_file)[1].lower())
+        if coefficients is None:
+            total_bytes = sum(stats["sx"] for stats in self.stats.values())
+            total_seconds = sum(stats["sy"] for stats in self.stats.values())
+            return size * total_seconds / total_bytes if total_bytes > 0 else size
+        overhead, per_byte = coefficients
+        return overhead + per_byte * size
+
+
+def order_tasks(pending: List[Tuple[str, int]], policy: str = 'natural',
+                cost_model: Optional[CostModel] = None) -> List[Tuple[str, int]]:
+    """
+    按调度策略确定待处理文件的处理顺序
+
+    Args:
+        pending: 按自然排序排列的 (Excel文件路径, 文件序号) 列表
+        policy: 调度策略，'natural'、'largest-first'或'cost-model'
+        cost_model: cost-model策略使用的耗时模型
+
+    Returns:
+        重新排序后的列表；估计值相同时保持自然排序的先后顺序
+    """
+    if policy not in SCHEDULE_POLICIES:
+        raise ValueError(f"调度策略必须是 {SCHEDULE_POLICIES} 之一，而不是 {policy}")
+
+    if policy == 'natural':
+        return list(pending)
+
+    if policy == 'cost-model' and cost_model is not None:
+        cost = {excel_file: cost_model.estimate(excel_file) for excel_file, _ in pending}
+    else:
+        cost = {excel_file: float(os.path.getsize(excel_file)) for excel_file, _ in pending}
+
+    # sorted是稳定排序，耗时相同的文件保持原有顺序
+    return sorted(pending, key=lambda task: -cost[task[0]])
+
+
+def parse_memory_size(value: str) -> float:
+    """
+    解析内存大小，如 "4096"、"512M"、"8G"，不带单位时按MB计
+
+    Args:
+        value: 内存大小字符串
+
+    Returns:
+        以MB为单位的大小
+    """
+    text = value.strip().upper().rstrip('B')
+    unit = 1.0
+    if text and text[-1] in _SIZE_UNITS:
+        unit = _SIZE_UNITS[text[-1]]
+        text = text[:-1]
+    try:
+        size = float(text) * unit
+    except ValueError:
+        raise ValueError(f"无法解析内存大小: {value}，示例: 4096、512M、8G")
+    if size <= 0:
+        raise ValueError(f"内存大小必须为正数，而不是 {value}")
+    return size
+
+
+def estimate_memory(excel_file: str, sheet_types: List[str]) -> float:
+    """
+    估计处理一个文件时工作进程占用的内存
+
+    估计值 = 工作进程基础占用 + 文件大小 × 该文件类型的膨胀系数 × 工作表类型的平均系数。
+    工作表数量在打开文件之前未知，按类型序列中各类型的平均系数估计。
+
+    Args:
+        excel_file: Excel文件路径
+        sheet_types: 类型序列
+
+    Returns:
+        估计的内存占用（MB）
+    """
+    size_mb = os.path.getsize(excel_file) / (1 << 20)
+    per_mb = MEMORY_PER_INPUT_MB.get(os.path.splitext(excel_file)[1].lower(), max(MEMORY_PER_INPUT_MB.values()))
+    weights = [SHEET_TYPE_MEMORY_WEIGHTS.get(sheet_type, 1.0) for sheet_type in sheet_types] or [1.0]
+    return WORKER_BASE_MEMORY_MB + size_mb * per_mb * sum(weights) / len(weights)
@@ -0,0 +1,578 @@
+"""
+本地处理服务：常驻进程池 + 持久化任务队列 + HTTP接口
+
+多个工具需要转换文件时，不必各自启动Python进程并导入pandas，而是把任务提交给同一个常驻服务。
+服务监听本机TCP端口（默认127.0.0.1）或Unix套接字，接口均为JSON：
+
+- POST /jobs: 提交任务，返回任务记录（202）。请求体字段：
+    path（必需，Excel文件或目录）、sheet_types、pattern（目录）、output_dir（默认为输入所在目录）、
+    output_prefix、output_format、incremental（目录）以及处理选项 engine、transient_engine、
+    dtype、precision、compression、compression_level、cache_dir、cache_size
+- GET /jobs: 列出所有任务
+- GET /jobs/<id>: 查询任务状态（queued、running、done、failed、cancelled）
+- GET /jobs/<id>/outputs: 获取已完成任务的输出文件列表，未完成时返回409
+- DELETE /jobs/<id>: 取消排队中的任务
+- GET /health: 服务状态
+
+任务队列保存在状态目录的 jobs.json 中，每次状态变化后立即原子写入。服务重启后，排队中的任务继续处理，
+中断时正在处理的任务重新排队。同时处理的任务数不超过工作进程数，排队的任务数超过上限时拒绝新任务（503）。
+"""
+
+import os
+import json
+import stat
+import errno
+import time
+import uuid
+import signal
+import socket
+import threading
+import socketserver
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from .manifest import write_json_atomic
+from .options import DEFAULT_SERVE_HOST, DEFAULT_SERVE_PORT, DEFAULT_MAX_QUEUED
+
+
+# 任务队列文件名，保存在状态目录中
+JOBS_FILENAME = "jobs.json"
+
+# 任务队列文件格式版本
+JOBS_VERSION = 1
+
+# 任务状态
+JOB_STATUSES = ('queued', 'running', 'done', 'failed', 'cancelled')
+
+# 已结束的任务最多保留的条数，超出时删除最早结束的记录
+MAX_FINISHED_JOBS = 1000
+
+# 请求体的最大字节数
+MAX_REQUEST_BYTES = 1 << 20
+
+# 传给ExcelProcessor/BatchExcelProcessor的处理选项
+PROCESSOR_OPTIONS = ('engine', 'transient_engine', 'dtype', 'precision', 'compression', 'compression_level',
+                     'cache_dir', 'cache_size')
+
+# 请求体中允许的字段
+JOB_FIELDS = ('path', 'sheet_types', 'pattern', 'output_dir', 'output_prefix', 'output_format',
+              'incremental') + PROCESSOR_OPTIONS
+
+# 任务队列文件中每个任务记录的字段
+JOB_RECORD_FIELDS = ('id', 'status', 'spec', 'submitted', 'started', 'finished', 'outputs', 'failed_files', 'error')
+
+# 任务参数中必需的字段（目录任务另外需要pattern和incremental）
+JOB_SPEC_FIELDS = ('kind', 'path', 'sheet_types', 'output_dir', 'output_prefix', 'output_format')
+
+
+def _timestamp() -> str:
+    """返回当前时间的字符串"""
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def build_job_spec(request: Dict[str, object]) -> Dict[str, object]:
+    """
+    检查并补全提交的任务，在服务进程中构造一次处理器以便立即报告参数错误
+
+    Args:
+        request: 请求体中的JSON对象
+
+    Returns:
+        补全默认值后的任务参数，kind为'file'或'directory'
+    """
+    from .excel_processor import ExcelProcessor
+    from .batch_processor import BatchExcelProcessor
+    from .writers import check_output_format
+
+    if not isinstance(request, dict):
+        raise ValueError("请求体必须是JSON对象")
+    unknown = sorted(set(request) - set(JOB_FIELDS))
+    if unknown:
+        raise ValueError(f"未知的字段: {', '.join(unknown)}，可用字段: {', '.join(JOB_FIELDS)}")
+    if not isinstance(request.get('path'), str) or not request['path']:
+        raise ValueError("缺少path字段（Excel文件或目录的路径）")
+
+    path = os.path.abspath(request['path'])
+    kind = 'directory' if os.path.isdir(path) else 'file'
+    sheet_types = request.get('sheet_types', ['transfer', 'transient'])
+    if isinstance(sheet_types, str):
+        sheet_types = sheet_types.split(',')
+
+    spec = {
+        "kind": kind,
+        "path": path,
+        "sheet_types": list(sheet_types),
+        "output_dir": os.path.abspath(request.get('output_dir') or (path if kind == 'directory'
+                                                                    else os.path.dirname(path))),
+        "output_prefix": request.get('output_prefix', 'batch_output' if kind == 'directory' else 'output'),
+        "output_format": request.get('output_format', 'csv'),
+    }
+    options = {key: request[key] for key in PROCESSOR_OPTIONS if request.get(key) is not None}
+    if 'cache_dir' in options:
+        options['cache_dir'] = os.path.abspath(options['cache_dir'])
+    spec.update(options)
+
+    check_output_format(spec["output_format"])
+    if options.get('compression') is not None and spec["output_format"] != 'csv':
+        raise ValueError(f"压缩只用于CSV输出，{spec['output_format']} 格式已内置压缩")
+
+    if kind == 'directory':
+        spec["pattern"] = request.get('pattern', '*.xls')
+        spec["incremental"] = bool(request.get('incremental', False))
+        BatchExcelProcessor(path, spec["pattern"], spec["sheet_types"], spec["output_prefix"], **options)
+    else:
+        for field in ('pattern', 'incremental'):
+            if field in request:
+                raise ValueError(f"{field} 字段只用于目录任务")
+        ExcelProcessor(path, spec["sheet_types"], os.path.join(spec["output_dir"], spec["output_prefix"]),
+                       **options)
+    return spec
+
+
+def _init_serve_worker() -> None:
+    """
+    进程池的初始化函数：忽略Ctrl+C（由服务进程等待正在处理的任务完成），预先导入读取引擎和CSV输出模块
+    """
+    from .readers import preload_engines
+    from .writers import preload_format
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    preload_engines('auto')
+    preload_format('csv')
+
+
+def _run_job(spec: Dict[str, object]) -> Dict[str, List[str]]:
+    """
+    工作进程中执行一个任务
+
+    Args:
+        spec: build_job_spec返回的任务参数
+
+    Returns:
+        包含outputs（所有输出文件路径）和failed_files（处理失败的Excel文件，只用于目录任务）的字典
+    """
+    from .excel_processor import ExcelProcessor
+    from .batch_processor import BatchExcelProcessor
+
+    options = {key: spec[key] for key in PROCESSOR_OPTIONS if key in spec}
+    os.makedirs(spec["output_dir"], exist_ok=True)
+
+    if spec["kind"] == 'file':
+        processor = ExcelProcessor(spec["path"], spec["sheet_types"],
+                                   os.path.join(spec["output_dir"], spec["output_prefix"]), **options)
+        return {"outputs": list(processor.process_and_save(spec["output_format"])), "failed_files": []}
+
+    processor = BatchExcelProcessor(spec["path"], spec["pattern"], spec["sheet_types"], spec["output_prefix"],
+                                    **options)
+    results = processor.process_all_files(output_dir=spec["output_dir"], output_format=spec["output_format"],
+                                          incremental=spec["incremental"])
+    return {
+        "outputs": [path for outputs in results.values() for path in outputs],
+        "failed_files": [excel_file for excel_file, outputs in results.items() if not outputs],
+    }
+
+
+def _job_problem(job: object) -> Optional[str]:
+    """
+    检查从任务队列文件中读取的任务记录
+
+    Args:
+        job: 任务记录
+
+    Returns:
+        记录不完整或取值无效时返回原因，否则返回None
+    """
+    if not isinstance(job, dict):
+        return "不是JSON对象"
+    missing = [field for field in JOB_RECORD_FIELDS if field not in job]
+    if missing:
+        return f"缺少字段 {missing}"
+    if not isinstance(job["id"], str) or not job["id"]:
+        return f"任务ID无效: {job['id']!r}"
+    if job["status"] not in JOB_STATUSES:
+        return f"任务 {job['id']} 的状态无效: {job['status']!r}"
+    spec = job["spec"]
+    if not isinstance(spec, dict) or spec.get("kind") not in ('file', 'directory'):
+        return f"任务 {job['id']} 的参数无效"
+    required = JOB_SPEC_FIELDS + (('pattern', 'incremental') if spec["kind"] == 'directory' else ())
+    missing = [field for field in required if field not in spec]
+    if missing:
+        return f"任务 {job['id']} 的参数缺少字段 {missing}"
+    if not isinstance(job["outputs"], list) or not isinstance(job["failed_files"], list):
+        return f"任务 {job['id']} 的输出列表无效"
+    return None
+
+
+class JobQueue:
+    """
+    持久化的任务队列，所有方法都是线程安全的
+    """
+
+    def __init__(self, state_dir: str, max_queued: int = DEFAULT_MAX_QUEUED):
+        """
+        初始化JobQueue类，加载状态目录中已有的任务
+
+        Args:
+            state_dir: 状态目录，任务队列保存在其中的 jobs.json
+            max_queued: 最多排队的任务数
+        """
+        os.makedirs(state_dir, exist_ok=True)
+        self.path = os.path.join(state_dir, JOBS_FILENAME)
+        self.max_queued = max_queued
+        self.jobs: Dict[str, Dict[str, object]] = {}
+        self._changed = threading.Condition()
+        self._load()
+
+    def _load(self) -> None:
+        """加载任务队列，中断时正在处理的任务重新排队"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"  无法读取任务队列 {self.path}，从空队列开始: {str(e)}")
+            return
+        if not isinstance(data, dict) or data.get("version") != JOBS_VERSION:
+            print(f"  任务队列 {self.path} 的格式或版本不符，从空队列开始")
+            return
+        jobs = data.get("jobs", [])
+        if not isinstance(jobs, list):
+            print(f"  任务队列 {self.path} 中的 jobs 不是列表，从空队列开始")
+            return
+
+        for position, job in enumerate(jobs):
+            problem = _job_problem(job)
+            if problem:
+                print(f"  跳过任务队列中的第 {position + 1} 个任务: {problem}")
+                continue
+            if job["status"] == 'running':
+                job["status"] = 'queued'
+                job["started"] = None
+            self.jobs[job["id"]] = job
+        requeued = sum(1 for job in self.jobs.values() if job["status"] == 'queued')
+        if requeued:
+            print(f"从任务队列中恢复 {requeued} 个未完成的任务")
+
+    def _save(self) -> None:
+        """保存任务队列（调用方持有锁），只保留最近结束的MAX_FINISHED_JOBS个任务"""
+        finished = [job for job in self.jobs.values() if job["status"] not in ('queued', 'running')]
+        for job in sorted(finished, key=lambda job: job["finished"] or '')[:-MAX_FINISHED_JOBS or None]:
+            del self.jobs[job["id"]]
+        write_json_atomic(self.path, {"version": JOBS_VERSION, "jobs": list(self.jobs.values())})
+
+    def counts(self) -> Dict[str, int]:
+        """返回各状态的任务数"""
+        with self._changed:
+            return {status: sum(1 for job in self.jobs.values() if job["status"] == status)
+                    for status in JOB_STATUSES}
+
+    def submit(self, spec: Dict[str, object]) -> Dict[str, object]:
+        """
+        加入一个任务
+
+        Args:
+            spec: build_job_spec返回的任务参数
+
+        Returns:
+            任务记录；排队的任务数已达上限时返回None
+        """
+        with self._changed:
+            if sum(1 for job in self.jobs.values() if job["status"] == 'queued') >= self.max_queued:
+                return None
+            job = {"id": uuid.uuid4().hex, "status": 'queued', "spec": spec, "submitted": _timestamp(),
+                   "started": None, "finished": None, "outputs": [], "failed_files": [], "error": None}
+            self.jobs[job["id"]] = job
+            self._save()
+            self._changed.notify_all()
+            return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, object]]:
+        """返回任务记录的副本，任务不存在时返回None"""
+        with self._changed:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def all(self) -> List[Dict[str, object]]:
+        """按提交顺序返回所有任务记录的副本"""
+        with self._changed:
+            return [dict(job) for job in self.jobs.values()]
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        取消排队中的任务
+
+        Returns:
+            取消前的任务状态，任务不存在时返回None；只有queued状态的任务会被取消
+        """
+        with self._changed:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            status = job["status"]
+            if status == 'queued':
+                job["status"] = 'cancelled'
+                job["finished"] = _timestamp()
+                self._save()
+            return status
+
+    def take(self, timeout: float) -> Optional[Dict[str, object]]:
+        """
+        取出最早提交的排队任务并标记为running，没有任务时最多等待timeout秒
+
+        Returns:
+            任务记录的副本，超时返回None
+        """
+        with self._changed:
+            deadline = time.monotonic() + timeout
+            while True:
+                job = next((job for job in self.jobs.values() if job["status"] == 'queued'), None)
+                if job is not None:
+                    job["status"] = 'running'
+                    job["started"] = _timestamp()
+                    self._save()
+                    return dict(job)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._changed.wait(remaining)
+
+    def finish(self, job_id: str, outputs: List[str], failed_files: List[str], error: Optional[str]) -> None:
+        """记录任务的处理结果"""
+        with self._changed:
+            job = self.jobs[job_id]
+            job["status"] = 'failed' if error else 'done'
+            job["finished"] = _timestamp()
+            job["outputs"] = outputs
+            job["failed_files"] = failed_files
+            job["error"] = error
+            self._save()
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """监听Unix套接字的多线程HTTP服务器"""
+
+    daemon_threads = True
+
+    def server_bind(self) -> None:
+        # 只删除上次运行遗留、已无服务监听的套接字文件
+        path = self.server_address
+        if os.path.lexists(path):
+            if not stat.S_ISSOCK(os.lstat(path).st_mode):
+                raise FileExistsError(errno.EEXIST, f"{path} 已存在且不是套接字文件，请指定其他路径")
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except OSError:
+                os.remove(path)
+            else:
+                raise OSError(errno.EADDRINUSE, f"已有服务在监听套接字 {path}")
+            finally:
+                probe.close()
+        super().server_bind()
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """JSON接口的请求处理"""
+
+    server_version = "oect-processor"
+    # 由ProcessingServer设置
+    service: 'ProcessingServer' = None
+
+    def log_message(self, format: str, *args) -> None:
+        # 只打印任务状态变化，不逐条打印请求
+        pass
+
+    def address_string(self) -> str:
+        # Unix套接字的客户端地址为空字符串
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'local'
+
+    def _send(self, status: int, body: Dict[str, object]) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _content_length(self) -> Optional[int]:
+        """
+        返回请求体的字节数；缺少、无效或过大时发送错误响应并返回None
+
+        请求体没有被读取，因此出错时关闭连接，以免剩余的数据被当作下一个请求。
+        """
+        value = self.headers.get('Content-Length')
+        try:
+            length = int(value) if value is not None else None
+        except ValueError:
+            length = -1
+        if length is None:
+            status, error = 411, "缺少Content-Length"
+        elif length < 0:
+            status, error = 400, f"无效的Content-Length: {value}"
+        elif length > MAX_REQUEST_BYTES:
+            status, error = 413, f"请求体超过 {MAX_REQUEST_BYTES} 字节"
+        else:
+            return length
+        self.close_connection = True
+        self._send(status, {"error": error})
+        return None
+
+    def _route(self) -> Tuple[List[str], Optional[Dict[str, object]]]:
+        """返回路径的各部分，以及路径中任务ID对应的任务记录"""
+        parts = [part for part in self.path.split('?', 1)[0].split('/') if part]
+        job = self.service.queue.get(parts[1]) if len(parts) >= 2 and parts[0] == 'jobs' else None
+        return parts, job
+
+    def do_GET(self) -> None:
+        parts, job = self._route()
+        if parts == ['health']:
+            self._send(200, {"status": "ok", "workers": self.service.max_workers,
+                             "jobs": self.service.queue.counts()})
+        elif parts == ['jobs']:
+            self._send(200, {"jobs": self.service.queue.all()})
+        elif len(parts) in (2, 3) and parts[0] == 'jobs' and job is None:
+            self._send(404, {"error": f"任务不存在: {parts[1]}"})
+        elif len(parts) == 2 and parts[0] == 'jobs':
+            self._send(200, job)
+        elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'outputs':
+            if job["status"] in ('queued', 'running'):
+                self._send(409, {"error": f"任务尚未完成，当前状态: {job['status']}", "status": job["status"]})
+            else:
+                self._send(200, {"status": job["status"], "outputs": job["outputs"],
+                                 "failed_files": job["failed_files"], "error": job["error"]})
+        else:
+            self._send(404, {"error": f"未知的路径: {self.path}"})
+
+    def do_POST(self) -> None:
+        parts, _ = self._route()
+        if parts != ['jobs']:
+            self._send(404, {"error": f"未知的路径: {self.path}"})
+            return
+
+        length = self._content_length()
+        if length is None:
+            return
+        try:
+            spec = build_job_spec(json.loads(self.rfile.read(length).decode('utf-8') or 'null'))
+        except (ValueError, TypeError, FileNotFoundError, NotADirectoryError, ImportError) as e:
+            self._send(400, {"error": str(e)})
+            return
+
+        job = self.service.queue.submit(spec)
+        if job is None:
+            self._send(503, {"error": f"排队的任务已达上限 {self.service.queue.max_queued}，请稍后重试"})
+            return
+        print(f"收到任务 {job['id']}: {spec['path']}")
+        self._send(202, job)
+
+    def do_DELETE(self) -> None:
+        parts, _ = self._route()
+        if len(parts) != 2 or parts[0] != 'jobs':
+            self._send(404, {"error": f"未知的路径: {self.path}"})
+            return
+        status = self.service.queue.cancel(parts[1])
+        if status is None:
+            self._send(404, {"error": f"任务不存在: {parts[1]}"})
+        elif status != 'queued':
+            self._send(409, {"error": f"只能取消排队中的任务，当前状态: {status}", "status": status})
+        else:
+            print(f"已取消任务 {parts[1]}")
+            self._send(200, self.service.queue.get(parts[1]))
+
+
+class ProcessingServer:
+    """
+    常驻的处理服务
+    """
+
+    def __init__(self, state_dir: str, host: str = DEFAULT_SERVE_HOST, port: int = DEFAULT_SERVE_PORT,
+                 socket_path: Optional[str] = None, max_workers: Optional[int] = None,
+                 max_queued: int = DEFAULT_MAX_QUEUED):
+        """
+        初始化ProcessingServer类
+
+        Args:
+            state_dir: 状态目录，保存持久化的任务队列
+            host: 监听的地址，默认只接受本机连接
+            port: 监听的端口，0表示由系统分配
+            socket_path: Unix套接字路径，指定时监听该套接字而不是TCP端口
+            max_workers: 工作进程数，即同时处理的最大任务数，默认为None（使用CPU核心数）
+            max_queued: 最多排队的任务数，超出时拒绝新任务
+        """
+        if max_queued < 1:
+            raise ValueError(f"最大排队任务数必须是正整数，而不是 {max_queued}")
+        if socket_path is not None and not hasattr(socket, 'AF_UNIX'):
+            raise ValueError("当前平台不支持Unix套接字，请使用TCP端口")
+
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.queue = JobQueue(state_dir, max_queued)
+        self.socket_path = socket_path
+
+        handler = type('Handler', (_Handler,), {"service": self})
+        if socket_path is not None:
+            self.httpd = _UnixHTTPServer(socket_path, handler)
+        else:
+            self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.address = socket_path or f"http://{self.httpd.server_address[0]}:{self.httpd.server_address[1]}"
+
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._stop = threading.Event()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _on_done(self, job: Dict[str, object], future: Future) -> None:
+        """记录任务结果并释放一个处理名额"""
+        try:
+            result = future.result()
+            self.queue.finish(job["id"], result["outputs"], result["failed_files"], None)
+            print(f"任务 {job['id']} 已完成: {len(result['outputs'])} 个输出文件")
+        except Exception as e:
+            self.queue.finish(job["id"], [], [], str(e))
+            print(f"任务 {job['id']} 失败: {str(e)}")
+        finally:
+            self._slots.release()
+
+    def _dispatch(self) -> None:
+        """调度线程：有空闲名额时从队列中取出任务提交到进程池"""
+        while not self._stop.is_set():
+            if not self._slots.acquire(timeout=0.5):
+                continue
+            job = self.queue.take(timeout=0.5)
+            if job is None:
+                self._slots.release()
+                continue
+            print(f"开始处理任务 {job['id']}: {job['spec']['path']}")
+            future = self._executor.submit(_run_job, job["spec"])
+            future.add_done_callback(lambda done, job=job: self._on_done(job, done))
+
+    def serve_forever(self) -> None:
+        """启动进程池和调度线程并处理请求，直到shutdown被调用或收到Ctrl+C"""
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_serve_worker) as executor:
+            self._executor = executor
+            # 提前创建所有工作进程，第一个任务不需要等待进程启动和模块导入
+            for future in [executor.submit(os.getpid) for _ in range(self.max_workers)]:
+                future.result()
+
+            dispatcher = threading.Thread(target=self._dispatch, name="oect-dispatch", daemon=True)
+            dispatcher.start()
+            print(f"处理服务已启动: {self.address}，工作进程数: {self.max_workers}（Ctrl+C 停止）")
+            try:
+                self.httpd.serve_forever()
+            except KeyboardInterrupt:
+                print("\n正在停止服务，等待正在处理的任务完成（排队的任务保留到下次启动）...")
+            finally:
+                self._stop.set()
+                dispatcher.join()
+                self.httpd.server_close()
+                if self.socket_path is not None and os.path.exists(self.socket_path):
+                    os.remove(self.socket_path)
+        print("处理服务已停止")
+
+    def shutdown(self) -> None:
+        """停止服务（从其他线程调用），正在处理的任务会处理完成"""
+        self.httpd.shutdown()
+
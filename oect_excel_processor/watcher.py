@@ -0,0 +1,362 @@
+"""
+监视目录，在新的或修改过的工作簿写入完成后立即处理
+
+- 变更来源：安装了watchdog时使用操作系统的文件事件（Linux上为inotify），否则定期轮询目录。
+  网络共享目录上其他机器写入的文件通常不会产生本机的文件事件，这时应使用轮询
+- 写入完成的判断：文件大小和修改时间在settle秒内不再变化，且可以打开读取
+- 处理：启动时创建一个常驻的进程池，工作进程预先导入读取引擎和输出模块，之后每个文件直接提交，
+  不需要重新启动进程，也不需要重新扫描整个目录
+- 状态：使用增量模式的清单（输出目录中的 .oect_manifest.json），每处理完一个文件立即保存。
+  重新启动时跳过未变化的文件，已处理过的文件沿用清单中的文件序号，新文件的序号接在最大序号之后，
+  输出文件名不会因为新文件的加入而改变
+"""
+
+import os
+import time
+import queue
+import signal
+import fnmatch
+import threading
+import importlib
+import importlib.util
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from natsort import natsorted
+
+from .manifest import BatchManifest
+from .options import WATCH_BACKENDS, DEFAULT_SETTLE_SECONDS, DEFAULT_POLL_INTERVAL
+
+if TYPE_CHECKING:
+    from .batch_processor import BatchExcelProcessor
+
+
+# 主循环检查事件和文件状态的间隔（秒）
+TICK_SECONDS = 0.2
+
+# Excel打开文件时在同一目录下创建的锁文件前缀
+_LOCK_FILE_PREFIX = '~$'
+
+
+def resolve_backend(backend: str) -> str:
+    """
+    确定实际使用的变更来源
+
+    Args:
+        backend: 'auto'（安装了watchdog时使用文件事件，否则轮询）、'watchdog'或'polling'
+
+    Returns:
+        'watchdog'或'polling'
+    """
+    if backend not in WATCH_BACKENDS:
+        raise ValueError(f"变更来源必须是 {WATCH_BACKENDS} 之一，而不是 {backend}")
+
+    available = importlib.util.find_spec('watchdog') is not None
+    if backend == 'watchdog' and not available:
+        raise ImportError("文件事件需要 watchdog，请先安装: pip install watchdog")
+    if backend == 'auto':
+        return 'watchdog' if available else 'polling'
+    return backend
+
+
+def _init_watch_worker(config: Dict[str, object]) -> None:
+    """
+    常驻进程池的初始化函数：忽略Ctrl+C（由主进程等待正在处理的文件完成后退出），其余同批处理
+
+    Args:
+        config: 处理配置，见BatchExcelProcessor._worker_config
+    """
+    from .batch_processor import _init_worker
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _init_worker(config)
+
+
+def _warm_up() -> int:
+    """在工作进程中执行的空任务，用于启动时提前创建所有工作进程"""
+    return os.getpid()
+
+
+class FolderWatcher:
+    """
+    监视目录并用常驻进程池处理写入完成的工作簿
+    """
+
+    def __init__(self, processor: 'BatchExcelProcessor', output_dir: Optional[str] = None,
+                 output_format: str = "csv", max_workers: Optional[int] = None,
+                 settle: float = DEFAULT_SETTLE_SECONDS, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 backend: str = "auto", hash_contents: bool = False):
+        """
+        初始化FolderWatcher类
+
+        Args:
+            processor: 提供目录、文件匹配模式和处理选项的BatchExcelProcessor
+            output_dir: 输出目录，如果不指定则使用当前目录
+            output_format: 输出格式，'csv'、'parquet'、'feather'或'hdf5'
+            max_workers: 常驻进程池的工作进程数，默认为None（使用CPU核心数）
+            settle: 文件大小和修改时间保持不变多少秒后视为写入完成
+            poll_interval: 轮询时扫描目录的间隔（秒）
+            backend: 变更来源，'auto'、'watchdog'或'polling'
+            hash_contents: 是否记录并比较文件内容哈希，修改时间变化但内容相同的文件不会被重新处理
+        """
+        if settle < 0:
+            raise ValueError(f"稳定时间不能为负数，而不是 {settle}")
+        if poll_interval <= 0:
+            raise ValueError(f"轮询间隔必须为正数，而不是 {poll_interval}")
+        if processor.compression is not None and output_format != 'csv':
+            raise ValueError(f"压缩只用于CSV输出，{output_format} 格式已内置压缩")
+
+        self.processor = processor
+        self.directory = os.path.abspath(processor.directory)
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.backend = resolve_backend(backend)
+        self.hash_contents = hash_contents
+
+        self.settings = processor._run_settings(output_dir, output_format)
+        self.manifest = BatchManifest.load(output_dir)
+        # 文件路径到文件序号
+        self.indices: Dict[str, int] = {}
+        # 等待写入完成的文件：路径 → (大小, 修改时间, 上次变化的时间)
+        self._pending: Dict[str, Tuple[int, int, float]] = {}
+        # 正在处理的文件：Future → (路径, 文件序号, 最后一次写入或提交的时间)
+        self._running: Dict[Future, Tuple[str, int, float]] = {}
+        # 处理期间又发生变化的文件，处理完成后重新检查
+        self._dirty: set = set()
+        self._events: 'queue.Queue[str]' = queue.Queue()
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+        self._stop = threading.Event()
+        self.processed = 0
+        self.failed = 0
+
+    def _matches(self, path: str) -> bool:
+        """路径是否为目录中符合匹配模式的工作簿"""
+        name = os.path.basename(path)
+        if name.startswith(_LOCK_FILE_PREFIX) or os.path.dirname(os.path.abspath(path)) != self.directory:
+            return False
+        return fnmatch.fnmatch(name, self.processor.file_pattern)
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        """列出目录中符合匹配模式的工作簿及其大小和修改时间"""
+        files = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or not self._matches(entry.path):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    def _assign_indices(self, files: List[str]) -> None:
+        """
+        为文件分配序号：清单中已有的文件沿用原序号，其余文件按自然排序接在最大序号之后
+
+        Args:
+            files: 文件路径列表
+        """
+        for path in files:
+            if path not in self.indices:
+                recorded = self.manifest.file_index(path)
+                if recorded is not None:
+                    self.indices[path] = recorded
+
+        next_index = max(self.indices.values(), default=0) + 1
+        for path in natsorted(files):
+            if path not in self.indices:
+                self.indices[path] = next_index
+                next_index += 1
+
+    def _start_events(self):
+        """启动watchdog观察者，文件事件中的路径放入事件队列"""
+        observers = importlib.import_module('watchdog.observers')
+        events = importlib.import_module('watchdog.events')
+        event_queue = self._events
+
+        class Handler(events.FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory or event.event_type in ('deleted', 'opened', 'closed_no_write'):
+                    return
+                event_queue.put(os.path.abspath(getattr(event, 'dest_path', '') or event.src_path))
+
+        observer = observers.Observer()
+        observer.schedule(Handler(), self.directory, recursive=False)
+        observer.start()
+        return observer
+
+    def _poll(self) -> None:
+        """扫描目录，大小或修改时间变化的文件放入事件队列"""
+        current = self._scan()
+        for path, signature in current.items():
+            if self._snapshot.get(path) != signature:
+                self._events.put(path)
+        self._snapshot = current
+
+    def _observe(self, path: str) -> None:
+        """记录一个可能发生变化的文件，开始等待它写入完成"""
+        if not self._matches(path):
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # 文件已被删除或重命名
+            self._pending.pop(path, None)
+            return
+
+        signature = (stat.st_size, stat.st_mtime_ns)
+        previous = self._pending.get(path)
+        if previous is None or previous[:2] != signature:
+            self._pending[path] = (signature[0], signature[1], time.monotonic())
+
+    def _is_readable(self, path: str) -> bool:
+        """文件是否可以打开读取（Windows上正在写入的文件会被锁定）"""
+        try:
+            with open(path, 'rb'):
+                return True
+        except OSError:
+            return False
+
+    def _ready_files(self) -> List[Tuple[str, float]]:
+        """返回已经写入完成、可以开始处理的 (文件路径, 最后一次写入的时间) 列表，并重新检查仍在等待的文件"""
+        now = time.monotonic()
+        ready = []
+        for path in list(self._pending):
+            self._observe(path)
+            if path not in self._pending:
+                continue
+            size, _, changed = self._pending[path]
+            if now - changed < self.settle or size == 0 or not self._is_readable(path):
+                continue
+            if any(running[0] == path for running in self._running.values()):
+                # 上一次处理尚未完成，完成后再处理
+                self._dirty.add(path)
+                continue
+            del self._pending[path]
+            ready.append((path, changed))
+        return sorted(ready, key=lambda item: item[1])
+
+    def _submit(self, executor: ProcessPoolExecutor, path: str, changed: Optional[float] = None) -> None:
+        """
+        把写入完成的文件提交到进程池，未变化的文件直接跳过
+
+        Args:
+            executor: 常驻进程池
+            path: 文件路径
+            changed: 最后一次观察到文件变化的时间（time.monotonic），用于报告延迟，默认为提交时间
+        """
+        from .batch_processor import _process_file_task
+
+        self._assign_indices([path])
+        file_index = self.indices[path]
+        if self.manifest.is_up_to_date(path, file_index, self.settings, self.hash_contents):
+            return
+        future = executor.submit(_process_file_task, (path, file_index))
+        self._running[future] = (path, file_index, time.monotonic() if changed is None else changed)
+
+    def _collect(self, wait: bool = False) -> None:
+        """
+        记录已完成文件的处理结果并保存清单
+
+        Args:
+            wait: 是否等待所有正在处理的文件完成
+        """
+        for future in list(self._running):
+            if not wait and not future.done():
+                continue
+            path, file_index, changed = self._running.pop(future)
+            try:
+                _, _, outputs, _, _ = future.result()
+            except Exception as e:
+                print(f"  处理文件 {os.path.basename(path)} 时出错: {str(e)}")
+                outputs = []
+
+            self.processor._record_result(self.manifest, self.settings, path, file_index, outputs,
+                                          self.hash_contents)
+            self.manifest.save()
+            if outputs:
+                self.processed += 1
+                print(f"  已完成: {os.path.basename(path)}（文件序号 {file_index}，{len(outputs)} 个输出，"
+                      f"距最后一次写入 {time.monotonic() - changed:.1f} 秒）")
+            else:
+                self.failed += 1
+
+            if path in self._dirty:
+                self._dirty.discard(path)
+                self._observe(path)
+
+    def stop(self) -> None:
+        """请求停止监视（可以从其他线程调用），正在处理的文件会处理完成"""
+        self._stop.set()
+
+    def run(self, duration: Optional[float] = None) -> None:
+        """
+        开始监视目录：目录中已有的新的或修改过的文件和之后出现的文件一样，写入完成后处理，直到stop被调用、
+        收到Ctrl+C或超过duration秒
+
+        Args:
+            duration: 最长运行时间（秒），默认为None（一直运行）
+        """
+        if self.output_dir and not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir)
+
+        # 总文件数未知，进度只显示文件序号
+        config = self.processor._worker_config(None, self.output_dir, self.output_format)
+        deadline = None if duration is None else time.monotonic() + duration
+
+        print(f"监视目录: {self.directory}，文件匹配模式: {self.processor.file_pattern}")
+        print(f"变更来源: {'文件事件' if self.backend == 'watchdog' else f'轮询（每 {self.poll_interval:g} 秒）'}，"
+              f"写入完成判断: {self.settle:g} 秒内不再变化，工作进程数: {self.max_workers}")
+
+        observer = self._start_events() if self.backend == 'watchdog' else None
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_watch_worker,
+                                     initargs=(config,)) as executor:
+                # 提前创建所有工作进程，第一个文件不需要等待进程启动和模块导入
+                for future in [executor.submit(_warm_up) for _ in range(self.max_workers)]:
+                    future.result()
+
+                # 启动前已存在的文件：未处理过或已变化的文件与新文件一样，等写入完成后处理
+                # （启动时可能正有文件在写入）
+                self._snapshot = self._scan()
+                self._assign_indices(list(self._snapshot))
+                for path in natsorted(self._snapshot):
+                    if not self.manifest.is_up_to_date(path, self.indices[path], self.settings, self.hash_contents):
+                        self._observe(path)
+                print(f"目录中已有 {len(self._snapshot)} 个文件，需要处理 {len(self._pending)} 个，开始监视（Ctrl+C 停止）")
+
+                last_poll = time.monotonic()
+                while not self._stop.is_set() and (deadline is None or time.monotonic() < deadline):
+                    try:
+                        path = self._events.get(timeout=TICK_SECONDS)
+                        self._observe(path)
+                        while True:
+                            self._observe(self._events.get_nowait())
+                    except queue.Empty:
+                        pass
+
+                    if observer is None and time.monotonic() - last_poll >= self.poll_interval:
+                        self._poll()
+                        last_poll = time.monotonic()
+
+                    for path, changed in self._ready_files():
+                        print(f"检测到写入完成的文件: {os.path.basename(path)}")
+                        self._submit(executor, path, changed)
+                    self._collect()
+
+                self._collect(wait=True)
+        except KeyboardInterrupt:
+            print("\n正在停止监视，等待正在处理的文件完成...")
+            self._collect(wait=True)
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            self.manifest.save()
+
+        print(f"监视结束: 处理成功 {self.processed} 个文件，失败 {self.failed} 个")
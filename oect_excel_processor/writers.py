@@ -0,0 +1,491 @@
+"""
+处理结果的输出格式与写入
+
+支持的格式：
+- csv: 文本格式（默认）
+- parquet: 带类型的压缩列式格式，需要 pyarrow
+- feather: Arrow IPC 格式，读回速度最快，需要 pyarrow
+- hdf5: HDF5 格式，需要 tables (PyTables)
+
+CSV 可以指定浮点数的有效数字位数（precision），此时浮点数列按有效数字、整数列按原值整块格式化后
+分块写入，输出与 to_csv(float_format='%.{precision}g') 相同。
+"""
+
+import io
+import os
+import csv
+import importlib
+import importlib.util
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .options import OUTPUT_FORMATS, CSV_PRECISION_RANGE
+
+# 每种格式的文件扩展名
+OUTPUT_EXTENSIONS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'feather': '.feather',
+    'hdf5': '.h5',
+}
+
+# 列式格式依赖的Python模块（模块名, pip包名）
+_FORMAT_DEPENDENCIES = {
+    'parquet': ('pyarrow', 'pyarrow'),
+    'feather': ('pyarrow', 'pyarrow'),
+    'hdf5': ('tables', 'tables'),
+}
+
+# HDF5文件中存放数据的键名
+HDF5_KEY = 'data'
+
+# 快速CSV写入每次格式化的行数
+CSV_BLOCK_ROWS = 16384
+
+# 快速CSV写入的文件缓冲区大小
+CSV_BUFFER_SIZE = 1 << 20
+
+# 10的整数次幂在float64中精确表示的最大指数
+_EXACT_POWER = 22
+
+# 整数字段的最大宽度：符号和int64的至多19位数字
+_INTEGER_WIDTH = 20
+
+
+def check_output_format(output_format: str) -> None:
+    """
+    验证输出格式，并检查其依赖是否已安装
+
+    Args:
+        output_format: 输出格式名称
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"输出格式必须是 {OUTPUT_FORMATS} 之一，而不是 {output_format}")
+
+    if output_format in _FORMAT_DEPENDENCIES:
+        module, package = _FORMAT_DEPENDENCIES[output_format]
+        if importlib.util.find_spec(module) is None:
+            raise ImportError(f"输出格式 {output_format} 需要 {package}，请先安装: pip install {package}")
+
+
+def check_precision(precision: Optional[int]) -> None:
+    """
+    验证CSV浮点数的有效数字位数
+
+    Args:
+        precision: 有效数字位数，None表示按原样（最短可还原表示）写出
+    """
+    low, high = CSV_PRECISION_RANGE
+    if precision is not None and not low <= precision <= high:
+        raise ValueError(f"有效数字位数必须在 {low} 到 {high} 之间，而不是 {precision}")
+
+
+def preload_format(output_format: str) -> None:
+    """
+    预先导入输出格式依赖的模块（用于工作进程初始化）
+
+    Args:
+        output_format: 输出格式名称
+    """
+    if output_format in _FORMAT_DEPENDENCIES:
+        importlib.import_module(_FORMAT_DEPENDENCIES[output_format][0])
+
+
+def output_path(prefix: str, output_format: str = 'csv') -> str:
+    """
+    根据前缀和输出格式生成输出文件路径
+
+    Args:
+        prefix: 不含扩展名的输出路径，如 output-1-transfer
+        output_format: 输出格式名称
+
+    Returns:
+        带扩展名的输出文件路径
+    """
+    return f"{prefix}{OUTPUT_EXTENSIONS[output_format]}"
+
+
+def unique_column_names(frame: pd.DataFrame) -> List[str]:
+    """
+    返回唯一的字符串字段名：空字段名记为空字符串，重复字段名加 .1、.2 后缀
+
+    Args:
+        frame: 处理后的DataFrame
+
+    Returns:
+        字段名列表
+    """
+    names: List[str] = []
+    seen: Dict[str, int] = {}
+    for column in frame.columns:
+        name = '' if pd.isna(column) else str(column)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _columnar_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    转换为可写入列式格式的DataFrame
+
+    列式格式要求列名为唯一的字符串、每列类型一致：字段名按 unique_column_names 规整；
+    object列能转成数值的转为数值，否则转为字符串。
+
+    Args:
+        frame: 处理后的DataFrame
+
+    Returns:
+        列名和列类型规整后的DataFrame
+    """
+    names = unique_column_names(frame)
+    columns = {}
+    for i, name in enumerate(names):
+        values = frame.iloc[:, i]
+        if values.dtype == object:
+            try:
+                values = pd.to_numeric(values)
+            except (ValueError, TypeError):
+                values = values.astype('string')
+        columns[name] = values.reset_index(drop=True)
+
+    return pd.DataFrame(columns, columns=names)
+
+
+def _numeric_block(frame: pd.DataFrame) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    把所有列都是浮点数或整数的数据拆分为浮点数块和整数块
+
+    与to_csv相同，float_format只作用于浮点数列，整数列按原值写出；含有object、布尔等其他类型的列时
+    返回None，由to_csv写出（to_csv把object列中的值按原样转换为文本，不使用float_format）。
+
+    Args:
+        frame: 处理后的DataFrame
+
+    Returns:
+        (浮点数块, 整数块, 整数列标记)：形状为 (行数, 浮点数列数) 的float64数组、
+        形状为 (行数, 整数列数) 的int64数组和长度为列数的布尔数组；或None
+    """
+    if frame.shape[1] == 0:
+        return None
+
+    is_integer = np.zeros(frame.shape[1], dtype=bool)
+    for i, dtype in enumerate(frame.dtypes):
+        if isinstance(dtype, pd.api.extensions.ExtensionDtype):
+            return None
+        if dtype.kind == 'i' or (dtype.kind == 'u' and dtype.itemsize < 8):
+            is_integer[i] = True
+        elif dtype.kind != 'f':
+            return None
+
+    floats = np.empty((frame.shape[0], int((~is_integer).sum())), dtype=np.float64)
+    integers = np.empty((frame.shape[0], int(is_integer.sum())), dtype=np.int64)
+    float_at = integer_at = 0
+    for i in range(frame.shape[1]):
+        column = frame.iloc[:, i].to_numpy()
+        if is_integer[i]:
+            integers[:, integer_at] = column
+            integer_at += 1
+        else:
+            floats[:, float_at] = column
+            float_at += 1
+    return floats, integers, is_integer
+
+
+def _split(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """把float64拆成高低两半（Dekker拆分），两半相乘不会产生舍入误差"""
+    scaled = 134217729.0 * values
+    high = scaled - (scaled - values)
+    return high, values - high
+
+
+def _scaled_mantissa(magnitude: np.ndarray, exponent: np.ndarray, precision: int) -> np.ndarray:
+    """
+    把绝对值按十进制指数缩放为precision位的整数有效数字
+
+    乘以或除以10的幂时会产生一次舍入，这里用无误差乘法算出被舍掉的部分，
+    按精确值舍入（恰好在中间时取偶数），结果与Python的 '%g' 格式化一致。
+    """
+    shift = precision - 1 - exponent
+    power = 10.0 ** np.clip(np.abs(shift), 0, _EXACT_POWER)
+    up = shift >= 0
+    scaled = np.where(up, magnitude * power, magnitude / power)
+
+    # 乘法时 magnitude × power = scaled + residual；除法时 scaled × power = product + error
+    factor = np.where(up, magnitude, scaled)
+    product = factor * power
+    factor_high, factor_low = _split(factor)
+    power_high, power_low = _split(power)
+    error = ((factor_high * power_high - product) + factor_high * power_low + factor_low * power_high
+             + factor_low * power_low)
+    residual = np.where(up, error, ((magnitude - product) - error) / power)
+
+    # 精确值与 floor + 0.5 比较
+    floor = np.floor(scaled)
+    distance = (scaled - floor - 0.5) + residual
+    rounded = floor + (distance > 0) + ((distance == 0) & (floor % 2 == 1))
+    return rounded.astype(np.int64)
+
+
+def _float_chars(values: np.ndarray, precision: int, chars: np.ndarray) -> None:
+    """
+    把一块浮点数整体格式化，每个值的格式与 '%.{precision}g' 相同，NaN为空字段
+
+    先计算每个值的整数有效数字和十进制指数，拆出各位数字后按位置填入字节矩阵，
+    未使用的位置为0。每个字段的布局为：符号、前导0和小数点（指数为负的定点表示）、
+    至多3个补位0、有效数字（每两位之间留一个小数点位置）、指数。指数过大或过小
+    （10的幂不能精确表示）以及无穷大的值很少见，逐个用Python格式化。
+
+    Args:
+        values: 形状为 (行数, 列数) 的float64数组
+        precision: 有效数字位数
+        chars: 写入结果的uint8数组，形状为 (行数, 列数, 2 × precision + 10)，初始为0
+    """
+    p = precision
+    digits_at = 6                     # 第一位有效数字的位置
+    exponent_at = digits_at + 2 * p - 1
+    width = exponent_at + 5
+
+    negative = np.signbit(values)
+    finite = np.isfinite(values)
+    nonzero = finite & (values != 0)
+    # 0、NaN和无穷大用1代替参与计算，之后不使用其结果
+    magnitude = np.where(nonzero, np.abs(values), 1.0)
+
+    exponent = np.floor(np.log10(magnitude)).astype(np.int64)
+    exact = nonzero & (np.abs(p - 1 - exponent) < _EXACT_POWER)
+    special = (nonzero & ~exact) | np.isinf(values)
+    magnitude = np.where(exact, magnitude, 1.0)
+    exponent = np.where(exact, exponent, 0)
+
+    # log10的舍入误差和进位可能使指数差1，修正后有效数字落在 [10^(p-1), 10^p)
+    mantissa = np.where(exact, _scaled_mantissa(magnitude, exponent, p), 0)
+    for _ in range(2):
+        wrong = exact & ((mantissa >= 10 ** p) | (mantissa < 10 ** (p - 1)))
+        if not wrong.any():
+            break
+        exponent = exponent + (wrong & (mantissa >= 10 ** p)) - (wrong & (mantissa < 10 ** (p - 1)))
+        mantissa = np.where(wrong, _scaled_mantissa(magnitude, exponent, p), mantissa)
+
+    # 各位有效数字，最高位在前
+    digits = np.empty(values.shape + (p,), dtype=np.uint8)
+    remaining = mantissa
+    for i in range(p - 1, -1, -1):
+        remaining, digits[..., i] = np.divmod(remaining, 10)
+
+    # 去掉末尾的0后的有效数字位数
+    nonzero_digits = digits != 0
+    significant = np.where(nonzero_digits.any(axis=-1),
+                           p - np.argmax(nonzero_digits[..., ::-1], axis=-1), 0)
+
+    # 与%g相同：指数在 [-4, p) 之间用定点表示，否则用科学计数法
+    scientific = exact & ((exponent < -4) | (exponent >= p))
+    fixed_small = ~scientific & (exponent < 0)
+    # 小数点在第point位有效数字之后（0表示在所有有效数字之前）
+    point = np.where(scientific, 1, np.clip(exponent + 1, 0, None))
+    shown_digits = np.where(fixed_small, significant, np.maximum(significant, np.maximum(point, 1)))
+
+    shown = ~np.isnan(values) & ~special
+    chars[..., 0] = np.where(shown & negative, ord('-'), 0)
+    chars[..., 1] = np.where(shown & fixed_small, ord('0'), 0)
+    chars[..., 2] = np.where(shown & fixed_small, ord('.'), 0)
+    for z in range(3):
+        chars[..., 3 + z] = np.where(shown & fixed_small & (z < -exponent - 1), ord('0'), 0)
+
+    index = np.arange(p)
+    digits += ord('0')
+    digits *= shown[..., None] & (index < shown_digits[..., None])
+    chars[..., digits_at:exponent_at:2] = digits
+    chars[..., digits_at + 1:exponent_at:2] = np.where(
+        shown[..., None] & ~fixed_small[..., None] & (index[:-1] + 1 == point[..., None])
+        & (point[..., None] < shown_digits[..., None]), ord('.'), 0)
+
+    # 指数部分：e、符号和至少两位数字
+    absolute = np.abs(exponent)
+    chars[..., exponent_at] = np.where(scientific, ord('e'), 0)
+    chars[..., exponent_at + 1] = np.where(scientific, np.where(exponent < 0, ord('-'), ord('+')), 0)
+    chars[..., exponent_at + 2] = np.where(scientific & (absolute >= 100), absolute // 100 + ord('0'), 0)
+    chars[..., exponent_at + 3] = np.where(scientific, (absolute // 10) % 10 + ord('0'), 0)
+    chars[..., exponent_at + 4] = np.where(scientific, absolute % 10 + ord('0'), 0)
+
+    for r, c in zip(*np.nonzero(special)):
+        text = (f"%.{p}g" % values[r, c]).encode('ascii')
+        chars[r, c, :width] = 0
+        chars[r, c, :len(text)] = np.frombuffer(text, dtype=np.uint8)
+
+
+def _integer_chars(values: np.ndarray) -> np.ndarray:
+    """
+    把一块整数整体格式化为十进制文本，数字右对齐，未使用的位置为0
+
+    Args:
+        values: 形状为 (行数, 列数) 的int64数组
+
+    Returns:
+        形状为 (行数, 列数, _INTEGER_WIDTH) 的uint8数组
+    """
+    chars = np.zeros(values.shape + (_INTEGER_WIDTH,), dtype=np.uint8)
+    chars[..., 0] = np.where(values < 0, ord('-'), 0)
+    # 按无符号数取绝对值，int64的最小值也不会溢出
+    remaining = np.abs(values).view(np.uint64)
+    for i in range(_INTEGER_WIDTH - 1, 0, -1):
+        shown = remaining > 0
+        remaining, digit = np.divmod(remaining, np.uint64(10))
+        chars[..., i] = np.where(shown | (i == _INTEGER_WIDTH - 1), digit + ord('0'), 0)
+    return chars
+
+
+def _format_block(floats: np.ndarray, integers: np.ndarray, is_integer: np.ndarray, precision: int,
+                  terminator: bytes) -> bytes:
+    """
+    把一块数值整体格式化为CSV文本：浮点数列的格式与 '%.{precision}g' 相同（NaN为空字段），
+    整数列按原值写出
+
+    每个字段在字节矩阵中占相同宽度，未使用的位置为0，最后去掉所有0字节即为按行排列的CSV文本。
+
+    Args:
+        floats: _numeric_block返回的浮点数块
+        integers: _numeric_block返回的整数块
+        is_integer: 每列是否为整数列
+        precision: 有效数字位数
+        terminator: 行结束符
+
+    Returns:
+        CSV文本（字节）
+    """
+    float_width = 2 * precision + 10
+    width = max(float_width, _INTEGER_WIDTH) if is_integer.any() else float_width
+    chars = np.zeros((len(floats), len(is_integer), width + len(terminator)), dtype=np.uint8)
+
+    if not is_integer.any():
+        _float_chars(floats, precision, chars[..., :float_width])
+    else:
+        if floats.shape[1]:
+            block = np.zeros(floats.shape + (float_width,), dtype=np.uint8)
+            _float_chars(floats, precision, block)
+            chars[:, ~is_integer, :float_width] = block
+        chars[:, is_integer, :_INTEGER_WIDTH] = _integer_chars(integers)
+
+    # 列之间的逗号和行结束符
+    chars[:, :-1, width] = ord(',')
+    chars[:, -1, width:] = np.frombuffer(terminator, dtype=np.uint8)
+
+    return chars[chars != 0].tobytes()
+
+
+def _write_csv(frame: pd.DataFrame, target: Union[str, BinaryIO], precision: Optional[int]) -> None:
+    """
+    写入CSV文件
+
+    指定有效数字位数时，先把只含数值的object列（如transient工作表合并后的列）转换为数值列，
+    使有效数字位数同样作用于这些列；此时所有列都是浮点数或整数的数据按CSV_BLOCK_ROWS行一块整体格式化，
+    通过大缓冲区分块写入，否则使用to_csv。两种方式的输出相同。
+
+    Args:
+        frame: 处理后的DataFrame
+        target: 写入路径，或以二进制模式打开的文件对象
+        precision: 浮点数的有效数字位数，None表示按原样写出
+    """
+    if precision is not None:
+        frame = frame.infer_objects()
+    blocks = _numeric_block(frame) if precision is not None else None
+    if blocks is None:
+        frame.to_csv(target, index=False, float_format=None if precision is None else f"%.{precision}g")
+        return
+
+    # 表头与to_csv相同，由csv模块处理引号
+    header = io.StringIO()
+    csv.writer(header, lineterminator=os.linesep).writerow(
+        ['' if pd.isna(column) else column for column in frame.columns])
+    terminator = os.linesep.encode('ascii')
+
+    if not isinstance(target, str):
+        _write_blocks(target, header.getvalue(), blocks, precision, terminator)
+        return
+    with open(target, 'wb', buffering=CSV_BUFFER_SIZE) as f:
+        _write_blocks(f, header.getvalue(), blocks, precision, terminator)
+
+
+def _write_blocks(handle: BinaryIO, header: str, blocks: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                  precision: int, terminator: bytes) -> None:
+    """写入表头，再逐块格式化并写入数值"""
+    floats, integers, is_integer = blocks
+    handle.write(header.encode('utf-8'))
+    for start in range(0, len(floats), CSV_BLOCK_ROWS):
+        end = start + CSV_BLOCK_ROWS
+        handle.write(_format_block(floats[start:end], integers[start:end], is_integer, precision, terminator))
+
+
+def render_csv(frame: pd.DataFrame, precision: Optional[int] = None) -> bytes:
+    """
+    在内存中把处理后的数据渲染为CSV文本，内容与写入文件时相同（用于压缩输出）
+
+    Args:
+        frame: 处理后的DataFrame
+        precision: 浮点数的有效数字位数，None表示按原样写出
+
+    Returns:
+        UTF-8编码的CSV文本
+    """
+    buffer = io.BytesIO()
+    _write_csv(frame, buffer, precision)
+    return buffer.getvalue()
+
+
+def _write_to(frame: pd.DataFrame, path: str, output_format: str, precision: Optional[int] = None) -> None:
+    """
+    按指定格式把数据写入给定路径
+
+    Args:
+        frame: 处理后的DataFrame
+        path: 写入路径
+        output_format: 输出格式名称
+        precision: CSV浮点数的有效数字位数，只用于CSV
+    """
+    if output_format == 'csv':
+        _write_csv(frame, path, precision)
+        return
+
+    table = _columnar_frame(frame)
+    if output_format == 'parquet':
+        table.to_parquet(path, index=False, compression='zstd')
+    elif output_format == 'feather':
+        table.to_feather(path, compression='zstd')
+    else:  # hdf5
+        table.to_hdf(path, key=HDF5_KEY, mode='w', complevel=5, complib='blosc')
+
+
+def write_frame(frame: pd.DataFrame, prefix: str, output_format: str = 'csv',
+                precision: Optional[int] = None) -> str:
+    """
+    按指定格式写入处理后的数据
+
+    先写入同目录下的临时文件，完成后再重命名为最终文件名，
+    进程被中断时不会留下写了一半的输出文件。
+
+    Args:
+        frame: 处理后的DataFrame
+        prefix: 不含扩展名的输出路径
+        output_format: 输出格式名称
+        precision: CSV浮点数的有效数字位数，None（默认）表示按原样写出
+
+    Returns:
+        写入的文件路径
+    """
+    path = output_path(prefix, output_format)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        _write_to(frame, tmp_path, output_format, precision)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return path
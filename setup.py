@@ -24,7 +24,6 @@ setup(
         "Development Status :: 4 - Beta",
         "Intended Audience :: Science/Research",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
@@ -32,7 +31,7 @@ setup(
         "Operating System :: OS Independent",
         "Topic :: Scientific/Engineering",
     ],
-    python_requires=">=3.6",
+    python_requires=">=3.7",
     install_requires=[
         "pandas>=1.0.0",
         "numpy>=1.18.0",
@@ -40,9 +39,29 @@ setup(
         "xlrd>=2.0.1",
     ],
     extras_require={
+        "xlsx": [
+            "openpyxl>=3.0",
+        ],
+        "calamine": [
+            "pandas>=2.2",
+            "python-calamine>=0.1.7",
+        ],
+        "parquet": [
+            "pyarrow>=8.0",
+        ],
+        "hdf5": [
+            "tables>=3.6",
+        ],
+        "zstd": [
+            "zstandard>=0.15",
+        ],
+        "watch": [
+            "watchdog>=2.0",
+        ],
         "dev": [
             "pytest>=6.0",
             "pytest-cov>=2.0",
+            "openpyxl>=3.0",
             "black>=22.0",
             "isort>=5.0",
             "flake8>=3.9",
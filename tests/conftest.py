@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+"""
+测试共用的夹具：用 benchmarks/synthetic.py 生成小型的确定性测试工作簿
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+
+@pytest.fixture
+def make_dataset(tmp_path):
+    """
+    返回在临时目录中生成测试工作簿的函数，参数与 synthetic.generate_dataset 相同（目录除外）
+    """
+    pytest.importorskip("openpyxl")
+    from synthetic import generate_dataset
+
+    def make(files: int = 2, sheets: int = 2, rows: int = 50, pairs: int = 3, **kwargs):
+        return generate_dataset(str(tmp_path / "data"), files, sheets, rows, pairs, **kwargs)
+
+    return make
+
+
+def read_output(path: str) -> pd.DataFrame:
+    """按扩展名读取处理器写出的输出文件（CSV可以是压缩的）"""
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    if path.endswith('.feather'):
+        return pd.read_feather(path)
+    if path.endswith('.h5'):
+        return pd.read_hdf(path, 'data')
+    return pd.read_csv(path)
+
+
+@pytest.fixture
+def read_outputs():
+    """返回读取一组输出文件的函数，结果为按文件名（不含目录和扩展名）排序的DataFrame列表"""
+    def read(paths):
+        return [read_output(path) for path in sorted(paths, key=lambda path: os.path.basename(path).split('.')[0])]
+
+    return read
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+"""
+工作表缓存（cache模块）的测试：DataFrame的编码与还原、条目读写和按大小上限淘汰
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from oect_excel_processor import cache
+from oect_excel_processor.cache import SheetCache, decode_frame, encode_frame
+
+
+def _round_trip(frame):
+    arrays = encode_frame(frame)
+    assert arrays is not None
+    return decode_frame(arrays)
+
+
+def test_round_trip_raw_sheet():
+    # 无表头读取的工作表：前几行为文本，之后为数值，空单元格为None或NaN
+    frame = pd.DataFrame([
+        ["Instrument", "OECT", None, None],
+        ["Vg(V)", "Id(A)", "Ig(A)", "Vd(V)"],
+        [-0.8, 1.5e-9, np.nan, 3],
+        [0.2, -2.25e-7, True, 2 ** 40],
+    ])
+    decoded = _round_trip(frame)
+    pd.testing.assert_frame_equal(decoded, frame)
+    assert [type(value) for value in decoded.iloc[3]] == [type(value) for value in frame.iloc[3]]
+
+
+def test_round_trip_typed_columns_and_labels():
+    frame = pd.DataFrame({
+        "f64": [1.5, np.nan, -0.0],
+        "f32": np.array([1.5, 2.5, np.nan], dtype=np.float32),
+        "i64": [1, -2, 3],
+        "b": [True, False, True],
+        7: ["a", "b", "c"],
+    })
+    pd.testing.assert_frame_equal(_round_trip(frame), frame)
+
+
+def test_round_trip_string_dtype():
+    frame = pd.DataFrame({"s": pd.Series(["x", "y", "z"], dtype="string")})
+    pd.testing.assert_frame_equal(_round_trip(frame), frame)
+    # pd.NA无法还原为解码时的对象，不缓存
+    assert encode_frame(pd.DataFrame({"s": pd.Series(["x", None], dtype="string")})) is None
+
+
+def test_round_trip_range_columns():
+    frame = pd.DataFrame(np.arange(6, dtype=np.float64).reshape(3, 2))
+    decoded = _round_trip(frame)
+    pd.testing.assert_frame_equal(decoded, frame)
+    assert isinstance(decoded.columns, pd.RangeIndex)
+
+
+@pytest.mark.parametrize("value", [pd.Timestamp("2024-01-01"), 2 ** 60, "trailing\x00"])
+def test_unsupported_cells_are_not_cached(value):
+    frame = pd.DataFrame({"a": pd.Series([1.0, value], dtype=object)})
+    assert encode_frame(frame) is None
+
+
+def test_store_and_load(tmp_path):
+    source = tmp_path / "a.xlsx"
+    source.write_bytes(b"workbook")
+    frame = pd.DataFrame([["Time(s)", "Id(A)"], [0.0, 1e-6]])
+
+    sheet_cache = SheetCache(str(tmp_path / "cache"))
+    assert sheet_cache.load(str(source), 1, "full", "openpyxl") is None
+    assert sheet_cache.store(str(source), 1, "full", "openpyxl", frame)
+    pd.testing.assert_frame_equal(sheet_cache.load(str(source), 1, "full", "openpyxl"), frame)
+
+    # 其他工作表、读取方式或文件内容变化后不会命中
+    assert sheet_cache.load(str(source), 2, "full", "openpyxl") is None
+    assert sheet_cache.load(str(source), 1, "transfer", "openpyxl") is None
+    source.write_bytes(b"changed workbook")
+    assert sheet_cache.load(str(source), 1, "full", "openpyxl") is None
+
+
+def test_eviction_keeps_size_below_limit(tmp_path, monkeypatch):
+    frame = pd.DataFrame(np.random.default_rng(0).normal(size=(50, 4)))
+    sources = []
+    for i in range(100):
+        source = tmp_path / f"{i}.xlsx"
+        source.write_bytes(str(i).encode())
+        sources.append(str(source))
+
+    sheet_cache = SheetCache(str(tmp_path / "cache"))
+    sheet_cache.store(sources[0], 1, "full", "openpyxl", frame)
+    entry_size = sheet_cache.size()
+    # 上限约为40个条目
+    sheet_cache.max_bytes = entry_size * 40
+
+    scans = []
+    entries = SheetCache.entries
+    monkeypatch.setattr(SheetCache, "entries", lambda self: scans.append(1) or entries(self))
+
+    for i, source in enumerate(sources[1:]):
+        sheet_cache.store(source, 1, "full", "openpyxl", frame)
+        # 第一个条目一直被使用，不应被淘汰
+        os.utime(sheet_cache.entry_path(sources[0], 1, "full", "openpyxl"), (1e10 + i, 1e10 + i))
+        assert sheet_cache.size() <= sheet_cache.max_bytes
+    store_scans = len(scans) - len(sources[1:])
+
+    assert sheet_cache.load(sources[0], 1, "full", "openpyxl") is not None
+    assert sheet_cache.load(sources[1], 1, "full", "openpyxl") is None
+    assert sheet_cache.load(sources[-1], 1, "full", "openpyxl") is not None
+    # 不是每次写入都扫描缓存目录：两次扫描之间至少写入上限的RESCAN_FRACTION（约4个条目）
+    assert store_scans <= len(sources) // 4
+
+
+def test_shared_cache_is_reused(tmp_path):
+    first = cache.shared_cache(str(tmp_path / "cache"), 100)
+    assert cache.shared_cache(str(tmp_path / "cache"), 100) is first
+    assert cache.shared_cache(str(tmp_path / "cache"), 200) is not first
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+"""
+批处理检查点（BatchCheckpoint）与 process_all_files 断点续处理的测试
+"""
+
+import os
+import glob
+
+from oect_excel_processor import BatchExcelProcessor
+from oect_excel_processor.manifest import BatchCheckpoint, checkpoint_id
+
+SETTINGS = {"sheet_types": ["transfer", "transient"]}
+
+
+def _checkpoint_files(directory):
+    return glob.glob(os.path.join(str(directory), ".oect_checkpoint*.jsonl"))
+
+
+def test_resume_skips_recorded_files(tmp_path):
+    source = tmp_path / "a.xlsx"
+    source.write_bytes(b"data")
+    output = tmp_path / "a-1.csv"
+    output.write_text("x")
+
+    checkpoint = BatchCheckpoint(str(tmp_path), "run")
+    assert checkpoint.open(SETTINGS)
+    checkpoint.record(str(source), 1, [str(output)])
+    checkpoint.close(remove=False)
+
+    resumed = BatchCheckpoint(str(tmp_path), "run")
+    assert resumed.open(SETTINGS, resume=True)
+    assert resumed.is_completed(str(source), 1)
+    assert not resumed.is_completed(str(source), 2)
+    assert resumed.outputs(str(source)) == [str(output)]
+    resumed.close()
+    assert not os.path.exists(resumed.path)
+
+
+def test_resume_rejects_changed_or_missing_files(tmp_path):
+    source = tmp_path / "a.xlsx"
+    source.write_bytes(b"data")
+    output = tmp_path / "a-1.csv"
+    output.write_text("x")
+
+    checkpoint = BatchCheckpoint(str(tmp_path), "run")
+    checkpoint.open(SETTINGS)
+    checkpoint.record(str(source), 1, [str(output)])
+    checkpoint.close(remove=False)
+
+    source.write_bytes(b"changed data")
+    resumed = BatchCheckpoint(str(tmp_path), "run")
+    resumed.open(SETTINGS, resume=True)
+    assert not resumed.is_completed(str(source), 1)
+    source.unlink()
+    assert not resumed.is_completed(str(source), 1)
+    resumed.close()
+
+
+def test_resume_with_other_settings_starts_over(tmp_path):
+    source = tmp_path / "a.xlsx"
+    source.write_bytes(b"data")
+
+    checkpoint = BatchCheckpoint(str(tmp_path), "run")
+    checkpoint.open(SETTINGS)
+    checkpoint.record(str(source), 1, [])
+    checkpoint.close(remove=False)
+
+    resumed = BatchCheckpoint(str(tmp_path), "run")
+    resumed.open({"sheet_types": ["transfer"]}, resume=True)
+    assert resumed.completed == {}
+    resumed.close()
+
+
+def test_concurrent_run_does_not_clobber_checkpoint(tmp_path):
+    first = BatchCheckpoint(str(tmp_path), "run")
+    assert first.open(SETTINGS)
+    second = BatchCheckpoint(str(tmp_path), "run")
+    if os.name == "posix":
+        assert not second.open(SETTINGS)
+        # 未取得锁的一方不会删除检查点
+        second.close()
+        assert os.path.exists(first.path)
+    first.close()
+
+
+def test_checkpoint_id_depends_on_input_and_settings(tmp_path):
+    base = checkpoint_id(str(tmp_path), "*.xlsx", SETTINGS)
+    assert base == checkpoint_id(str(tmp_path), "*.xlsx", dict(SETTINGS))
+    assert base != checkpoint_id(str(tmp_path), "*.xls", SETTINGS)
+    assert base != checkpoint_id(str(tmp_path / "other"), "*.xlsx", SETTINGS)
+    assert base != checkpoint_id(str(tmp_path), "*.xlsx", {"sheet_types": ["transfer"]})
+
+
+def test_process_all_files_resumes_after_interruption(make_dataset, tmp_path, monkeypatch):
+    dataset = make_dataset(files=3)
+    output_dir = tmp_path / "out"
+    processor = BatchExcelProcessor(os.path.dirname(dataset["files"][0]), "*.xlsx",
+                                    ["transfer", "transient"], "device")
+
+    # 第二个文件处理时中断
+    original = BatchExcelProcessor._process_file
+
+    def interrupted(self, excel_file, file_index, *args, **kwargs):
+        if file_index == 2:
+            raise KeyboardInterrupt
+        return original(self, excel_file, file_index, *args, **kwargs)
+
+    monkeypatch.setattr(BatchExcelProcessor, "_process_file", interrupted)
+    try:
+        processor.process_all_files(output_dir=str(output_dir), checkpoint=True)
+    except KeyboardInterrupt:
+        pass
+    assert len(_checkpoint_files(output_dir)) == 1
+
+    processed = []
+
+    def counting(self, excel_file, file_index, *args, **kwargs):
+        processed.append(file_index)
+        return original(self, excel_file, file_index, *args, **kwargs)
+
+    monkeypatch.setattr(BatchExcelProcessor, "_process_file", counting)
+    results = processor.process_all_files(output_dir=str(output_dir), resume=True)
+
+    assert processed == [2, 3]
+    assert all(len(outputs) == 2 for outputs in results.values())
+    assert _checkpoint_files(output_dir) == []
+
+
+def test_process_all_files_writes_no_checkpoint_by_default(make_dataset, tmp_path, monkeypatch):
+    dataset = make_dataset(files=1)
+    monkeypatch.chdir(tmp_path)
+    processor = BatchExcelProcessor(os.path.dirname(dataset["files"][0]), "*.xlsx",
+                                    ["transfer", "transient"], "device")
+    processor.process_all_files()
+    assert _checkpoint_files(tmp_path) == []
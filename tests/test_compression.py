@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+"""
+CSV压缩的测试：解压后的内容与未压缩的CSV输出逐字节相同
+"""
+
+import gzip
+import lzma
+import os
+
+import pytest
+
+from oect_excel_processor import BatchExcelProcessor, ExcelProcessor
+from oect_excel_processor.cli import main
+
+SHEET_TYPES = ["transfer", "transient"]
+EXTENSIONS = {"gzip": ".csv.gz", "zstd": ".csv.zst", "xz": ".csv.xz"}
+
+
+def _read(path: str) -> bytes:
+    """读取输出文件，压缩文件按扩展名解压"""
+    with open(path, "rb") as handle:
+        data = handle.read()
+    if path.endswith(".csv"):
+        return data
+    if path.endswith(".gz"):
+        return gzip.decompress(data)
+    if path.endswith(".xz"):
+        return lzma.decompress(data)
+    import zstandard
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+def _contents(paths):
+    """返回 文件名（不含前缀和扩展名） -> 解压后的文件内容 的字典"""
+    return {os.path.basename(path).split(".")[0].split("-", 1)[1]: _read(path) for path in paths}
+
+
+@pytest.mark.parametrize("compression", sorted(EXTENSIONS))
+@pytest.mark.parametrize("precision", [None, 6])
+def test_compressed_output_matches_plain_csv(make_dataset, tmp_path, compression, precision):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    source = make_dataset(files=1, sheets=4)["files"][0]
+
+    plain = ExcelProcessor(source, SHEET_TYPES, str(tmp_path / "plain"), precision=precision).process_and_save()
+    compressed = ExcelProcessor(source, SHEET_TYPES, str(tmp_path / "packed"), precision=precision,
+                                compression=compression, compression_level=1).process_and_save()
+
+    assert all(path.endswith(EXTENSIONS[compression]) for path in compressed)
+    assert _contents(compressed) == _contents(plain)
+
+
+def test_compressed_batch_matches_plain_csv(make_dataset, tmp_path):
+    directory = os.path.dirname(make_dataset(files=3, sheets=2)["files"][0])
+
+    plain = BatchExcelProcessor(directory, "*.xlsx", SHEET_TYPES).process_all_files(str(tmp_path / "plain"))
+    compressed = BatchExcelProcessor(directory, "*.xlsx", SHEET_TYPES, compression="gzip").process_all_files(
+        str(tmp_path / "packed"), use_multiprocessing=True, max_workers=2)
+
+    assert _contents([path for paths in compressed.values() for path in paths]) == \
+        _contents([path for paths in plain.values() for path in paths])
+
+
+@pytest.mark.parametrize("arguments", [["--compress", "gzip", "--compress-level", "12"], ["--compress-level", "3"]])
+def test_cli_rejects_invalid_compression_level(tmp_path, capsys, arguments):
+    with pytest.raises(SystemExit) as excinfo:
+        main(["batch", str(tmp_path)] + arguments)
+    assert excinfo.value.code == 2
+    assert "压缩" in capsys.readouterr().err
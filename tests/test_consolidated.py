@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+"""
+合并输出的测试：字段名不同的工作表按位置对应，字段数不同时报错，Parquet分块使用同一个schema
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from oect_excel_processor import BatchExcelProcessor
+from oect_excel_processor.consolidated import ConsolidatedWriter
+
+FIRST = pd.DataFrame({"Vg(V)": [0.0, 0.5], "Id(A)": [1e-6, 2e-6]})
+# 字段名不同、含有非数值单元格的第二个工作表
+RENAMED = pd.DataFrame({"Vg": [1.0, "bad"], "Id": [3e-6, 4e-6]}, dtype=object)
+
+
+def _write(tmp_path, output_format):
+    writer = ConsolidatedWriter(str(tmp_path / "all"), output_format, chunk_rows=1)
+    writer.add(1, "a.xlsx", 1, "Sheet1", "transfer", FIRST)
+    writer.add(2, "b.xlsx", 1, "Sheet1", "transfer", RENAMED)
+    return writer.close()["transfer"]
+
+
+def test_csv_maps_renamed_columns_by_position(tmp_path, capsys):
+    [path] = _write(tmp_path, "csv")
+
+    table = pd.read_csv(path)
+    assert list(table.columns) == ["file_index", "source_file", "sheet_index", "sheet_name", "Vg(V)", "Id(A)"]
+    assert table["Vg(V)"].tolist() == ["0.0", "0.5", "1.0", "bad"]
+    assert table["Id(A)"].tolist() == [1e-6, 2e-6, 3e-6, 4e-6]
+    assert "已按位置对应" in capsys.readouterr().out
+
+
+def test_parquet_parts_share_one_schema(tmp_path, capsys):
+    pytest.importorskip("pyarrow")
+    parts = _write(tmp_path, "parquet")
+
+    assert len(parts) == 2
+    table = pd.read_parquet(os.path.dirname(parts[0]))
+    assert list(table.columns) == ["file_index", "source_file", "sheet_index", "sheet_name", "Vg(V)", "Id(A)"]
+    assert table["Vg(V)"].dtype == np.float64
+    np.testing.assert_array_equal(table["Vg(V)"].to_numpy(), [0.0, 0.5, 1.0, np.nan])
+    np.testing.assert_array_equal(table["Id(A)"].to_numpy(), [1e-6, 2e-6, 3e-6, 4e-6])
+    output = capsys.readouterr().out
+    assert "已按位置对应" in output
+    assert "1 个非数值单元格" in output
+
+
+@pytest.mark.parametrize("output_format", ["csv", "parquet"])
+def test_column_count_mismatch_raises(tmp_path, output_format):
+    if output_format == "parquet":
+        pytest.importorskip("pyarrow")
+    writer = ConsolidatedWriter(str(tmp_path / "all"), output_format)
+    writer.add(1, "a.xlsx", 1, "Sheet1", "transfer", FIRST)
+
+    with pytest.raises(ValueError, match="b.xlsx"):
+        writer.add(2, "b.xlsx", 1, "Sheet1", "transfer", FIRST.assign(extra=1.0))
+    writer.abort()
+
+
+@pytest.mark.parametrize("output_format", ["csv", "parquet"])
+def test_consolidated_matches_per_sheet_output(make_dataset, read_outputs, tmp_path, output_format):
+    if output_format == "parquet":
+        pytest.importorskip("pyarrow")
+    directory = os.path.dirname(make_dataset(files=2, sheets=2)["files"][0])
+    processor = BatchExcelProcessor(directory, "*.xlsx", ["transfer", "transient"])
+
+    saved = processor.process_all_files(output_dir=str(tmp_path / "sheets"))
+    outputs = processor.process_consolidated(output_dir=str(tmp_path / "all"), output_format=output_format,
+                                             chunk_rows=10)
+
+    for sheet_type in ("transfer", "transient"):
+        expected = pd.concat(read_outputs([path for paths in saved.values() for path in paths
+                                           if path.endswith(f"-{sheet_type}.csv")]), ignore_index=True)
+        paths = outputs[sheet_type]
+        table = pd.read_parquet(os.path.dirname(paths[0])) if output_format == "parquet" else pd.read_csv(paths[0])
+        pd.testing.assert_frame_equal(table.iloc[:, 4:], expected, check_dtype=False)
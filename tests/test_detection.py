@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+
+"""
+工作表类型自动识别的测试：只接受严格的transient成对布局和恰好四个字段的transfer布局
+"""
+
+import pandas as pd
+import pytest
+
+from oect_excel_processor import ExcelProcessor
+from oect_excel_processor.detection import classify_preamble
+
+
+def _preamble(*names):
+    """前两行为说明、第三行为字段名的工作表开头"""
+    return [["Device"], ["Date"], list(names)]
+
+
+@pytest.mark.parametrize("names, expected", [
+    (("Time(s)", "Id(A)", "Time(s)", "Id(A)"), "transient"),
+    (("Time(s)", "Id(A)") * 5, "transient"),
+    (("Time(s)", "Id(A)"), "transient"),
+    (("t", "Id"), "transient"),
+    (("Vg(V)", "Id(A)", "Ig(A)", "Vd(V)"), "transfer"),
+    (("Vg(V)", "Id(A)", "Ig(A)", "Vd(V)", None, ""), "transfer"),
+    # 不完整的成对布局
+    (("Time(s)", "Id(A)", "Time(s)", "Id(A)", "Time(s)"), None),
+    (("Time(s)", "Id(A)", "Time(s)", "Ig(A)"), None),
+    # 两列的transfer表头无法与单组transient区分
+    (("Vg(V)", "Id(A)"), None),
+    # 字段数不是四个，或有重复字段名
+    (("Vg(V)", "Id(A)", "Ig(A)"), None),
+    (("Vg(V)", "Id(A)", "Ig(A)", "Vd(V)", "Is(A)"), None),
+    (("Vg(V)", "Id(A)", "Vg(V)", "Vd(V)"), None),
+    (("Time(s)", "Time(s)"), None),
+    # 空字段名或数值
+    (("Vg(V)", "", "Ig(A)", "Vd(V)"), None),
+    (("Time(s)", 1.0), None),
+    ((), None),
+])
+def test_classify_preamble(names, expected):
+    assert classify_preamble(_preamble(*names)) == expected
+
+
+def test_classify_short_preamble():
+    assert classify_preamble([["Device"]]) is None
+
+
+def test_auto_matches_explicit_types(make_dataset, read_outputs, tmp_path):
+    sheet_types = ["transient", "transfer", "transfer", "transient"]
+    source = make_dataset(files=1, sheets=4, sheet_types=sheet_types)["files"][0]
+
+    assert list(ExcelProcessor(source, ["auto"]).get_sheet_info().values()) == sheet_types
+    auto_files = ExcelProcessor(source, ["auto"], str(tmp_path / "auto")).process_and_save()
+    explicit_files = ExcelProcessor(source, sheet_types, str(tmp_path / "explicit")).process_and_save()
+
+    assert len(auto_files) == len(explicit_files) == 4
+    for actual, expected in zip(read_outputs(auto_files), read_outputs(explicit_files)):
+        pd.testing.assert_frame_equal(actual, expected)
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+"""
+列式输出格式（Parquet、Feather、HDF5）的测试：读回的数据与默认CSV输出相同
+"""
+
+import pandas as pd
+import pytest
+
+from oect_excel_processor import ExcelProcessor
+
+_DEPENDENCIES = {"parquet": "pyarrow", "feather": "pyarrow", "hdf5": "tables"}
+
+
+@pytest.mark.parametrize("output_format", sorted(_DEPENDENCIES))
+def test_columnar_output_matches_csv(make_dataset, read_outputs, tmp_path, output_format):
+    pytest.importorskip(_DEPENDENCIES[output_format])
+    source = make_dataset(files=1, sheets=4)["files"][0]
+    sheet_types = ["transfer", "transient"]
+
+    csv_files = ExcelProcessor(source, sheet_types, str(tmp_path / "csv")).process_and_save()
+    columnar_files = ExcelProcessor(source, sheet_types, str(tmp_path / output_format)
+                                    ).process_and_save(output_format=output_format)
+
+    assert len(columnar_files) == len(csv_files) == 4
+    for actual, expected in zip(read_outputs(columnar_files), read_outputs(csv_files)):
+        pd.testing.assert_frame_equal(actual, expected)
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+"""
+峰值内存回归测试：用 benchmarks/memory_profile.py 在独立子进程中测量处理小型测试工作簿的内存峰值，
+并与README中建议的预算比较
+"""
+
+import pytest
+
+pytest.importorskip("resource")
+
+from memory_profile import run_measurement
+
+# 与固定开销无关的、每输入MB允许的峰值内存增量（MB），与README中的示例一致
+BUDGET_PER_INPUT_MB = 400.0
+# 预算中的固定开销（MB），memory_profile.py 的默认值
+BASE_ALLOWANCE_MB = 64.0
+
+
+@pytest.mark.parametrize("transient_engine", ["numpy", "pandas"])
+def test_single_file_peak_memory_within_budget(make_dataset, tmp_path, transient_engine):
+    dataset = make_dataset(files=1, sheets=4, rows=2000, pairs=5)
+    input_mb = dataset["bytes"] / 1e6
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+
+    measured = run_measurement({
+        "scenario": "single", "engine": "openpyxl", "transient_engine": transient_engine,
+        "files": dataset["files"], "sheet_types": ["transfer", "transient"],
+        "output_dir": str(output_dir),
+    })
+
+    limit = BASE_ALLOWANCE_MB + BUDGET_PER_INPUT_MB * input_mb
+    assert measured["peak_rss_mb"] <= limit, measured
+    assert measured["traced_peak_mb"] <= limit, measured
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+按内存预算提交文件（BatchExcelProcessor._execute_budgeted）的测试
+"""
+
+import os
+from concurrent.futures import Future
+
+from oect_excel_processor import BatchExcelProcessor
+from oect_excel_processor import batch_processor
+
+
+class _ImmediateExecutor:
+    """在提交时立即运行任务的进程池替身，记录提交时正在处理的文件"""
+
+    def __init__(self, log, max_workers=None, initializer=None, initargs=()):
+        self.log = log
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, task):
+        future = Future()
+        future.set_result(fn(task))
+        future.task = task
+        self.log["live"].append(task[0])
+        self.log["submitted"].append((task[0], list(self.log["live"])))
+        return future
+
+
+def _run(monkeypatch, estimates, budget, max_workers=3):
+    """按给定的估计内存运行_execute_budgeted，返回每次提交时正在处理的文件和完成的文件"""
+    log = {"live": [], "submitted": []}
+
+    def fake_wait(futures, return_when=None):
+        # 每次只完成最早提交的一个文件
+        first = next(iter(futures))
+        log["live"].remove(first.task[0])
+        return {first}, set(futures) - {first}
+
+    monkeypatch.setattr(batch_processor, "ProcessPoolExecutor",
+                        lambda **kwargs: _ImmediateExecutor(log, **kwargs))
+    monkeypatch.setattr(batch_processor, "wait", fake_wait)
+    monkeypatch.setattr(batch_processor, "estimate_memory", lambda excel_file, sheet_types: estimates[excel_file])
+    monkeypatch.setattr(batch_processor, "_process_file_task",
+                        lambda task: (task[0], task[1], [f"{task[0]}.csv"], None, 0.0))
+
+    finished = []
+    processor = BatchExcelProcessor(".", "*.xlsx", ["transfer"], "out")
+    pending = [(excel_file, i + 1) for i, excel_file in enumerate(estimates)]
+    processor._execute_budgeted(pending, len(pending), None, "csv", max_workers, budget,
+                                lambda excel_file, file_index, outputs, elapsed: finished.append(excel_file))
+    return log["submitted"], finished
+
+
+def test_admission_stays_within_budget(monkeypatch):
+    estimates = {"a": 40.0, "b": 40.0, "c": 40.0, "d": 20.0}
+    submitted, finished = _run(monkeypatch, estimates, budget=100.0)
+
+    for _, live in submitted:
+        assert sum(estimates[name] for name in live) <= 100.0
+    assert sorted(finished) == sorted(estimates)
+
+
+def test_smaller_file_is_admitted_ahead_of_one_that_does_not_fit(monkeypatch):
+    estimates = {"a": 60.0, "b": 60.0, "c": 30.0}
+    submitted, _ = _run(monkeypatch, estimates, budget=100.0)
+
+    assert [name for name, _ in submitted] == ["a", "c", "b"]
+
+
+def test_file_over_budget_runs_alone(monkeypatch):
+    estimates = {"a": 30.0, "big": 500.0, "b": 30.0}
+    submitted, finished = _run(monkeypatch, estimates, budget=100.0)
+
+    assert ("big", ["big"]) in submitted
+    assert sorted(finished) == sorted(estimates)
+
+
+def test_worker_limit_is_respected(monkeypatch):
+    estimates = {name: 1.0 for name in "abcdef"}
+    submitted, _ = _run(monkeypatch, estimates, budget=100.0, max_workers=2)
+
+    assert max(len(live) for _, live in submitted) == 2
+
+
+def test_process_all_files_with_memory_budget(make_dataset, tmp_path):
+    dataset = make_dataset(files=2)
+    processor = BatchExcelProcessor(os.path.dirname(dataset["files"][0]), "*.xlsx",
+                                    ["transfer", "transient"], "device")
+
+    # 每个文件的估计值都超出预算，逐个单独处理
+    results = processor.process_all_files(output_dir=str(tmp_path / "out"), use_multiprocessing=True,
+                                          max_workers=2, memory_budget=1)
+
+    assert len(results) == 2
+    for outputs in results.values():
+        assert len(outputs) == 2
+        assert all(os.path.exists(path) for path in outputs)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+"""
+阶段指标收集的测试：启用后输出不变，并为每个工作表记录各阶段
+"""
+
+import os
+
+from oect_excel_processor import BatchExcelProcessor, ExcelProcessor
+from oect_excel_processor.metrics import write_metrics
+
+SHEET_TYPES = ["transfer", "transient"]
+
+
+def _contents(paths):
+    contents = {}
+    for path in paths:
+        with open(path, 'rb') as f:
+            contents[os.path.basename(path)] = f.read()
+    return contents
+
+
+def test_metrics_do_not_change_outputs(make_dataset, tmp_path):
+    dataset = make_dataset(files=1, sheets=4, rows=30)
+    source = dataset["files"][0]
+    os.makedirs(tmp_path / "plain")
+    os.makedirs(tmp_path / "metrics")
+
+    plain = ExcelProcessor(source, SHEET_TYPES, str(tmp_path / "plain" / "out")).process_and_save()
+    measured = ExcelProcessor(source, SHEET_TYPES, str(tmp_path / "metrics" / "out"),
+                              collect_metrics=True).process_and_save()
+
+    assert list(measured) == [path.replace("plain", "metrics") for path in plain]
+    assert _contents(measured) == _contents(plain)
+
+    stages = [entry["stage"] for entry in measured.metrics]
+    for stage in ("parse", "transform", "write"):
+        assert stages.count(stage) == 4
+    summary = measured.metrics[-1]
+    assert summary["stage"] == "file"
+    assert summary["sheets"] == 4
+    assert summary["rows"] > 0
+    assert all(entry["wall_s"] >= 0 and entry["cpu_s"] >= 0 for entry in measured.metrics)
+
+
+def test_batch_metrics_match_default_run(make_dataset, tmp_path):
+    dataset = make_dataset(files=2)
+    directory = os.path.dirname(dataset["files"][0])
+
+    plain = BatchExcelProcessor(directory, "*.xlsx", SHEET_TYPES, "device").process_all_files(
+        output_dir=str(tmp_path / "plain"))
+    processor = BatchExcelProcessor(directory, "*.xlsx", SHEET_TYPES, "device", collect_metrics=True)
+    measured = processor.process_all_files(output_dir=str(tmp_path / "metrics"), use_multiprocessing=True,
+                                           max_workers=2)
+
+    assert _contents(p for outputs in measured.values() for p in outputs) == \
+        _contents(p for outputs in plain.values() for p in outputs)
+    assert sum(entry["stage"] == "file" for entry in processor.metrics) == 2
+
+    count = write_metrics(str(tmp_path / "metrics.jsonl"), processor.metrics)
+    with open(tmp_path / "metrics.jsonl", encoding='utf-8') as f:
+        assert len(f.readlines()) == count == len(processor.metrics)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""
+并行处理路径的测试：输出文件与单进程串行处理逐字节相同
+"""
+
+import os
+
+from oect_excel_processor import BatchExcelProcessor, ExcelProcessor
+
+SHEET_TYPES = ["transfer", "transient"]
+
+
+def _contents(paths):
+    """文件名到文件内容的字典"""
+    contents = {}
+    for path in paths:
+        with open(path, 'rb') as f:
+            contents[os.path.basename(path)] = f.read()
+    return contents
+
+
+def _batch_outputs(results):
+    return [path for outputs in results.values() for path in outputs]
+
+
+def test_parallel_sheets_match_serial(make_dataset, tmp_path):
+    source = make_dataset(files=1, sheets=6)["files"][0]
+    os.makedirs(tmp_path / "serial")
+    os.makedirs(tmp_path / "parallel")
+
+    serial = ExcelProcessor(source, SHEET_TYPES, str(tmp_path / "serial" / "out")).process_and_save()
+    parallel = ExcelProcessor(source, SHEET_TYPES, str(tmp_path / "parallel" / "out")).process_and_save(
+        parallel_sheets=True, max_workers=2)
+
+    assert len(serial) == 6
+    assert _contents(parallel) == _contents(serial)
+
+
+def test_sheet_granularity_matches_serial(make_dataset, tmp_path):
+    dataset = make_dataset(files=3, sheets=3)
+    processor = BatchExcelProcessor(os.path.dirname(dataset["files"][0]), "*.xlsx", SHEET_TYPES, "device")
+
+    serial = processor.process_all_files(output_dir=str(tmp_path / "serial"))
+    parallel = processor.process_all_files(output_dir=str(tmp_path / "parallel"), use_multiprocessing=True,
+                                           max_workers=2, granularity="sheet", chunksize=2)
+
+    assert list(parallel) == list(serial)
+    assert len(_batch_outputs(serial)) == 9
+    assert _contents(_batch_outputs(parallel)) == _contents(_batch_outputs(serial))
+
+
+def test_pipeline_matches_serial(make_dataset, tmp_path):
+    dataset = make_dataset(files=3, sheets=3)
+    processor = BatchExcelProcessor(os.path.dirname(dataset["files"][0]), "*.xlsx", SHEET_TYPES, "device")
+
+    serial = processor.process_all_files(output_dir=str(tmp_path / "serial"))
+    # 队列只容纳一个工作表，读取阶段会被写入阶段反压
+    pipelined = processor.process_all_files(output_dir=str(tmp_path / "pipeline"), pipeline=True,
+                                            stage_workers={"read": 2, "transform": 2, "write": 2}, queue_size=1)
+
+    assert list(pipelined) == list(serial)
+    assert _contents(_batch_outputs(pipelined)) == _contents(_batch_outputs(serial))
+    assert set(processor.stage_stats) >= {"read", "transform", "write"}
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+"""
+内存结果接口的测试：iter_frames、process_to_frames、iter_results 返回的数据与写出的CSV相同
+"""
+
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from oect_excel_processor import BatchExcelProcessor, ExcelProcessor
+
+SHEET_TYPES = ["transfer", "transient"]
+
+
+def _as_csv(frame: pd.DataFrame) -> pd.DataFrame:
+    """把内存中的结果经过一次CSV往返，与读回的输出文件可以直接比较"""
+    return pd.read_csv(io.StringIO(frame.to_csv(index=False)))
+
+
+def test_process_to_frames_matches_csv(make_dataset, read_outputs, tmp_path):
+    source = make_dataset(files=1, sheets=4)["files"][0]
+
+    csv_files = ExcelProcessor(source, SHEET_TYPES, str(tmp_path / "csv")).process_and_save()
+    frames = ExcelProcessor(source, SHEET_TYPES).process_to_frames()
+
+    assert list(frames) == [(1, "transfer"), (2, "transient"), (3, "transfer"), (4, "transient")]
+    for frame, expected in zip(frames.values(), read_outputs(csv_files)):
+        pd.testing.assert_frame_equal(_as_csv(frame), expected)
+
+
+def test_iter_frames_as_numpy(make_dataset, read_outputs, tmp_path):
+    source = make_dataset(files=1, sheets=2)["files"][0]
+
+    csv_files = ExcelProcessor(source, SHEET_TYPES, str(tmp_path / "csv")).process_and_save()
+    results = list(ExcelProcessor(source, SHEET_TYPES).iter_frames(as_numpy=True))
+
+    assert len(results) == len(csv_files) == 2
+    for result, expected in zip(results, read_outputs(csv_files)):
+        assert isinstance(result.data, np.ndarray)
+        assert result.columns == list(expected.columns)
+        np.testing.assert_allclose(result.data.astype(float), expected.to_numpy(dtype=float))
+
+
+@pytest.mark.parametrize("use_multiprocessing", [False, True])
+def test_iter_results_matches_batch_output(make_dataset, read_outputs, tmp_path, use_multiprocessing):
+    directory = os.path.dirname(make_dataset(files=3, sheets=2)["files"][0])
+
+    saved = BatchExcelProcessor(directory, "*.xlsx", SHEET_TYPES).process_all_files(output_dir=str(tmp_path / "out"))
+    results = list(BatchExcelProcessor(directory, "*.xlsx", SHEET_TYPES).iter_results(
+        use_multiprocessing=use_multiprocessing, max_workers=2))
+
+    expected_files = [path for paths in saved.values() for path in paths]
+    assert [(os.path.basename(result.file_path), result.sheet_index) for result in results] == [
+        (f"device_{file_index}.xlsx", sheet_index) for file_index in (1, 2, 3) for sheet_index in (1, 2)]
+    for result, expected in zip(results, read_outputs(expected_files)):
+        pd.testing.assert_frame_equal(_as_csv(result.data), expected)
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+"""
+处理服务（ProcessingServer）的测试：HTTP接口的请求校验、任务队列文件的加载和Unix套接字的绑定
+"""
+
+import os
+import json
+import stat
+import errno
+import socket
+import threading
+import http.client
+
+import pytest
+
+from oect_excel_processor.server import ProcessingServer, JobQueue, MAX_REQUEST_BYTES, JOBS_FILENAME, JOBS_VERSION
+
+
+@pytest.fixture(scope="module")
+def server(tmp_path_factory):
+    service = ProcessingServer(str(tmp_path_factory.mktemp("state")), port=0, max_workers=1)
+    thread = threading.Thread(target=service.serve_forever, daemon=True)
+    thread.start()
+    yield service
+    service.shutdown()
+    thread.join(timeout=30)
+
+
+def _post(service, headers, body=b""):
+    """发送POST /jobs，headers原样发送（不自动添加Content-Length），返回状态码和响应"""
+    host, port = service.httpd.server_address[:2]
+    connection = http.client.HTTPConnection(host, port, timeout=10)
+    try:
+        connection.putrequest("POST", "/jobs")
+        for name, value in headers.items():
+            connection.putheader(name, value)
+        connection.endheaders(body or None)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read().decode("utf-8"))
+    finally:
+        connection.close()
+
+
+def test_missing_content_length_is_rejected(server):
+    status, body = _post(server, {})
+    assert status == 411
+    assert "error" in body
+
+
+@pytest.mark.parametrize("value", ["abc", "-1", "1.5"])
+def test_invalid_content_length_is_rejected(server, value):
+    status, body = _post(server, {"Content-Length": value})
+    assert status == 400
+    assert "error" in body
+
+
+def test_oversized_request_is_rejected(server):
+    status, _ = _post(server, {"Content-Length": str(MAX_REQUEST_BYTES + 1)})
+    assert status == 413
+
+
+def test_invalid_job_is_rejected(server, tmp_path):
+    data = json.dumps({"path": str(tmp_path / "missing.xlsx")}).encode("utf-8")
+    status, body = _post(server, {"Content-Length": str(len(data))}, data)
+    assert status == 400
+    assert "error" in body
+
+
+def _spec(tmp_path):
+    return {"kind": "file", "path": str(tmp_path / "a.xlsx"), "sheet_types": ["transfer"],
+            "output_dir": str(tmp_path), "output_prefix": "output", "output_format": "csv"}
+
+
+def _job(job_id, status, spec):
+    return {"id": job_id, "status": status, "spec": spec, "submitted": "2024-01-01T00:00:00", "started": None,
+            "finished": None, "outputs": [], "failed_files": [], "error": None}
+
+
+def test_job_queue_skips_malformed_entries(tmp_path, capsys):
+    spec = _spec(tmp_path)
+    jobs = [
+        _job("queued", "queued", spec),
+        _job("running", "running", spec),
+        {"id": "partial", "status": "queued"},
+        _job("unknown", "paused", spec),
+        _job("nospec", "queued", {**spec, "kind": "directory"}),
+        "not a job",
+    ]
+    (tmp_path / JOBS_FILENAME).write_text(json.dumps({"version": JOBS_VERSION, "jobs": jobs}), encoding="utf-8")
+
+    queue = JobQueue(str(tmp_path))
+
+    assert sorted(queue.jobs) == ["queued", "running"]
+    assert queue.jobs["running"]["status"] == "queued"
+    output = capsys.readouterr().out
+    assert output.count("跳过任务队列中的") == 4
+    for reason in ("缺少字段", "状态无效", "参数缺少字段", "不是JSON对象"):
+        assert reason in output
+
+
+@pytest.mark.parametrize("content", [[], {"version": JOBS_VERSION, "jobs": {}}])
+def test_job_queue_ignores_malformed_file(tmp_path, capsys, content):
+    (tmp_path / JOBS_FILENAME).write_text(json.dumps(content), encoding="utf-8")
+    assert JobQueue(str(tmp_path)).jobs == {}
+    assert "从空队列开始" in capsys.readouterr().out
+
+
+unix_only = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="需要Unix套接字")
+
+
+@unix_only
+def test_stale_socket_is_replaced(tmp_path):
+    path = str(tmp_path / "s.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+
+    service = ProcessingServer(str(tmp_path / "state"), socket_path=path, max_workers=1)
+    try:
+        assert stat.S_ISSOCK(os.lstat(path).st_mode)
+    finally:
+        service.httpd.server_close()
+
+
+@unix_only
+def test_live_socket_is_not_removed(tmp_path):
+    path = str(tmp_path / "s.sock")
+    live = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    live.bind(path)
+    live.listen(1)
+    try:
+        with pytest.raises(OSError, match="已有服务") as excinfo:
+            ProcessingServer(str(tmp_path / "state"), socket_path=path, max_workers=1)
+        assert excinfo.value.errno == errno.EADDRINUSE
+        assert os.path.exists(path)
+    finally:
+        live.close()
+
+
+@unix_only
+def test_regular_file_is_not_removed(tmp_path):
+    path = tmp_path / "s.sock"
+    path.write_text("data")
+
+    with pytest.raises(FileExistsError):
+        ProcessingServer(str(tmp_path / "state"), socket_path=str(path), max_workers=1)
+    assert path.read_text() == "data"
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+"""
+transient工作表的两种合并引擎（numpy向量化实现与pandas逐列对循环实现）的等价性测试
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from oect_excel_processor import ExcelProcessor
+
+NAN = np.nan
+
+
+def _sheet(columns):
+    """按列构造无表头读取的工作表：前两行为说明，第三行为字段名，之后为数据，短列用NaN补齐"""
+    rows = max(len(column) for column in columns)
+    data = {i: list(column) + [NAN] * (rows - len(column)) for i, column in enumerate(columns)}
+    return pd.DataFrame(data, columns=range(len(columns)), dtype=object)
+
+
+def _pair(length, offset=0.0):
+    """一组长度为length的 Time(s)、Id(A) 列（含字段名）"""
+    time = ["Time(s)"] + [i * 0.01 + offset for i in range(length)]
+    current = ["Id(A)"] + [-1e-6 * (i + 1) for i in range(length)]
+    return time, current
+
+
+def _with_preamble(columns):
+    """在每列前加上两行说明"""
+    return [["Instrument", None] + list(column) for column in columns]
+
+
+SHEETS = {
+    "ragged_pairs": _with_preamble([*_pair(6), *_pair(4, 1.0), *_pair(2, 2.0)]),
+    "nan_gaps": _with_preamble([
+        ["Time(s)", 0.0, NAN, 0.02, 0.03, NAN], ["Id(A)", 1e-6, 2e-6, NAN, 4e-6, NAN],
+        ["Time(s)", NAN, NAN, NAN], ["Id(A)", NAN, NAN, NAN],
+        ["Time(s)", 0.0, 0.01], ["Id(A)", 5e-6, 6e-6],
+    ]),
+    "odd_trailing_column": _with_preamble([*_pair(3), *_pair(5, 1.0), ["Time(s)", 9.0, 9.5]]),
+    "object_and_str_cells": _with_preamble([
+        ["Time(s)", 0.0, "0.01", 2, "n/a"], ["Id(A)", "1e-6", 2e-6, "x", 4e-6],
+        ["Time(s)", 1, True, None], ["Id(A)", "", 3e-6, 5e-6],
+    ]),
+    "single_pair": _with_preamble([*_pair(3)]),
+    "header_only": _with_preamble([["Time(s)"], ["Id(A)"]]),
+}
+
+
+@pytest.fixture
+def processor(tmp_path):
+    # 只调用合并方法，不读取文件
+    path = tmp_path / "empty.xls"
+    path.write_bytes(b"")
+    return ExcelProcessor(str(path), ["transient"], str(tmp_path / "out"), engine="xlrd")
+
+
+@pytest.mark.parametrize("name", sorted(SHEETS))
+def test_numpy_engine_matches_pandas_engine(processor, name):
+    sheet = _sheet(SHEETS[name])
+    expected = processor._process_transient_sheet_pandas(sheet.copy())
+    actual = processor._process_transient_sheet_numpy(sheet.copy())
+    pd.testing.assert_frame_equal(actual, expected)
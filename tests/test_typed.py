@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+"""
+类型化模式和CSV精度的端到端测试：输出与默认路径相同（float32和限定精度时在相应的误差内）
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from oect_excel_processor import ExcelProcessor
+
+SHEET_TYPES = ["transfer", "transient"]
+
+
+@pytest.fixture
+def default_outputs(make_dataset, read_outputs, tmp_path):
+    source = make_dataset(files=1, sheets=4)["files"][0]
+    files = ExcelProcessor(source, SHEET_TYPES, str(tmp_path / "default")).process_and_save()
+    return source, read_outputs(files)
+
+
+def test_float64_matches_default(default_outputs, read_outputs, tmp_path):
+    source, expected = default_outputs
+    files = ExcelProcessor(source, SHEET_TYPES, str(tmp_path / "typed"), dtype="float64").process_and_save()
+
+    assert len(files) == len(expected)
+    for actual, frame in zip(read_outputs(files), expected):
+        pd.testing.assert_frame_equal(actual, frame.astype(np.float64))
+
+
+def test_float32_matches_default_within_single_precision(default_outputs, tmp_path):
+    source, expected = default_outputs
+    frames = ExcelProcessor(source, SHEET_TYPES, dtype="float32").process_to_frames()
+
+    assert len(frames) == len(expected)
+    for actual, frame in zip(frames.values(), expected):
+        assert all(dtype == np.float32 for dtype in actual.dtypes)
+        assert list(actual.columns) == list(frame.columns)
+        np.testing.assert_allclose(actual.to_numpy(dtype=np.float64), frame.to_numpy(dtype=np.float64), rtol=1e-6)
+
+
+@pytest.mark.parametrize("dtype", [None, "float64", "float32"])
+def test_precision_matches_percent_g(default_outputs, tmp_path, dtype):
+    source, expected = default_outputs
+    files = ExcelProcessor(source, SHEET_TYPES, str(tmp_path / "precise"), dtype=dtype,
+                           precision=6).process_and_save()
+
+    for path, frame in zip(sorted(files), expected):
+        with open(path, newline='') as handle:
+            text = handle.read()
+        if dtype == "float32":
+            frame = frame.astype(np.float32)
+        assert text == frame.to_csv(index=False, float_format='%.6g')
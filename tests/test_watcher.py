@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+"""
+目录监视（FolderWatcher）的测试
+"""
+
+import os
+
+from oect_excel_processor import BatchExcelProcessor
+from oect_excel_processor.watcher import FolderWatcher
+
+
+def _watcher(dataset, output_dir, settle):
+    processor = BatchExcelProcessor(os.path.dirname(dataset["files"][0]), "*.xlsx",
+                                    ["transfer", "transient"], "device")
+    return FolderWatcher(processor, str(output_dir), max_workers=1, settle=settle, poll_interval=0.2,
+                         backend="polling")
+
+
+def test_existing_files_wait_for_settle(make_dataset, tmp_path):
+    dataset = make_dataset(files=1)
+
+    # 启动前已存在的文件也要等settle秒不再变化后才处理
+    watcher = _watcher(dataset, tmp_path / "out", settle=30)
+    watcher.run(duration=1)
+    assert watcher.processed == 0
+
+    watcher = _watcher(dataset, tmp_path / "out", settle=0.2)
+    watcher.run(duration=3)
+    assert watcher.processed == 1
+
+    # 重新启动时跳过已处理且未变化的文件
+    watcher = _watcher(dataset, tmp_path / "out", settle=0.2)
+    watcher.run(duration=1)
+    assert watcher.processed == 0
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+"""
+指定有效数字位数时的快速CSV写入测试：输出必须与 to_csv(float_format='%.{precision}g') 完全相同
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from oect_excel_processor import writers
+from oect_excel_processor.writers import render_csv
+
+
+def _expected(frame, precision):
+    return frame.to_csv(index=False, float_format=f"%.{precision}g").encode('utf-8')
+
+
+def _random_values(count, seed=0):
+    """覆盖各数量级、符号以及恰好在舍入中点附近的值"""
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=count) * 10.0 ** rng.integers(-320, 300, size=count)
+    values[::7] = np.round(values[::7] * 1000) / 1000
+    values[::11] = rng.integers(-10 ** 6, 10 ** 6, size=len(values[::11])) / 8
+    return values
+
+
+@pytest.mark.parametrize("precision", [1, 2, 3, 6, 10, 15])
+def test_float_block_matches_percent_g(precision):
+    values = _random_values(5000).reshape(-1, 5)
+    frame = pd.DataFrame(values)
+    assert render_csv(frame, precision) == _expected(frame, precision)
+
+
+def test_float_block_special_values():
+    values = [0.0, -0.0, np.nan, np.inf, -np.inf, 5e-324, 1.7976931348623157e308, 0.125, 2.5, 9.9999999,
+              1e-5, 0.0001, 123456.5, 999999.5]
+    frame = pd.DataFrame({"a": values, "b": values[::-1]})
+    for precision in (1, 2, 6, 15):
+        assert render_csv(frame, precision) == _expected(frame, precision)
+
+
+def test_mixed_int_float_and_object_columns():
+    frame = pd.DataFrame({
+        "i": [12345678, 2, -7],
+        "f": [1.23456, 2.5, np.nan],
+        "f32": np.array([1.23456, np.nan, 3e-9], dtype=np.float32),
+        "u8": np.array([0, 255, 7], dtype=np.uint8),
+        "extremes": [np.iinfo(np.int64).min, np.iinfo(np.int64).max, 0],
+    })
+    assert render_csv(frame, 3) == _expected(frame, 3)
+
+    # 只含数值的object列按数值列格式化，含有文本的object列按原样写出
+    frame["o"] = pd.Series([1.23456, None, "text"], dtype=object)
+    frame["on"] = pd.Series([1.23456, 12345678, None], dtype=object)
+    assert render_csv(frame, 3) == _expected(frame.infer_objects(), 3)
+    assert b"1.23e+07" in render_csv(frame, 3)
+
+
+def test_blocks_and_file_output_match(tmp_path, monkeypatch):
+    monkeypatch.setattr(writers, "CSV_BLOCK_ROWS", 7)
+    frame = pd.DataFrame({"Vg(V)": _random_values(50, seed=1), "n": np.arange(50),
+                          "Id(A)": _random_values(50, seed=2)})
+
+    assert render_csv(frame, 6) == _expected(frame, 6)
+    path = tmp_path / "out.csv"
+    writers._write_csv(frame, str(path), 6)
+    assert path.read_bytes() == _expected(frame, 6)
+
+
+def test_without_precision_uses_full_precision():
+    frame = pd.DataFrame({"a": [0.1 + 0.2, 1 / 3]})
+    assert render_csv(frame) == frame.to_csv(index=False).encode('utf-8')